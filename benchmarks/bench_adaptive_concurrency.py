@@ -0,0 +1,102 @@
+"""同時実行数の適応制御のベンチマーク
+
+偽の SoundCloud API サーバーに同時処理数の上限（超えると 429）を設定し、途中で上限を変えながら
+固定の同時実行数と AdaptiveLimit による自動調整とで、全要求の完了時間とレート制限の回数を比較する。
+429 で失敗した要求は成功するまで再送する。Discordには接続しない。
+
+使い方:
+    uv run python benchmarks/bench_adaptive_concurrency.py --requests 400 --latency 0.05
+    uv run python benchmarks/bench_adaptive_concurrency.py --caps 8 2 --fixed 2 8
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import aiohttp
+from fake_services import (
+    FakeServerThread,
+    FakeServiceOptions,
+    create_fake_soundcloud_app,
+)
+
+
+async def _run_once(args: argparse.Namespace, server: FakeServerThread, concurrency: int | None) -> dict:
+    """concurrency 固定（None で自動調整）で全要求を処理し、所要時間と結果を返す"""
+    os.environ["SOUNDCLOUD_API_BASE_URL"] = server.base_url
+
+    from adaptive_limit import AdaptiveLimit
+    from priority_scheduler import PriorityScheduler
+    from soundcloud_service import SoundCloudService
+
+    limit = None
+    if concurrency is None:
+        limit = AdaptiveLimit("soundcloud", initial=2, maximum=args.max_concurrency)
+        scheduler = PriorityScheduler(concurrency=2, reserved_interactive=0)
+        scheduler.set_limit("soundcloud", limit)
+    else:
+        scheduler = PriorityScheduler(concurrency=concurrency, reserved_interactive=0)
+
+    service = SoundCloudService(limiter=limit)
+    service.access_token = "bench"
+    service.client_session = aiohttp.ClientSession()
+    caps = iter(args.caps)
+    server.state.options.max_concurrent = next(caps)
+    completed = 0
+    phase_size = args.requests // len(args.caps) + 1
+
+    async def resolve(index: int) -> None:
+        nonlocal completed
+        while True:
+            async with scheduler.slot("soundcloud"):
+                track = await service.resolve_url(f"https://soundcloud.com/bench/track-{index + 1}")
+            if track:
+                break
+        completed += 1
+        # 一定件数ごとに偽サーバーの上限を変え、時間帯による受け入れ量の変化を再現する
+        if completed % phase_size == 0:
+            server.state.options.max_concurrent = next(caps, server.state.options.max_concurrent)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(resolve(index) for index in range(args.requests)))
+    finally:
+        await service.close()
+    return {
+        "seconds": time.perf_counter() - started,
+        "limit": limit.limit if limit else concurrency,
+    }
+
+
+def main() -> None:
+    """エントリーポイント"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400, help="要求数")
+    parser.add_argument("--latency", type=float, default=0.05, help="偽APIの応答遅延（秒）")
+    parser.add_argument("--caps", type=int, nargs="+", default=[8, 2, 6], help="偽APIの同時処理数の上限（順に切り替え）")
+    parser.add_argument("--fixed", type=int, nargs="+", default=[2, 8], help="比較する固定の同時実行数")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="自動調整の上限")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    print(f"{'mode':>10} {'seconds':>9} {'req/s':>8} {'429s':>6} {'final limit':>12}")
+    for concurrency in [*args.fixed, None]:
+        app = create_fake_soundcloud_app(FakeServiceOptions(latency=args.latency))
+        with FakeServerThread(app) as server:
+            outcome = asyncio.run(_run_once(args, server, concurrency))
+            throttled = server.state.errors["rate_limit"]
+        label = f"fixed {concurrency}" if concurrency else "adaptive"
+        print(
+            f"{label:>10} {outcome['seconds']:>9.2f} {args.requests / outcome['seconds']:>8.1f} "
+            f"{throttled:>6} {outcome['limit']:>12}",
+        )
+
+
+if __name__ == "__main__":
+    main()
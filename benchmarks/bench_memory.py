@@ -0,0 +1,210 @@
+"""通常モードと省メモリモード（LEAN_MODE）のメモリ使用量比較ベンチマーク
+
+Discordには接続せず、合成した GUILD_CREATE / MESSAGE_CREATE ペイロードを discord.py の
+接続状態に直接流し込み、サーバー1,000件あたりのRSS増加量を計測する。
+モードごとに別プロセスで実行するため、互いのキャッシュの影響を受けない。
+
+使い方:
+    uv run python benchmarks/bench_memory.py --guilds 5000
+"""
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+JOINED_AT = "2024-01-01T00:00:00.000000+00:00"
+
+
+def _current_rss() -> int:
+    """現在のRSS（バイト）を取得"""
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    msg = "/proc/self/status から RSS を取得できません（Linux のみ対応）"
+    raise RuntimeError(msg)
+
+
+def _user(user_id: int) -> dict:
+    """ユーザーペイロード"""
+    return {
+        "id": str(user_id),
+        "username": f"user{user_id}",
+        "discriminator": "0",
+        "global_name": f"User {user_id}",
+        "avatar": None,
+    }
+
+
+def _member(user_id: int, role_ids: list[str]) -> dict:
+    """メンバーペイロード"""
+    return {
+        "user": _user(user_id),
+        "roles": role_ids,
+        "joined_at": JOINED_AT,
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def _guild_payload(index: int, args: argparse.Namespace) -> dict:
+    """GUILD_CREATE ペイロードを生成"""
+    guild_id = 100_000_000_000 + index * 10_000
+    role_ids = [str(guild_id + 1 + role) for role in range(args.roles)]
+    voice_members = [guild_id + 5_000 + member for member in range(args.voice_members)]
+    return {
+        "id": str(guild_id),
+        "name": f"Guild {index}",
+        "owner_id": str(voice_members[0] if voice_members else guild_id),
+        "member_count": args.member_count,
+        "large": args.member_count > 250,
+        "features": [],
+        "icon": None,
+        "roles": [
+            {"id": str(guild_id), "name": "@everyone", "permissions": "1071698660929", "position": 0,
+             "color": 0, "hoist": False, "managed": False, "mentionable": False},
+            *[
+                {"id": role_id, "name": f"role-{role}", "permissions": "0", "position": role + 1,
+                 "color": 0, "hoist": False, "managed": False, "mentionable": False}
+                for role, role_id in enumerate(role_ids)
+            ],
+        ],
+        "channels": [
+            {"id": str(guild_id + 1_000 + channel), "type": 0, "name": f"channel-{channel}",
+             "position": channel, "permission_overwrites": [], "topic": None, "nsfw": False}
+            for channel in range(args.channels)
+        ],
+        "emojis": [
+            {"id": str(guild_id + 2_000 + emoji), "name": f"emoji{emoji}", "roles": [],
+             "require_colons": True, "managed": False, "animated": False, "available": True}
+            for emoji in range(args.emojis)
+        ],
+        "stickers": [],
+        # プレゼンス・メンバーインテントなしでもボイスチャンネル参加者は含まれる
+        "members": [_member(user_id, role_ids[:2]) for user_id in voice_members],
+        "voice_states": [
+            {"user_id": str(user_id), "channel_id": str(guild_id + 1_000), "session_id": "x",
+             "deaf": False, "mute": False, "self_deaf": False, "self_mute": False,
+             "self_video": False, "suppress": False, "request_to_speak_timestamp": None}
+            for user_id in voice_members
+        ],
+        "threads": [],
+        "stage_instances": [],
+        "guild_scheduled_events": [],
+    }
+
+
+def _message_payload(guild: dict, index: int) -> dict:
+    """MESSAGE_CREATE ペイロードを生成"""
+    guild_id = int(guild["id"])
+    author_id = guild_id + 8_000 + index
+    return {
+        "id": str(guild_id * 100 + index),
+        "channel_id": guild["channels"][index % len(guild["channels"])]["id"],
+        "guild_id": guild["id"],
+        "author": _user(author_id),
+        "member": {"roles": [], "joined_at": JOINED_AT, "deaf": False, "mute": False, "flags": 0},
+        "content": f"message {index} https://www.youtube.com/watch?v=dQw4w9WgXcQ と雑談",
+        "timestamp": JOINED_AT,
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+    }
+
+
+def _run_child(args: argparse.Namespace) -> None:
+    """1モード分の計測（子プロセス）"""
+    from main import MusicPlaylistBot
+
+    bot = MusicPlaylistBot()
+    state = bot._connection
+    # イベントはBotへ配送せずキャッシュへの格納だけを計測する
+    state.dispatch = lambda *args, **kwargs: None
+
+    payloads = [_guild_payload(index, args) for index in range(args.guilds)]
+    messages = [
+        _message_payload(guild, index)
+        for guild in payloads
+        for index in range(args.messages_per_guild)
+    ]
+
+    gc.collect()
+    before = _current_rss()
+    for payload in payloads:
+        state._add_guild_from_data(payload)
+    for message in messages:
+        state.parse_message_create(message)
+    # ペイロードは保持したまま計測し、キャッシュによる増加分だけを差分に含める
+    gc.collect()
+    after = _current_rss()
+
+    print(json.dumps({
+        "rss_before": before,
+        "rss_after": after,
+        "guilds": len(bot.guilds),
+        "cached_members": sum(len(guild.members) for guild in bot.guilds),
+        "cached_messages": len(bot.cached_messages),
+        "intents": bot.intents.value,
+    }))
+
+
+def main() -> None:
+    """エントリーポイント"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=2000, help="サーバー数")
+    parser.add_argument("--channels", type=int, default=20, help="サーバーあたりのチャンネル数")
+    parser.add_argument("--roles", type=int, default=10, help="サーバーあたりのロール数")
+    parser.add_argument("--emojis", type=int, default=10, help="サーバーあたりの絵文字数")
+    parser.add_argument("--voice-members", type=int, default=5, help="サーバーあたりのボイス参加メンバー数")
+    parser.add_argument("--member-count", type=int, default=500, help="サーバーの総メンバー数（表示用）")
+    parser.add_argument("--messages-per-guild", type=int, default=5, help="サーバーあたりの受信メッセージ数")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _run_child(args)
+        return
+
+    results = {}
+    for mode, lean in (("default", "false"), ("lean", "true")):
+        env = {**os.environ, "LEAN_MODE": lean, "LOOP_MONITOR_ENABLED": "false"}
+        env.pop("MAX_MESSAGES", None)
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", *sys.argv[1:]],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'mode':<8} {'RSS delta':>12} {'per 1k guilds':>15} {'members':>9} {'messages':>9}")
+    for mode, result in results.items():
+        delta = result["rss_after"] - result["rss_before"]
+        per_thousand = delta / result["guilds"] * 1000
+        print(
+            f"{mode:<8} {delta / 2**20:>10.1f}MB {per_thousand / 2**20:>13.1f}MB "
+            f"{result['cached_members']:>9} {result['cached_messages']:>9}",
+        )
+
+    default_delta = results["default"]["rss_after"] - results["default"]["rss_before"]
+    lean_delta = results["lean"]["rss_after"] - results["lean"]["rss_before"]
+    if default_delta > 0:
+        print(f"\nlean mode: {1 - lean_delta / default_delta:.0%} less memory per guild")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""YouTube プレイリスト取り込みのベンチマーク
+
+偽の YouTube API サーバーに取り込み元プレイリストを用意し、HTTPバッチのサイズを変えて
+YouTubePlaylistImporter の所要時間とAPI呼び出し回数を比較する。Discordには接続しない。
+
+使い方:
+    uv run python benchmarks/bench_playlist_import.py --videos 1000 --latency 0.05
+    uv run python benchmarks/bench_playlist_import.py --batch-sizes 1 10 50 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fake_services import FakeServerThread, FakeServiceOptions, create_fake_youtube_app
+from google.auth.credentials import AnonymousCredentials
+
+SOURCE_PLAYLIST_ID = "PL-bench-source"
+
+
+async def _import_once(args: argparse.Namespace, base_url: str, batch_size: int, db_path: Path) -> dict:
+    """1回分の取り込みを実行して所要時間と結果を返す"""
+    os.environ.update({
+        "YOUTUBE_PLAYLIST_ID": "PL-bench-target",
+        "YOUTUBE_API_BASE_URL": base_url,
+    })
+
+    from database import DatabaseManager
+    from music_services import YouTubeService
+    from playlist_import import YouTubePlaylistImporter
+    from playlist_writer import PlaylistWriter
+    from processed_url_writer import ProcessedUrlWriter
+
+    db_manager = DatabaseManager(db_path)
+    await db_manager.initialize()
+
+    youtube = YouTubeService()
+    youtube.credentials = AnonymousCredentials()
+    youtube.service = youtube._build_client(youtube.credentials)
+
+    writer = PlaylistWriter(
+        "youtube",
+        youtube.insert_video,
+        workers=args.workers,
+        rate=0,
+        write_batch=youtube.insert_videos,
+        batch_size=batch_size,
+    )
+    url_writer = ProcessedUrlWriter(db_manager)
+    importer = YouTubePlaylistImporter(youtube, writer, db_manager, max_items=args.videos, url_writer=url_writer)
+
+    started = time.perf_counter()
+    try:
+        result = await importer.run(SOURCE_PLAYLIST_ID, guild_id=1)
+    finally:
+        await writer.stop()
+        await url_writer.stop()
+    return {"seconds": time.perf_counter() - started, "result": result}
+
+
+def main() -> None:
+    """エントリーポイント"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=500, help="取り込み元プレイリストの動画数")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 50], help="比較するバッチサイズ")
+    parser.add_argument("--workers", type=int, default=4, help="書き込みワーカー数")
+    parser.add_argument("--latency", type=float, default=0.05, help="偽APIの応答遅延（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="偽APIが5xxを返す確率")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    print(f"{'batch':>6} {'seconds':>9} {'added':>7} {'failed':>7} {'HTTP requests':>14}")
+    for batch_size in args.batch_sizes:
+        app = create_fake_youtube_app(FakeServiceOptions(latency=args.latency, error_rate=args.error_rate))
+        app["state"].source_playlists[SOURCE_PLAYLIST_ID] = [f"v{index:010d}" for index in range(args.videos)]
+        with FakeServerThread(app) as server, tempfile.TemporaryDirectory() as tmp:
+            outcome = asyncio.run(_import_once(args, server.base_url, batch_size, Path(tmp) / "bench.db"))
+            requests = server.state.requests
+            # バッチ内の個別リクエストは1回のHTTP往復に含まれる
+            round_trips = requests["playlistItems.list"] + requests["batch"] + (
+                requests["playlistItems.insert"] if batch_size == 1 else 0
+            )
+        result = outcome["result"]
+        print(
+            f"{batch_size:>6} {outcome['seconds']:>9.2f} {result.added if result else 0:>7} "
+            f"{result.failed if result else 0:>7} {round_trips:>14}",
+        )
+
+
+if __name__ == "__main__":
+    main()
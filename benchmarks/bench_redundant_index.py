@@ -0,0 +1,94 @@
+"""重複インデックス削除前後の挿入スループット比較ベンチマーク
+
+マイグレーション v4（idx_processed_urls_guild_url あり）と最新スキーマ（削除済み）で
+processed_urls への挿入速度とファイルサイズを比較する。
+
+使い方:
+    uv run python benchmarks/bench_redundant_index.py --rows 50000 --prefill 200000
+"""
+
+import argparse
+import asyncio
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import aiosqlite
+
+from migrations import LATEST_VERSION, run_migrations
+
+INSERT_SQL = """
+    INSERT OR IGNORE INTO processed_urls
+    (guild_id, url, service_type, video_id, canonical_id, submitter_id, message_id, channel_id)
+    VALUES (?, ?, 'youtube', ?, ?, ?, ?, ?)
+"""
+
+
+def _make_row(index: int) -> tuple:
+    """ベンチマーク用の行を生成"""
+    video_id = f"{index:011d}"
+    return (
+        index % 50,
+        f"https://www.youtube.com/watch?v={video_id}",
+        video_id,
+        f"youtube:{video_id}",
+        index % 997,
+        index,
+        index % 7,
+    )
+
+
+async def _create_schema(db_path: Path, version: int) -> None:
+    """指定バージョンまでマイグレーションを適用"""
+    async with aiosqlite.connect(db_path, isolation_level=None) as db:
+        await db.execute("PRAGMA journal_mode=WAL")
+        await run_migrations(db, target_version=version)
+
+
+def _measure(db_path: Path, rows: int, prefill: int, commit_every: int) -> float:
+    """挿入スループット（行/秒）を計測"""
+    conn = sqlite3.connect(db_path)
+    conn.executemany(INSERT_SQL, (_make_row(i) for i in range(prefill)))
+    conn.commit()
+
+    started = time.perf_counter()
+    for start in range(prefill, prefill + rows, commit_every):
+        stop = min(start + commit_every, prefill + rows)
+        conn.executemany(INSERT_SQL, (_make_row(i) for i in range(start, stop)))
+        conn.commit()
+    elapsed = time.perf_counter() - started
+
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return rows / elapsed
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="計測する挿入行数")
+    parser.add_argument("--prefill", type=int, default=100000, help="計測前に投入する行数")
+    parser.add_argument("--commit-every", type=int, default=1, help="コミット間隔（行）")
+    args = parser.parse_args()
+
+    print(f"rows={args.rows} prefill={args.prefill} commit_every={args.commit_every}")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, version in (("重複インデックスあり(v4)", 4), ("最新スキーマ", LATEST_VERSION)):
+            db_path = Path(tmp) / f"bench_v{version}.db"
+            asyncio.run(_create_schema(db_path, version))
+            throughput = _measure(db_path, args.rows, args.prefill, args.commit_every)
+            size_mb = db_path.stat().st_size / 1024 / 1024
+            results[label] = throughput
+            print(f"{label:<24} {throughput:>10.0f} 行/秒  {size_mb:>8.1f} MB")
+
+    before, after = results.values()
+    print(f"改善率: {(after / before - 1) * 100:+.1f}%")
+
+
+if __name__ == "__main__":
+    main()
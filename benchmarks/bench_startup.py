@@ -0,0 +1,132 @@
+"""コールドスタート時間の計測
+
+1. python -X importtime による main モジュールの読み込み時間（中央値）
+2. Botの生成から setup_hook 完了までの時間（初回起動と、コマンド定義が変わらない2回目の起動）
+
+Discordには接続しない。スラッシュコマンド同期（tree.sync）はAPI呼び出しの代わりに
+--sync-latency 秒待つスタブに置き換え、呼び出し回数を表示する。
+
+使い方:
+    uv run python benchmarks/bench_startup.py --runs 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+def measure_import_time(runs: int) -> list[float]:
+    """main モジュールの累積読み込み時間（秒）を runs 回計測"""
+    samples = []
+    for _ in range(runs):
+        stderr = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import main"],
+            cwd=SRC_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stderr
+        match = re.search(r"\|\s*(\d+) \| main$", stderr, re.MULTILINE)
+        samples.append(int(match.group(1)) / 1_000_000)
+    return samples
+
+
+async def _boot_once(sync_latency: float) -> dict:
+    """Botを生成して setup_hook を実行（子プロセス）"""
+    started = time.perf_counter()
+    from commands import setup_commands
+    from main import MusicPlaylistBot
+
+    imported = time.perf_counter()
+    bot = MusicPlaylistBot()
+    await setup_commands(bot)
+
+    sync_calls = 0
+
+    async def fake_sync(*args: object, **kwargs: object) -> list:
+        nonlocal sync_calls
+        sync_calls += 1
+        await asyncio.sleep(sync_latency)
+        return bot.tree.get_commands()
+
+    bot.tree.sync = fake_sync
+    await bot.setup_hook()
+    finished = time.perf_counter()
+
+    await bot.pending_adds.stop()
+    await bot.maintenance.stop()
+    if bot.loop_monitor:
+        await bot.loop_monitor.stop()
+    await bot.db_manager.close()
+
+    return {
+        "import_seconds": imported - started,
+        "setup_seconds": finished - imported,
+        "total_seconds": finished - started,
+        "sync_calls": sync_calls,
+    }
+
+
+def _boot_in_subprocess(work_dir: Path, sync_latency: float) -> dict:
+    """新しいプロセスでコールドスタートを1回計測"""
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(SRC_DIR),
+        "DATABASE_PATH": str(work_dir / "data" / "bot_data.db"),
+        "LOG_LEVEL": "CRITICAL",
+    }
+    for name in ("SOUNDCLOUD_CLIENT_ID", "SOUNDCLOUD_CLIENT_SECRET", "SOUNDCLOUD_PLAYLIST_ID", "DATABASE_URL"):
+        env.pop(name, None)
+
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", "--sync-latency", str(sync_latency)],
+        cwd=work_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    """エントリーポイント"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="読み込み時間の計測回数")
+    parser.add_argument("--sync-latency", type=float, default=1.0, help="コマンド同期APIの想定所要時間（秒）")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        import logging
+
+        logging.basicConfig(level=logging.CRITICAL)
+        print(json.dumps(asyncio.run(_boot_once(args.sync_latency))))
+        return
+
+    samples = measure_import_time(args.runs)
+    print(f"import main:   median {statistics.median(samples) * 1000:.0f} ms  (min {min(samples) * 1000:.0f} ms, {args.runs} runs)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        for label in ("first boot", "second boot"):
+            result = _boot_in_subprocess(work_dir, args.sync_latency)
+            print(
+                f"{label + ':':<14} total {result['total_seconds'] * 1000:.0f} ms "
+                f"(import {result['import_seconds'] * 1000:.0f} ms, setup_hook {result['setup_seconds'] * 1000:.0f} ms, "
+                f"tree.sync calls: {result['sync_calls']})",
+            )
+
+
+if __name__ == "__main__":
+    main()
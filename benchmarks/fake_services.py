@@ -0,0 +1,471 @@
+"""YouTube Data API / SoundCloud API の偽サーバー
+
+Botが使用するエンドポイントだけをメモリ上で再現し、応答遅延・エラー率・クォータを設定できる。
+YOUTUBE_API_BASE_URL / SOUNDCLOUD_API_BASE_URL をこのサーバーに向けるとオフラインで動作確認できる。
+
+使い方（単体起動）:
+    uv run python benchmarks/fake_services.py --youtube-port 8801 --soundcloud-port 8802 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import email.parser
+import json
+import random
+import re
+import threading
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+# YouTube Data API のクォータコスト（1リクエストあたり）
+YOUTUBE_QUOTA_COSTS = {
+    "playlistItems.list": 1,
+    "playlistItems.insert": 50,
+    "playlists.list": 1,
+    "playlists.insert": 50,
+    "videos.list": 1,
+}
+
+
+@dataclass
+class FakeServiceOptions:
+    """偽サーバーの挙動設定"""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    # YouTube はクォータ単位、SoundCloud はリクエスト数の上限（None で無制限）
+    quota: int | None = None
+    page_size: int = 50
+    # 同時に処理する要求数の上限（超えた要求はレート制限エラー、None で無制限）
+    max_concurrent: int | None = None
+    # YouTube のプレイリスト1つあたりの動画数の上限（None で無制限）
+    playlist_max_items: int | None = None
+
+
+@dataclass
+class FakeServiceState:
+    """偽サーバーの状態とリクエスト統計"""
+
+    options: FakeServiceOptions
+    playlist: list[str | int] = field(default_factory=list)
+    # 収集用以外のプレイリスト（取り込み元・playlists.insert で作成したもの、プレイリストID → 動画ID一覧）
+    source_playlists: dict[str, list[str]] = field(default_factory=dict)
+    # 削除済み・非公開として扱う動画ID（YouTube）・トラックURL（SoundCloud）
+    unavailable: set[str] = field(default_factory=set)
+    requests: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+    quota_used: int = 0
+    in_flight: int = 0
+
+    async def simulate(self, endpoint: str, cost: int = 1, delay: bool = True) -> str | None:
+        """遅延を挿入し、発生させるエラー種別（なければ None）を返す
+
+        バッチ内の個別リクエストは delay=False とし、遅延はバッチ全体で1回だけ挿入する。
+        """
+        self.requests[endpoint] += 1
+        # 上限を超えた要求もレート制限の応答が返るまでの往復時間はかかる
+        throttled = self.options.max_concurrent is not None and self.in_flight >= self.options.max_concurrent
+        seconds = self.options.latency + random.uniform(0, self.options.jitter) if delay else 0
+        if seconds > 0:
+            self.in_flight += not throttled
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                self.in_flight -= not throttled
+        if throttled:
+            self.errors["rate_limit"] += 1
+            return "rate_limit"
+
+        if self.options.quota is not None and self.quota_used + cost > self.options.quota:
+            self.errors["quota"] += 1
+            return "quota"
+        self.quota_used += cost
+
+        if random.random() < self.options.error_rate:
+            self.errors["server"] += 1
+            return "server"
+        return None
+
+    def stats(self) -> dict:
+        """リクエスト統計を取得"""
+        return {
+            "requests": dict(self.requests),
+            "errors": dict(self.errors),
+            "quota_used": self.quota_used,
+            "playlist_size": len(self.playlist),
+        }
+
+
+def _youtube_error_body(kind: str) -> tuple[int, dict]:
+    """YouTube Data API 形式のエラー応答のステータスと本文"""
+    if kind == "quota":
+        status, reason, message = 403, "quotaExceeded", "The request cannot be completed because you have exceeded your quota."
+    elif kind == "rate_limit":
+        status, reason, message = 403, "rateLimitExceeded", "The request cannot be completed due to rate limiting."
+    else:
+        status, reason, message = 500, "backendError", "Backend Error"
+    return status, {"error": {"code": status, "message": message, "errors": [{"reason": reason, "message": message}]}}
+
+
+def _youtube_error(kind: str) -> web.Response:
+    """YouTube Data API 形式のエラー応答を作成"""
+    status, body = _youtube_error_body(kind)
+    return web.json_response(body, status=status)
+
+
+def _parse_batch_parts(content_type: str, payload: str) -> list[tuple[str, str, str, str]]:
+    """multipart/mixed のバッチ要求を (Content-ID, メソッド, パス, 本文) の一覧に分解"""
+    message = email.parser.Parser().parsestr(f"Content-Type: {content_type}\r\n\r\n{payload}")
+    parts = []
+    for part in message.get_payload():
+        request_text = part.get_payload()
+        request_line, rest = request_text.split("\n", 1)
+        method, path, _ = request_line.split(" ", 2)
+        body = re.split(r"\r?\n\r?\n", rest, maxsplit=1)[1] if re.search(r"\r?\n\r?\n", rest) else ""
+        parts.append((part["Content-ID"], method, path, body))
+    return parts
+
+
+def _batch_response(results: list[tuple[str, int, dict]]) -> web.Response:
+    """(Content-ID, ステータス, 本文) の一覧から multipart/mixed のバッチ応答を作成"""
+    boundary = f"batch_{uuid.uuid4().hex}"
+    chunks = []
+    for content_id, status, body in results:
+        reason = "OK" if status < 400 else "Error"
+        chunks.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <response-{content_id.strip('<>')}>\r\n\r\n"
+            f"HTTP/1.1 {status} {reason}\r\n"
+            "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+            f"{json.dumps(body)}\r\n",
+        )
+    chunks.append(f"--{boundary}--\r\n")
+    return web.Response(
+        text="".join(chunks),
+        headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+    )
+
+
+def create_fake_youtube_app(options: FakeServiceOptions | None = None) -> web.Application:
+    """playlistItems.list/insert・playlists.list/insert・videos.list・HTTPバッチを再現する偽 YouTube Data API を作成"""
+    state = FakeServiceState(options or FakeServiceOptions())
+
+    async def list_playlist_items(request: web.Request) -> web.Response:
+        if error := await state.simulate("playlistItems.list", YOUTUBE_QUOTA_COSTS["playlistItems.list"]):
+            return _youtube_error(error)
+
+        playlist = state.source_playlists.get(request.query.get("playlistId"), state.playlist)
+        page_size = min(int(request.query.get("maxResults", 5)), state.options.page_size)
+        start = int(request.query.get("pageToken", 0))
+        page = playlist[start:start + page_size]
+        body: dict = {
+            "kind": "youtube#playlistItemListResponse",
+            "items": [
+                {
+                    "kind": "youtube#playlistItem",
+                    "id": f"item-{start + offset}",
+                    "snippet": {
+                        "playlistId": request.query.get("playlistId"),
+                        "position": start + offset,
+                        "resourceId": {"kind": "youtube#video", "videoId": video_id},
+                    },
+                    "contentDetails": {"videoId": video_id},
+                }
+                for offset, video_id in enumerate(page)
+            ],
+            "pageInfo": {"totalResults": len(playlist), "resultsPerPage": page_size},
+        }
+        if start + page_size < len(playlist):
+            body["nextPageToken"] = str(start + page_size)
+        return web.json_response(body)
+
+    async def insert_item(body: dict, delay: bool = True) -> tuple[int, dict]:
+        if error := await state.simulate("playlistItems.insert", YOUTUBE_QUOTA_COSTS["playlistItems.insert"], delay):
+            return _youtube_error_body(error)
+
+        snippet = body["snippet"]
+        if snippet["resourceId"]["videoId"] in state.unavailable:
+            state.errors["not_found"] += 1
+            message = "Video not found."
+            return 404, {"error": {"code": 404, "message": message, "errors": [{"reason": "videoNotFound", "message": message}]}}
+        playlist = state.source_playlists.get(snippet["playlistId"], state.playlist)
+        if state.options.playlist_max_items is not None and len(playlist) >= state.options.playlist_max_items:
+            state.errors["playlist_full"] += 1
+            message = "The playlist contains the maximum number of items allowed."
+            return 403, {
+                "error": {
+                    "code": 403,
+                    "message": message,
+                    "errors": [{"reason": "playlistContainsMaximumNumberOfVideos", "message": message}],
+                },
+            }
+        playlist.append(snippet["resourceId"]["videoId"])
+        snippet["position"] = len(playlist) - 1
+        return 200, {
+            "kind": "youtube#playlistItem",
+            "id": f"item-{len(playlist) - 1}",
+            "snippet": snippet,
+        }
+
+    async def insert_playlist_item(request: web.Request) -> web.Response:
+        status, body = await insert_item(await request.json())
+        return web.json_response(body, status=status)
+
+    async def batch(request: web.Request) -> web.Response:
+        # 遅延はバッチ全体で1回、クォータとエラーは個別リクエストごとに扱う
+        await state.simulate("batch", cost=0)
+        results = []
+        for content_id, method, path, body in _parse_batch_parts(request.headers["Content-Type"], await request.text()):
+            if method == "POST" and path.startswith("/youtube/v3/playlistItems"):
+                status, response = await insert_item(json.loads(body), delay=False)
+            else:
+                status, response = 404, {"error": {"code": 404, "message": f"Unsupported in batch: {method} {path}"}}
+            results.append((content_id, status, response))
+        return _batch_response(results)
+
+    async def list_playlists(request: web.Request) -> web.Response:
+        if error := await state.simulate("playlists.list", YOUTUBE_QUOTA_COSTS["playlists.list"]):
+            return _youtube_error(error)
+
+        items = []
+        for playlist_id in request.query.get("id", "").split(","):
+            if not playlist_id:
+                continue
+            playlist = state.source_playlists.get(playlist_id, state.playlist)
+            items.append({
+                "kind": "youtube#playlist",
+                "id": playlist_id,
+                "snippet": {"title": f"Fake playlist {playlist_id}"},
+                "status": {"privacyStatus": "unlisted"},
+                "contentDetails": {"itemCount": len(playlist)},
+            })
+        return web.json_response({"kind": "youtube#playlistListResponse", "items": items})
+
+    async def insert_playlist(request: web.Request) -> web.Response:
+        if error := await state.simulate("playlists.insert", YOUTUBE_QUOTA_COSTS["playlists.insert"]):
+            return _youtube_error(error)
+
+        body = await request.json()
+        playlist_id = f"PLfake{len(state.source_playlists) + 1:04d}"
+        state.source_playlists[playlist_id] = []
+        return web.json_response({"kind": "youtube#playlist", "id": playlist_id, **body})
+
+    async def list_videos(request: web.Request) -> web.Response:
+        if error := await state.simulate("videos.list", YOUTUBE_QUOTA_COSTS["videos.list"]):
+            return _youtube_error(error)
+
+        video_ids = [video_id for video_id in request.query.get("id", "").split(",") if video_id]
+        return web.json_response({
+            "kind": "youtube#videoListResponse",
+            "items": [
+                {"kind": "youtube#video", "id": video_id, "snippet": {"title": f"Fake video {video_id}"}}
+                for video_id in video_ids
+            ],
+        })
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(state.stats())
+
+    app = web.Application()
+    app["state"] = state
+    app.router.add_get("/youtube/v3/playlistItems", list_playlist_items)
+    app.router.add_post("/youtube/v3/playlistItems", insert_playlist_item)
+    app.router.add_get("/youtube/v3/playlists", list_playlists)
+    app.router.add_post("/youtube/v3/playlists", insert_playlist)
+    app.router.add_get("/youtube/v3/videos", list_videos)
+    app.router.add_post("/batch", batch)
+    app.router.add_get("/_stats", get_stats)
+    return app
+
+
+def _soundcloud_error(kind: str) -> web.Response:
+    """SoundCloud API 形式のエラー応答を作成"""
+    if kind in ("quota", "rate_limit"):
+        return web.json_response({"code": 429, "message": "Too Many Requests"}, status=429)
+    return web.json_response({"code": 500, "message": "Internal Server Error"}, status=500)
+
+
+def _fake_track_id(url: str) -> int:
+    """URL末尾の数字（.../track-123）をトラックIDとして使い、なければハッシュから生成"""
+    suffix = url.rstrip("/").rsplit("-", 1)[-1]
+    if suffix.isdigit() and int(suffix) > 0:
+        return int(suffix)
+    return abs(hash(url)) % 10**9 + 1
+
+
+def create_fake_soundcloud_app(options: FakeServiceOptions | None = None) -> web.Application:
+    """/resolve・/playlists/{id}・/tracks を再現する偽 SoundCloud API を作成"""
+    state = FakeServiceState(options or FakeServiceOptions())
+
+    async def get_me(request: web.Request) -> web.Response:
+        if error := await state.simulate("me"):
+            return _soundcloud_error(error)
+        return web.json_response({"id": 1, "username": "fake-user"})
+
+    async def resolve(request: web.Request) -> web.Response:
+        if error := await state.simulate("resolve"):
+            return _soundcloud_error(error)
+        url = request.query.get("url", "")
+        if url in state.unavailable:
+            state.errors["not_found"] += 1
+            return web.json_response({"code": 404, "message": "Not Found"}, status=404)
+        return web.json_response({"kind": "track", "id": _fake_track_id(url), "permalink_url": url})
+
+    async def get_playlist(request: web.Request) -> web.Response:
+        if error := await state.simulate("playlists.get"):
+            return _soundcloud_error(error)
+        return web.json_response({
+            "kind": "playlist",
+            "id": request.match_info["playlist_id"],
+            "tracks": [{"id": track_id} for track_id in state.playlist],
+        })
+
+    async def put_playlist(request: web.Request) -> web.Response:
+        body = await request.json()
+        if error := await state.simulate("playlists.put"):
+            return _soundcloud_error(error)
+        # 実APIと同じくトラック一覧全体を置き換える
+        state.playlist[:] = [track["id"] for track in body["playlist"]["tracks"]]
+        return web.json_response({"kind": "playlist", "id": request.match_info["playlist_id"]})
+
+    async def get_track(request: web.Request) -> web.Response:
+        if error := await state.simulate("tracks.get"):
+            return _soundcloud_error(error)
+        track_id = int(request.match_info["track_id"])
+        return web.json_response({"kind": "track", "id": track_id, "title": f"Fake track {track_id}"})
+
+    async def search_tracks(request: web.Request) -> web.Response:
+        if error := await state.simulate("tracks.search"):
+            return _soundcloud_error(error)
+        limit = int(request.query.get("limit", 10))
+        query = request.query.get("q", "")
+        return web.json_response({
+            "collection": [
+                {"kind": "track", "id": index + 1, "title": f"{query} {index + 1}"}
+                for index in range(limit)
+            ],
+        })
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(state.stats())
+
+    app = web.Application()
+    app["state"] = state
+    app.router.add_get("/me", get_me)
+    app.router.add_get("/resolve", resolve)
+    app.router.add_get("/playlists/{playlist_id}", get_playlist)
+    app.router.add_put("/playlists/{playlist_id}", put_playlist)
+    app.router.add_get("/tracks/{track_id}", get_track)
+    app.router.add_get("/tracks", search_tracks)
+    app.router.add_get("/_stats", get_stats)
+    return app
+
+
+class FakeServerThread:
+    """偽サーバーを専用スレッドのイベントループで起動する
+
+    YouTube クライアント（googleapiclient）は同期HTTPのため、Botと同じイベントループで
+    サーバーを動かすとデッドロックする。別スレッドで動かすことで実サービスと同じ条件にする。
+    """
+
+    def __init__(self, app: web.Application, host: str = "127.0.0.1", port: int = 0) -> None:
+        """サーバースレッドを初期化"""
+        self.app = app
+        self.host = host
+        self.port = port
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def base_url(self) -> str:
+        """サーバーのベースURL"""
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def state(self) -> FakeServiceState:
+        """偽サーバーの状態"""
+        return self.app["state"]
+
+    async def _start(self) -> None:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def start(self) -> "FakeServerThread":
+        """サーバーを起動"""
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def stop(self) -> None:
+        """サーバーを停止"""
+        if self._runner:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self) -> "FakeServerThread":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+
+def main() -> None:
+    """偽サーバーを単体で起動"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--youtube-port", type=int, default=8801)
+    parser.add_argument("--soundcloud-port", type=int, default=8802)
+    parser.add_argument("--latency", type=float, default=0.0, help="基本応答遅延（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="遅延に加算するランダム幅（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="5xx エラーを返す確率")
+    parser.add_argument("--quota", type=int, default=None, help="クォータ上限")
+    parser.add_argument("--max-concurrent", type=int, default=None, help="同時処理数の上限（超えるとレート制限）")
+    parser.add_argument("--playlist-max-items", type=int, default=None, help="YouTube プレイリストの動画数の上限")
+    args = parser.parse_args()
+
+    options = FakeServiceOptions(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        quota=args.quota,
+        max_concurrent=args.max_concurrent,
+        playlist_max_items=args.playlist_max_items,
+    )
+
+    async def serve() -> None:
+        runners = []
+        for app, port in (
+            (create_fake_youtube_app(options), args.youtube_port),
+            (create_fake_soundcloud_app(options), args.soundcloud_port),
+        ):
+            runner = web.AppRunner(app)
+            await runner.setup()
+            await web.TCPSite(runner, "127.0.0.1", port).start()
+            runners.append(runner)
+
+        print(f"YOUTUBE_API_BASE_URL=http://127.0.0.1:{args.youtube_port}")
+        print(f"SOUNDCLOUD_API_BASE_URL=http://127.0.0.1:{args.soundcloud_port}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            for runner in runners:
+                await runner.cleanup()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
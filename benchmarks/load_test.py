@@ -0,0 +1,370 @@
+"""Botのオフライン負荷試験ハーネス
+
+偽の YouTube / SoundCloud API サーバーを起動し、合成したDiscordメッセージを
+MusicPlaylistBot.on_message に流し込んで、スループットとメッセージ処理時間のパーセンタイルを計測する。
+Discordへは接続しない。
+
+使い方:
+    uv run python benchmarks/load_test.py --messages 500 --concurrency 16 --latency 0.02
+    uv run python benchmarks/load_test.py --rate 50 --error-rate 0.05 --json results.json
+    uv run python benchmarks/load_test.py --rate 5 --bulk-import 1000   # 一括取り込み中の投稿の処理時間
+    uv run python benchmarks/load_test.py --unavailable-ratio 0.2 --duplicate-ratio 0.5   # 削除済みリンクの再投稿
+    uv run python benchmarks/load_test.py --dry-run --dry-run-write-latency 0.02   # 書き込みを省略した処理能力
+    uv run python benchmarks/load_test.py --rate 20 --drain-after 3 --drain-timeout 1   # 投入中の終了処理で取りこぼしがないか
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import aiohttp
+from fake_services import (
+    FakeServerThread,
+    FakeServiceOptions,
+    _fake_track_id,
+    create_fake_soundcloud_app,
+    create_fake_youtube_app,
+)
+from google.auth.credentials import AnonymousCredentials
+
+MONITORED_CHANNEL_ID = 1000
+GUILD_ID_BASE = 10_000
+BULK_SOURCE_PLAYLIST_ID = "PL-load-bulk-source"
+
+
+def _make_messages(args: argparse.Namespace) -> tuple[list[SimpleNamespace], set[str]]:
+    """合成メッセージと、削除済みとして扱う動画ID・トラックURLを生成（一部は過去のURLを再投稿）"""
+    rng = random.Random(args.seed)
+    posted: list[str] = []
+    unavailable: set[str] = set()
+    messages = []
+    for index in range(args.messages):
+        if posted and rng.random() < args.duplicate_ratio:
+            url = rng.choice(posted)
+        else:
+            if rng.random() < args.soundcloud_ratio:
+                url = f"https://soundcloud.com/load-artist/track-{index + 1}"
+                item = url
+            else:
+                item = f"v{index:010d}"
+                url = f"https://www.youtube.com/watch?v={item}"
+            if rng.random() < args.unavailable_ratio:
+                unavailable.add(item)
+        posted.append(url)
+
+        guild_id = GUILD_ID_BASE + index % args.guilds
+        messages.append(SimpleNamespace(
+            id=index + 1,
+            content=f"load test {index}: {url}",
+            author=SimpleNamespace(id=rng.randrange(1, 500), bot=False),
+            guild=SimpleNamespace(id=guild_id, shard_id=0),
+            channel=SimpleNamespace(id=MONITORED_CHANNEL_ID),
+        ))
+    return messages, unavailable
+
+
+async def _prepare_bot(args: argparse.Namespace, youtube_url: str, soundcloud_url: str, data_dir: Path):
+    """偽APIに接続したBotを作成（Discordには接続しない）"""
+    os.environ.update({
+        "DISCORD_BOT_TOKEN": "load-test",
+        "YOUTUBE_API_KEY": "load-test",
+        "YOUTUBE_PLAYLIST_ID": "PL-load-test",
+        "YOUTUBE_API_BASE_URL": youtube_url,
+        "SOUNDCLOUD_CLIENT_ID": "load-test",
+        "SOUNDCLOUD_CLIENT_SECRET": "load-test",
+        "SOUNDCLOUD_PLAYLIST_ID": "1",
+        "SOUNDCLOUD_API_BASE_URL": soundcloud_url,
+        "DATABASE_PATH": str(data_dir / "load_test.db"),
+        "DRY_RUN": "true" if args.dry_run else "false",
+        "DRY_RUN_WRITE_LATENCY": str(args.dry_run_write_latency),
+        "SHUTDOWN_DRAIN_TIMEOUT": str(args.drain_timeout),
+    })
+
+    from main import MusicPlaylistBot
+
+    bot = MusicPlaylistBot()
+    await bot.db_manager.initialize()
+    for offset in range(args.guilds):
+        await bot.db_manager.set_monitored_channel(GUILD_ID_BASE + offset, MONITORED_CHANNEL_ID)
+    await bot.refresh_monitored_channels()
+
+    # OAuth認証の代わりに認証なしのクライアント・ダミートークンを使う
+    bot.youtube_service.credentials = AnonymousCredentials()
+    bot.youtube_service.service = bot.youtube_service._build_client(bot.youtube_service.credentials)
+    bot.soundcloud_service.access_token = "load-test"
+    bot.soundcloud_service.client_session = aiohttp.ClientSession()
+
+    if bot.loop_monitor:
+        bot.loop_monitor.start()
+    return bot
+
+
+async def _drive(bot, messages: list[SimpleNamespace], args: argparse.Namespace) -> tuple[list[float], float]:
+    """メッセージを投入し、各メッセージの処理時間と全体の所要時間を返す"""
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    started = time.perf_counter()
+
+    async def handle(index: int, message: SimpleNamespace) -> None:
+        if args.rate:
+            # 一定レートで投入（オープンループ）。待ち時間も含めて計測する
+            scheduled = started + index / args.rate
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            if await _deliver(bot, message):
+                latencies.append(time.perf_counter() - scheduled)
+        else:
+            async with semaphore:
+                message_started = time.perf_counter()
+                if await _deliver(bot, message):
+                    latencies.append(time.perf_counter() - message_started)
+
+    await asyncio.gather(*(handle(index, message) for index, message in enumerate(messages)))
+    return latencies, time.perf_counter() - started
+
+
+async def _deliver(bot, message: SimpleNamespace) -> bool:
+    """メッセージを処理（終了処理の期限切れで取り消された場合は False）"""
+    try:
+        await bot.on_message(message)
+    except asyncio.CancelledError:
+        # discord.py のイベントタスクと同様に、終了処理による取り消しは投入側に伝えない
+        if not bot.shutdown_drain.draining:
+            raise
+        return False
+    return True
+
+
+async def _drain_after(bot, delay: float) -> dict:
+    """delay 秒後に終了処理（処理中の追加の引き継ぎ）を開始"""
+    await asyncio.sleep(delay)
+    return await bot.shutdown_drain.drain()
+
+
+async def _unaccounted_urls(bot, messages: list[SimpleNamespace], unavailable: set[str], youtube, soundcloud) -> int:
+    """プレイリストにも保留キューにもない（取りこぼした）URLの数"""
+    pending = set()
+    for service_type in ("youtube", "soundcloud"):
+        pending |= {item["url"] for item in await bot.db_manager.get_pending_adds(service_type, len(messages))}
+    video_ids = set(youtube.state.playlist)
+    track_ids = set(soundcloud.state.playlist)
+    if bot.dry_run:
+        video_ids |= bot.dry_run.written_ids("youtube")
+        track_ids |= {int(track_id) for track_id in bot.dry_run.written_ids("soundcloud")}
+
+    unaccounted = 0
+    for url in {message.content.rsplit(" ", 1)[-1] for message in messages}:
+        if "soundcloud.com" in url:
+            if url in unavailable:
+                continue
+            added = _fake_track_id(url) in track_ids
+        else:
+            video_id = url.rsplit("=", 1)[-1]
+            if video_id in unavailable:
+                continue
+            added = video_id in video_ids
+        if not added and url not in pending:
+            unaccounted += 1
+    return unaccounted
+
+
+def _scheduler_waits(bot) -> dict[str, float]:
+    """優先度クラスごとの実行枠の平均待ち時間を集計"""
+    waits = {}
+    for lane in ("interactive", "bulk"):
+        grants = sum(bot.metrics.get_counter("scheduler_grants_total", service=service, lane=lane)
+                     for service in ("youtube", "soundcloud"))
+        if grants:
+            total = sum(bot.metrics.get_counter("scheduler_wait_seconds_total", service=service, lane=lane)
+                        for service in ("youtube", "soundcloud"))
+            waits[lane] = total / grants
+    return waits
+
+
+async def _run_bulk_import(bot) -> dict:
+    """プレイリスト取り込みを実行し、所要時間と追加件数を返す"""
+    started = time.perf_counter()
+    result = await bot.import_youtube_playlist(BULK_SOURCE_PLAYLIST_ID, GUILD_ID_BASE, notify=False)
+    return {
+        "elapsed_seconds": time.perf_counter() - started,
+        "added": result.added if result else 0,
+        "failed": result.failed if result else 0,
+    }
+
+
+async def run_load_test(args: argparse.Namespace) -> dict:
+    """負荷試験を1回実行して結果を返す"""
+    from metrics import percentile
+
+    options = FakeServiceOptions(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        quota=args.quota,
+    )
+    messages, unavailable = _make_messages(args)
+    youtube_app = create_fake_youtube_app(options)
+    soundcloud_app = create_fake_soundcloud_app(options)
+    youtube_app["state"].unavailable = soundcloud_app["state"].unavailable = unavailable
+    # 大きなプレイリストでの重複チェックを再現するため既存動画を登録しておく
+    youtube_app["state"].playlist.extend(f"existing{index:07d}" for index in range(args.prefill))
+    youtube_app["state"].source_playlists[BULK_SOURCE_PLAYLIST_ID] = [
+        f"bulk{index:07d}" for index in range(args.bulk_import)
+    ]
+
+    with (
+        FakeServerThread(youtube_app) as youtube,
+        FakeServerThread(soundcloud_app) as soundcloud,
+        tempfile.TemporaryDirectory() as tmp,
+    ):
+        bot = await _prepare_bot(args, youtube.base_url, soundcloud.base_url, Path(tmp))
+        bulk_task = None
+        if args.bulk_import:
+            # 投稿の処理と並行して一括処理（プレイリスト取り込み）を流す
+            bulk_task = asyncio.create_task(_run_bulk_import(bot))
+        drain_task = None
+        if args.drain_after is not None:
+            # 投入の途中で終了処理を始め、以降のURLと期限切れの追加が保留キューへ引き継がれるか確認する
+            drain_task = asyncio.create_task(_drain_after(bot, args.drain_after))
+        try:
+            latencies, elapsed = await _drive(bot, messages, args)
+            loop_lag = bot.loop_monitor.lag_percentiles() if bot.loop_monitor else {}
+            bulk = await bulk_task if bulk_task else None
+            drain = None
+            if drain_task:
+                drain = await drain_task
+                drain["handed_off_total"] = int(sum(
+                    bot.metrics.get_counter("shutdown_handoffs_total", reason=reason)
+                    for reason in ("draining", "deadline")
+                ))
+                await bot.url_writer.flush()
+                drain["unaccounted_urls"] = await _unaccounted_urls(bot, messages, unavailable, youtube, soundcloud)
+        finally:
+            if drain_task and not drain_task.done():
+                drain_task.cancel()
+            if bulk_task and not bulk_task.done():
+                bulk_task.cancel()
+            await bot.youtube_writer.stop()
+            await bot.url_writer.stop()
+            if bot.loop_monitor:
+                await bot.loop_monitor.stop()
+            await bot.soundcloud_service.close()
+            await bot.db_manager.close()
+
+        return {
+            "messages": len(messages),
+            "elapsed_seconds": elapsed,
+            "throughput_per_second": len(messages) / elapsed if elapsed else 0.0,
+            "latency_seconds": {
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p99": percentile(latencies, 99),
+                "max": max(latencies, default=None),
+            },
+            "loop_lag_seconds": loop_lag,
+            "bulk_import": bulk,
+            "scheduler_wait_seconds": _scheduler_waits(bot),
+            "dry_run": bot.dry_run.summary() if bot.dry_run else None,
+            "drain": drain,
+            "negative_cache_hits": {
+                service: int(bot.metrics.get_counter("negative_cache_hits_total", service=service))
+                for service in ("youtube", "soundcloud")
+            },
+            "youtube": youtube.state.stats(),
+            "soundcloud": soundcloud.state.stats(),
+        }
+
+
+def _print_report(result: dict) -> None:
+    """結果を表示"""
+    latency = result["latency_seconds"]
+    print(f"messages:     {result['messages']}")
+    print(f"elapsed:      {result['elapsed_seconds']:.2f} s")
+    print(f"throughput:   {result['throughput_per_second']:.1f} msg/s")
+    print(
+        "latency:      "
+        + "  ".join(f"{key}={value * 1000:.1f}ms" for key, value in latency.items() if value is not None),
+    )
+    if result["loop_lag_seconds"]:
+        print(
+            "loop lag:     "
+            + "  ".join(f"{key}={value * 1000:.1f}ms" for key, value in result["loop_lag_seconds"].items()),
+        )
+    if result["scheduler_wait_seconds"]:
+        print(
+            "slot wait:    "
+            + "  ".join(f"{lane}={value * 1000:.1f}ms" for lane, value in result["scheduler_wait_seconds"].items()),
+        )
+    if result["bulk_import"]:
+        bulk = result["bulk_import"]
+        print(f"bulk import:  {bulk['elapsed_seconds']:.2f} s  added={bulk['added']} failed={bulk['failed']}")
+    if any(result["negative_cache_hits"].values()):
+        print(
+            "unavailable:  skipped "
+            + "  ".join(f"{service}={count}" for service, count in result["negative_cache_hits"].items()),
+        )
+    if result["dry_run"]:
+        dry_run = result["dry_run"]
+        latency = dry_run["latency_seconds"]
+        print(
+            f"dry run:      skipped writes={dry_run['writes_skipped']}  "
+            f"url p50={latency['p50'] * 1000:.1f}ms p99={latency['p99'] * 1000:.1f}ms",
+        )
+    if result["drain"]:
+        drain = result["drain"]
+        print(
+            f"drain:        completed={drain['completed']} handed off={drain['handed_off_total']} "
+            f"({drain['seconds']:.2f} s)  unaccounted urls={drain['unaccounted_urls']}",
+        )
+    for service in ("youtube", "soundcloud"):
+        stats = result[service]
+        print(f"{service + ':':<13} requests={stats['requests']} errors={stats['errors']} playlist={stats['playlist_size']}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """コマンドライン引数の定義"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=300, help="投入するメッセージ数")
+    parser.add_argument("--concurrency", type=int, default=16, help="同時処理メッセージ数（--rate 未指定時）")
+    parser.add_argument("--rate", type=float, default=None, help="一定レートで投入する場合のメッセージ/秒")
+    parser.add_argument("--guilds", type=int, default=1, help="メッセージを分散させるサーバー数")
+    parser.add_argument("--soundcloud-ratio", type=float, default=0.3, help="SoundCloud URLの割合")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1, help="過去URLを再投稿する割合")
+    parser.add_argument("--unavailable-ratio", type=float, default=0.0, help="削除済み（追加に失敗する）として扱うURLの割合")
+    parser.add_argument("--prefill", type=int, default=0, help="YouTubeプレイリストに事前登録する動画数")
+    parser.add_argument("--latency", type=float, default=0.02, help="偽APIの基本応答遅延（秒）")
+    parser.add_argument("--jitter", type=float, default=0.01, help="偽APIの遅延に加算するランダム幅（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="偽APIが5xxを返す確率")
+    parser.add_argument("--quota", type=int, default=None, help="偽APIのクォータ上限")
+    parser.add_argument("--bulk-import", type=int, default=0, help="並行して取り込むプレイリストの動画数")
+    parser.add_argument("--dry-run", action="store_true", help="プレイリストへの書き込みを省略するドライランで実行")
+    parser.add_argument("--dry-run-write-latency", type=float, default=0.0, help="ドライランで省略した書き込みごとの待機（秒）")
+    parser.add_argument("--drain-after", type=float, default=None, help="投入開始からこの秒数後に終了処理を開始")
+    parser.add_argument("--drain-timeout", type=float, default=20.0, help="終了処理で処理中の追加を待つ最大秒数")
+    parser.add_argument("--seed", type=int, default=0, help="メッセージ生成の乱数シード")
+    parser.add_argument("--json", type=Path, default=None, help="結果をJSONで保存するパス")
+    return parser
+
+
+def main() -> None:
+    """エントリーポイント"""
+    args = build_parser().parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    result = asyncio.run(run_load_test(args))
+    _print_report(result)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,504 @@
+"""ホットパスのベンチマークスイート
+
+以下を計測し、結果を benchmarks/results/ にJSONで保存する。前回結果やベースラインと比較して、
+閾値を超えて遅くなったベンチマークを回帰として報告する。
+
+- URLExtractor.extract_urls: 実際のチャットに近いメッセージコーパス
+- DatabaseManager.is_url_processed / mark_url_processed: 既存 10k / 1M 行のDB
+- ProcessedUrlWriter: 同時に記録した処理済みURLのグループコミット
+- _process_backlog: 数千件の合成メッセージ（プレイリスト追加はスタブ）
+- on_message: 監視外チャンネル・音楽URLなしのメッセージ（前段フィルタ）
+
+使い方:
+    uv run python benchmarks/run_suite.py                       # 全ベンチマークを実行して保存
+    uv run python benchmarks/run_suite.py --quick               # 10k 行のみ・少ない反復回数
+    uv run python benchmarks/run_suite.py --only extract_urls --compare latest
+    uv run python benchmarks/run_suite.py --save-baseline       # 結果をベースラインとして保存
+    uv run python benchmarks/run_suite.py --compare baseline --fail-on-regression
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import aiosqlite
+
+from database import DatabaseManager
+from negative_cache import NegativeCache
+from priority_scheduler import PriorityScheduler
+from processed_url_writer import ProcessedUrlWriter
+from shutdown_drain import ShutdownDrain
+from url_extractor import URLExtractor
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+BASELINE_FILE = RESULTS_DIR / "baseline.json"
+
+GUILD_ID = 10_000
+CHANNEL_ID = 1_000
+
+CHAT_SNIPPETS = [
+    "おはよう",
+    "今日のライブ最高だった",
+    "これ聴いて！",
+    "昨日の配信のアーカイブ見た？",
+    "lol that drop though",
+    "明日の集合は10時で",
+    "この曲のイントロ好き",
+    "誰か夕飯どうする？",
+]
+
+NON_MUSIC_URLS = [
+    "https://twitter.com/someone/status/1234567890123456789",
+    "https://github.com/example/project/pull/42",
+    "https://example.com/articles/2024/05/some-long-article-title?ref=discord",
+    "https://discord.com/channels/123456789012345678/123456789012345678",
+]
+
+
+def _youtube_url(rng: random.Random) -> str:
+    """様々な形式の YouTube URL を生成"""
+    video_id = "".join(rng.choices("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-", k=11))
+    return rng.choice([
+        f"https://www.youtube.com/watch?v={video_id}",
+        f"https://youtube.com/watch?v={video_id}&t=42s",
+        f"https://youtu.be/{video_id}",
+        f"https://youtu.be/{video_id}?si=AbCdEfGh",
+        f"https://music.youtube.com/watch?v={video_id}&list=RDAMVM{video_id}",
+        f"https://m.youtube.com/watch?v={video_id}",
+    ])
+
+
+def _soundcloud_url(rng: random.Random) -> str:
+    """SoundCloud URL を生成"""
+    artist = f"artist-{rng.randrange(10_000)}"
+    track = f"track-name-{rng.randrange(1_000_000)}"
+    return rng.choice([
+        f"https://soundcloud.com/{artist}/{track}",
+        f"https://m.soundcloud.com/{artist}/{track}",
+        f"https://soundcloud.com/{artist}/{track}?in=someone/sets/favorites",
+    ])
+
+
+def make_message_corpus(count: int, seed: int = 0) -> list[str]:
+    """チャットに近い分布のメッセージ本文を生成（大半はURLなし）"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        roll = rng.random()
+        text = " ".join(rng.choices(CHAT_SNIPPETS, k=rng.randint(1, 4)))
+        if roll < 0.65:
+            pass
+        elif roll < 0.75:
+            text += f" {rng.choice(NON_MUSIC_URLS)}"
+        elif roll < 0.88:
+            text = f"{text} {_youtube_url(rng)}"
+        elif roll < 0.96:
+            text = f"{text} {_soundcloud_url(rng)}"
+        else:
+            # 複数リンクを含む長めのメッセージ
+            links = [_youtube_url(rng) if rng.random() < 0.6 else _soundcloud_url(rng) for _ in range(rng.randint(2, 5))]
+            text = "\n".join([text, *links, " ".join(rng.choices(CHAT_SNIPPETS, k=10))])
+        corpus.append(text)
+    return corpus
+
+
+async def _measure(
+    func: Callable[[], Awaitable[int]],
+    repeat: int,
+) -> dict:
+    """func を repeat 回実行し、1操作あたりの所要時間を集計（func は操作数を返す）"""
+    samples = []
+    ops = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        ops = await func()
+        samples.append((time.perf_counter() - started) / ops)
+    return {
+        "unit": "s/op",
+        "ops": ops,
+        "repeat": repeat,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+async def bench_extract_urls(args: argparse.Namespace) -> dict[str, dict]:
+    """URL抽出のベンチマーク"""
+    extractor = URLExtractor()
+    corpus = make_message_corpus(args.corpus_size)
+
+    async def run() -> int:
+        for text in corpus:
+            extractor.extract_urls(text)
+        return len(corpus)
+
+    return {"extract_urls.chat_corpus": await _measure(run, args.repeat)}
+
+
+def _prefill_database(db_path: Path, rows: int) -> list[str]:
+    """既存URL履歴を高速に投入し、投入したURLの一部を返す"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executemany(
+        """
+        INSERT INTO processed_urls
+        (guild_id, url, service_type, video_id, canonical_id, submitter_id, message_id, channel_id)
+        VALUES (?, ?, 'youtube', ?, ?, ?, ?, ?)
+        """,
+        (
+            (
+                GUILD_ID + index % 20,
+                f"https://www.youtube.com/watch?v={index:011d}",
+                f"{index:011d}",
+                f"youtube:{index:011d}",
+                index % 997,
+                index,
+                CHANNEL_ID,
+            )
+            for index in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return [f"https://www.youtube.com/watch?v={index:011d}" for index in range(0, rows, max(1, rows // 1000))]
+
+
+async def bench_dedup(args: argparse.Namespace) -> dict[str, dict]:
+    """重複チェック・処理済み記録のベンチマーク（DB行数ごと）"""
+    results = {}
+    rng = random.Random(0)
+    for rows in args.db_sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_manager = DatabaseManager(Path(tmp) / "bench.db")
+            await db_manager.initialize()
+            existing = _prefill_database(db_manager.db_path, rows)
+            label = f"{rows // 1000}k" if rows < 1_000_000 else f"{rows // 1_000_000}M"
+
+            # 計測する関数にはこの反復のデータベースを既定引数で束縛する
+            async def lookup_hits(db_manager: DatabaseManager = db_manager, existing: list[str] = existing) -> int:
+                for url in rng.sample(existing, min(args.lookups, len(existing))):
+                    await db_manager.is_url_processed(GUILD_ID + int(url[-11:]) % 20, url)
+                return min(args.lookups, len(existing))
+
+            async def lookup_misses(db_manager: DatabaseManager = db_manager) -> int:
+                for index in range(args.lookups):
+                    await db_manager.is_url_processed(GUILD_ID, f"https://youtu.be/miss{index:07d}")
+                return args.lookups
+
+            inserted = 0
+
+            async def mark_processed(db_manager: DatabaseManager = db_manager) -> int:
+                nonlocal inserted
+                for _ in range(args.inserts):
+                    video_id = f"new{inserted:08d}"
+                    inserted += 1
+                    await db_manager.mark_url_processed(
+                        GUILD_ID,
+                        f"https://www.youtube.com/watch?v={video_id}",
+                        "youtube",
+                        video_id=video_id,
+                        canonical_id=f"youtube:{video_id}",
+                        submitter_id=inserted % 997,
+                        message_id=inserted,
+                        channel_id=CHANNEL_ID,
+                    )
+                return args.inserts
+
+            def record_args(index: int) -> tuple[tuple, dict]:
+                video_id = f"new{index:08d}"
+                return (GUILD_ID, f"https://www.youtube.com/watch?v={video_id}", "youtube"), {
+                    "video_id": video_id,
+                    "canonical_id": f"youtube:{video_id}",
+                    "submitter_id": index % 997,
+                    "message_id": index,
+                    "channel_id": CHANNEL_ID,
+                }
+
+            def next_records() -> list[tuple[tuple, dict]]:
+                nonlocal inserted
+                records = [record_args(index) for index in range(inserted, inserted + args.inserts)]
+                inserted += args.inserts
+                return records
+
+            url_writer = ProcessedUrlWriter(db_manager)
+
+            async def mark_group_commit(url_writer: ProcessedUrlWriter = url_writer) -> int:
+                # 同時に記録した行を1つのトランザクションにまとめてコミット
+                # （行ごとのコミットを同時に実行すると SQLite では database is locked になる）
+                await asyncio.gather(*(
+                    url_writer.mark_url_processed(*positional, **keywords)
+                    for positional, keywords in next_records()
+                ))
+                return args.inserts
+
+            results[f"is_url_processed.hit.{label}"] = await _measure(lookup_hits, args.repeat)
+            results[f"is_url_processed.miss.{label}"] = await _measure(lookup_misses, args.repeat)
+            results[f"mark_url_processed.{label}"] = await _measure(mark_processed, args.repeat)
+            results[f"processed_url_writer.concurrent.{label}"] = await _measure(mark_group_commit, args.repeat)
+            await url_writer.stop()
+            await db_manager.close()
+    return results
+
+
+class _StubPlaylistService:
+    """API呼び出しを行わないプレイリストサービスのスタブ"""
+
+    async def add_to_playlist(self, url: str) -> bool:
+        return True
+
+
+class _FakeChannel:
+    """history() で合成メッセージを返すチャンネル"""
+
+    def __init__(self, messages: list[SimpleNamespace]) -> None:
+        self.id = CHANNEL_ID
+        self._messages = messages
+
+    async def history(self, limit: int):
+        for message in self._messages[:limit]:
+            yield message
+
+
+async def bench_backlog(args: argparse.Namespace) -> dict[str, dict]:
+    """過去ログ処理のベンチマーク（プレイリスト追加はスタブ）"""
+    from commands import _process_backlog
+    from main import MusicPlaylistBot
+
+    async def noop(*args: object, **kwargs: object) -> None:
+        return None
+
+    # 反復ごとに未処理のURLになるよう、別シードのコーパスを事前に生成しておく
+    channels = [
+        _FakeChannel([
+            SimpleNamespace(
+                id=run * 1_000_000 + index,
+                content=text,
+                author=SimpleNamespace(id=index % 50, bot=False),
+                channel=SimpleNamespace(id=CHANNEL_ID),
+                guild=SimpleNamespace(id=GUILD_ID),
+            )
+            for index, text in enumerate(make_message_corpus(args.backlog_messages, seed=run + 1))
+        ])
+        for run in range(args.repeat)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(Path(tmp) / "backlog.db")
+        await db_manager.initialize()
+        await db_manager.set_monitored_channel(GUILD_ID, CHANNEL_ID)
+
+        bot = SimpleNamespace(
+            db_manager=db_manager,
+            url_extractor=URLExtractor(),
+            youtube_service=_StubPlaylistService(),
+            soundcloud_service=_StubPlaylistService(),
+            pending_adds=SimpleNamespace(is_degraded=lambda service_type: False),
+            url_writer=ProcessedUrlWriter(db_manager),
+            dry_run=None,
+        )
+        bot.shutdown_drain = ShutdownDrain(types.MethodType(MusicPlaylistBot._hand_off_url, bot))
+        bot.record_processed_url = types.MethodType(MusicPlaylistBot.record_processed_url, bot)
+        bot._mark_processed = types.MethodType(MusicPlaylistBot._mark_processed, bot)
+        bot.scheduler = PriorityScheduler()
+        bot.add_to_playlist = types.MethodType(MusicPlaylistBot.add_to_playlist, bot)
+        bot.negative_cache = NegativeCache(db_manager)
+        bot.unavailable_reason = types.MethodType(MusicPlaylistBot.unavailable_reason, bot)
+
+        async def run() -> int:
+            channel = channels.pop()
+            interaction = SimpleNamespace(
+                guild=SimpleNamespace(id=GUILD_ID, get_channel=lambda channel_id: channel),
+                response=SimpleNamespace(send_message=noop),
+                followup=SimpleNamespace(send=noop),
+            )
+            await _process_backlog(interaction, args.backlog_messages, bot)
+            return args.backlog_messages
+
+        result = await _measure(run, args.repeat)
+        await bot.url_writer.stop()
+        await db_manager.close()
+        return {f"process_backlog.{args.backlog_messages}msgs": result}
+
+
+async def bench_prefilter(args: argparse.Namespace) -> dict[str, dict]:
+    """無関係なメッセージに対する on_message の処理コスト（前段フィルタ）"""
+    from main import MusicPlaylistBot
+
+    bot = MusicPlaylistBot()
+    bot.monitored_channel_ids = frozenset({CHANNEL_ID})
+    extractor = URLExtractor()
+    rng = random.Random(2)
+
+    # 監視外チャンネルのメッセージと、監視チャンネルでも音楽URLを含まないメッセージ
+    corpus = [text for text in make_message_corpus(args.corpus_size, seed=2) if not extractor.extract_urls(text)]
+    messages = [
+        SimpleNamespace(
+            id=index,
+            content=text,
+            author=SimpleNamespace(id=index % 50, bot=False),
+            channel=SimpleNamespace(id=CHANNEL_ID if rng.random() < 0.2 else CHANNEL_ID + 1 + index % 100),
+            guild=SimpleNamespace(id=GUILD_ID, shard_id=0),
+        )
+        for index, text in enumerate(corpus)
+    ]
+
+    async def run() -> int:
+        for message in messages:
+            await bot.on_message(message)
+        return len(messages)
+
+    return {"on_message.irrelevant": await _measure(run, args.repeat)}
+
+
+BENCHMARKS: dict[str, Callable[[argparse.Namespace], Awaitable[dict[str, dict]]]] = {
+    "extract_urls": bench_extract_urls,
+    "dedup": bench_dedup,
+    "backlog": bench_backlog,
+    "prefilter": bench_prefilter,
+}
+
+
+def _git_revision() -> str | None:
+    """現在のコミットを取得"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _load_reference(spec: str) -> tuple[Path, dict] | None:
+    """比較対象の結果を読み込み（latest / baseline / ファイルパス）"""
+    if spec == "baseline":
+        path = BASELINE_FILE
+    elif spec == "latest":
+        runs = sorted(RESULTS_DIR.glob("run-*.json"))
+        if not runs:
+            return None
+        path = runs[-1]
+    else:
+        path = Path(spec)
+    if not path.exists():
+        return None
+    return path, json.loads(path.read_text(encoding="utf-8"))
+
+
+def _compare(results: dict[str, dict], reference: dict, threshold: float) -> list[str]:
+    """中央値で比較し、閾値を超えて遅くなったベンチマーク名を返す"""
+    regressions = []
+    print(f"\n{'benchmark':<40} {'before':>12} {'after':>12} {'change':>9}")
+    for name, result in results.items():
+        before = reference["benchmarks"].get(name)
+        if not before:
+            continue
+        change = result["median"] / before["median"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<40} {before['median'] * 1e6:>10.1f}us {result['median'] * 1e6:>10.1f}us "
+            f"{change:>+8.1%}{flag}",
+        )
+    return regressions
+
+
+async def _run(args: argparse.Namespace) -> dict[str, dict]:
+    """選択されたベンチマークを実行"""
+    results: dict[str, dict] = {}
+    for name, bench in BENCHMARKS.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"running {name}...", flush=True)
+        for case, result in (await bench(args)).items():
+            results[case] = result
+            print(f"  {case:<38} median={result['median'] * 1e6:10.1f}us/op  (ops={result['ops']})", flush=True)
+    return results
+
+
+def main() -> None:
+    """エントリーポイント"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="実行するベンチマーク")
+    parser.add_argument("--quick", action="store_true", help="10k 行のみ・反復回数を減らして実行")
+    parser.add_argument("--repeat", type=int, default=5, help="各ベンチマークの反復回数")
+    parser.add_argument("--db-sizes", type=int, nargs="+", default=[10_000, 1_000_000], help="既存URL履歴の行数")
+    parser.add_argument("--corpus-size", type=int, default=20_000, help="URL抽出に使うメッセージ数")
+    parser.add_argument("--lookups", type=int, default=500, help="1反復あたりの重複チェック回数")
+    parser.add_argument("--inserts", type=int, default=200, help="1反復あたりの処理済み記録回数")
+    parser.add_argument("--backlog-messages", type=int, default=3_000, help="過去ログ処理のメッセージ数")
+    parser.add_argument("--compare", default="latest", help="比較対象（latest / baseline / 結果ファイルのパス / none）")
+    parser.add_argument("--threshold", type=float, default=0.10, help="回帰とみなす中央値の悪化率")
+    parser.add_argument("--fail-on-regression", action="store_true", help="回帰があれば終了コード1で終了")
+    parser.add_argument("--save-baseline", action="store_true", help="結果をベースラインとして保存")
+    parser.add_argument("--no-save", action="store_true", help="結果を保存しない")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.repeat = min(args.repeat, 3)
+        args.db_sizes = [10_000]
+        args.corpus_size = min(args.corpus_size, 5_000)
+        args.backlog_messages = min(args.backlog_messages, 1_000)
+
+    # 比較対象は今回の結果を保存する前に読み込む
+    reference = _load_reference(args.compare) if args.compare != "none" else None
+
+    results = asyncio.run(_run(args))
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sqlite": sqlite3.sqlite_version,
+        "aiosqlite": getattr(aiosqlite, "__version__", None),
+        "benchmarks": results,
+    }
+
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        path = RESULTS_DIR / f"run-{timestamp}-{report['git_revision'] or 'unknown'}.json"
+        path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nsaved: {path}")
+        if args.save_baseline:
+            BASELINE_FILE.write_text(json.dumps(report, indent=2), encoding="utf-8")
+            print(f"baseline: {BASELINE_FILE}")
+
+    regressions: list[str] = []
+    if reference:
+        reference_path, reference_report = reference
+        print(f"\ncompared with {reference_path.name} ({reference_report.get('git_revision')})")
+        regressions = _compare(results, reference_report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)}件のベンチマークが {args.threshold:.0%} 以上遅くなりました")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
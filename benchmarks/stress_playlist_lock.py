@@ -0,0 +1,137 @@
+"""プレイリスト書き込みロックの複数プロセスストレステスト
+
+偽の SoundCloud API サーバーを起動し、複数のワーカープロセスが共有SQLite上の
+PlaylistLock を使って同じトラック群を同時に同じプレイリストへ追加する。
+最終的なプレイリストに重複や欠落（PUT の上書きによる消失）がないことを確認する。
+
+使い方:
+    uv run python benchmarks/stress_playlist_lock.py --processes 4 --tracks 40
+    uv run python benchmarks/stress_playlist_lock.py --no-lock   # ロックなしで競合を再現
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import aiohttp
+from fake_services import (
+    FakeServerThread,
+    FakeServiceOptions,
+    create_fake_soundcloud_app,
+)
+
+PLAYLIST_ID = "1"
+
+
+async def _run_worker(args: argparse.Namespace) -> None:
+    """ワーカープロセス: 全トラックをランダム順で追加"""
+    os.environ["SOUNDCLOUD_PLAYLIST_ID"] = PLAYLIST_ID
+    os.environ["SOUNDCLOUD_API_BASE_URL"] = args.api_base
+
+    from database import DatabaseManager
+    from playlist_lock import PlaylistLock
+    from soundcloud_service import SoundCloudService
+
+    db_manager = DatabaseManager(Path(args.db_path))
+    lock = None if args.no_lock else PlaylistLock(db_manager, ttl=5, retry_interval=0.02)
+
+    service = SoundCloudService(playlist_lock=lock)
+    service.access_token = "stress-test"
+    service.client_session = aiohttp.ClientSession()
+
+    track_ids = list(range(1, args.tracks + 1))
+    random.shuffle(track_ids)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def add(track_id: int) -> bool:
+        async with semaphore:
+            return await service.add_to_playlist(f"https://soundcloud.com/stress/track-{track_id}")
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(add(track_id) for track_id in track_ids))
+    elapsed = time.perf_counter() - started
+    await service.close()
+
+    print(json.dumps({"ok": sum(results), "failed": len(results) - sum(results), "elapsed": elapsed}))
+
+
+async def _run_coordinator(args: argparse.Namespace) -> int:
+    """偽APIサーバーとワーカープロセスを起動し、結果を検証"""
+    from database import DatabaseManager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "stress.db"
+        # マイグレーションはワーカー起動前に1回だけ適用しておく
+        await DatabaseManager(db_path).initialize()
+
+        # 読み込みから書き込みまでの間に遅延を入れて競合を起こしやすくする
+        server = FakeServerThread(create_fake_soundcloud_app(FakeServiceOptions(jitter=args.latency)))
+        server.start()
+        api_base = server.base_url
+
+        worker_args = [
+            sys.executable, __file__, "--worker",
+            "--db-path", str(db_path),
+            "--api-base", api_base,
+            "--tracks", str(args.tracks),
+            "--concurrency", str(args.concurrency),
+        ]
+        if args.no_lock:
+            worker_args.append("--no-lock")
+
+        started = time.perf_counter()
+        workers = [
+            await asyncio.create_subprocess_exec(*worker_args, stdout=asyncio.subprocess.PIPE)
+            for _ in range(args.processes)
+        ]
+        outputs = [await worker.communicate() for worker in workers]
+        elapsed = time.perf_counter() - started
+
+        final_tracks = list(server.state.playlist)
+        server.stop()
+
+    for index, (stdout, _) in enumerate(outputs):
+        print(f"worker {index}: {stdout.decode().strip()}")
+
+    duplicates = len(final_tracks) - len(set(final_tracks))
+    missing = set(range(1, args.tracks + 1)) - set(final_tracks)
+    print(f"lock:       {'disabled' if args.no_lock else 'enabled'}")
+    print(f"elapsed:    {elapsed:.2f} s")
+    print(f"tracks:     {len(final_tracks)} / {args.tracks}")
+    print(f"duplicates: {duplicates}")
+    print(f"missing:    {len(missing)}")
+
+    return 0 if duplicates == 0 and not missing else 1
+
+
+def main() -> None:
+    """エントリーポイント"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4, help="ワーカープロセス数")
+    parser.add_argument("--tracks", type=int, default=40, help="各ワーカーが追加するトラック数")
+    parser.add_argument("--concurrency", type=int, default=4, help="ワーカー内の同時追加数")
+    parser.add_argument("--latency", type=float, default=0.02, help="偽APIの最大応答遅延（秒）")
+    parser.add_argument("--no-lock", action="store_true", help="ロックを使わずに実行")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--db-path", help=argparse.SUPPRESS)
+    parser.add_argument("--api-base", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    if args.worker:
+        asyncio.run(_run_worker(args))
+    else:
+        sys.exit(asyncio.run(_run_coordinator(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""同時実行数の適応制御モジュール
+
+外部サービスへのAPI呼び出しの応答時間とレート制限の応答を観測し、AIMD（加算増加・乗算減少）で
+同時実行数の上限を調整する。応答時間と失敗率が安定している間は上限と同じ件数の呼び出しが完了するごとに上限を1つ上げ、
+レート制限（429 など）や p99 応答時間の悪化・失敗率の上昇を検出したら上限を半分にする。
+上限の現在値は PriorityScheduler がサービスごとの実行枠数として使用する。
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from metrics import BotMetrics, percentile
+
+# p99 応答時間と失敗率を計算する直近のサンプル数と、判断に必要な最小サンプル数
+WINDOW = 100
+MIN_SAMPLES = 20
+# 上限を下げる失敗率（5xx・接続エラー）
+ERROR_RATE_THRESHOLD = 0.1
+# 上限を下げる際に掛ける係数
+BACKOFF = 0.5
+# p99 の基準値を新しい値へ近づける割合（平常時・悪化時）
+BASELINE_DRIFT = 0.1
+DEGRADED_BASELINE_DRIFT = 0.25
+
+
+class AdaptiveLimit:
+    """AIMD で同時実行数の上限を調整するクラス"""
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 2,
+        minimum: int = 1,
+        maximum: int = 8,
+        latency_tolerance: float = 2.0,
+        metrics: Optional[BotMetrics] = None,
+    ) -> None:
+        """上限を初期化
+
+        p99 応答時間が平常時の基準値の latency_tolerance 倍を超えたら悪化とみなす。
+        """
+        self.name = name
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.latency_tolerance = latency_tolerance
+        self.metrics = metrics
+        self._limit = min(max(initial, self.minimum), self.maximum)
+        # サービスの呼び出しはワーカースレッドからも記録されるためロックで保護する
+        self._lock = threading.Lock()
+        # 直近の呼び出しごとの応答時間と失敗したかどうか
+        self._samples: deque[tuple[float, bool]] = deque(maxlen=WINDOW)
+        # 前回の判断以降に完了した呼び出し数
+        self._completed = 0
+        self._baseline: Optional[float] = None
+        # 最後に上限を下げた時刻（それより前に開始した呼び出しの結果は判断に使わない）
+        self._decreased_at = 0.0
+        self._update_gauge()
+
+    @property
+    def limit(self) -> int:
+        """同時実行数の上限の現在値"""
+        return self._limit
+
+    def record(self, started: float, *, throttled: bool = False, failed: bool = False) -> None:
+        """time.monotonic() の started に開始したAPI呼び出しの結果を記録"""
+        finished = time.monotonic()
+        if self.metrics:
+            result = "throttled" if throttled else "failure" if failed else "success"
+            self.metrics.increment("service_api_calls_total", service=self.name, result=result)
+
+        with self._lock:
+            # 上限を下げる前の多すぎる同時実行の結果で、続けて下げ過ぎないようにする
+            if started < self._decreased_at:
+                return
+            if throttled:
+                self._decrease("rate_limited", finished)
+                return
+
+            self._samples.append((finished - started, failed))
+            self._completed += 1
+            if self._completed < self._limit or len(self._samples) < MIN_SAMPLES:
+                return
+
+            self._completed = 0
+            p99 = percentile((latency for latency, _ in self._samples), 99)
+            error_rate = sum(1 for _, sample_failed in self._samples if sample_failed) / len(self._samples)
+            if self.metrics:
+                self.metrics.set_gauge("service_latency_p99_seconds", p99, service=self.name)
+
+            if error_rate > ERROR_RATE_THRESHOLD:
+                self._decrease("errors", finished)
+            elif self._baseline is not None and p99 > self._baseline * self.latency_tolerance:
+                # 遅延が恒常的に増えた場合も、いずれ新しい水準を平常時として受け入れる
+                self._baseline += (p99 - self._baseline) * DEGRADED_BASELINE_DRIFT
+                self._decrease("latency", finished)
+            else:
+                if self._baseline is None or p99 < self._baseline:
+                    self._baseline = p99
+                else:
+                    self._baseline += (p99 - self._baseline) * BASELINE_DRIFT
+                self._increase()
+
+    def _increase(self) -> None:
+        """上限を1つ上げる"""
+        if self._limit >= self.maximum:
+            return
+        self._limit += 1
+        self._record_change("up", "healthy")
+
+    def _decrease(self, reason: str, now: float) -> None:
+        """上限を BACKOFF 倍に下げる"""
+        self._decreased_at = now
+        self._completed = 0
+        if reason == "errors":
+            # 失敗を含むサンプルで続けて下げないよう捨てる
+            self._samples.clear()
+        limit = max(self.minimum, int(self._limit * BACKOFF))
+        if limit == self._limit:
+            return
+        self._limit = limit
+        self._record_change("down", reason)
+
+    def _record_change(self, direction: str, reason: str) -> None:
+        """上限の変更をメトリクスに記録"""
+        if self.metrics:
+            self.metrics.increment(
+                "service_concurrency_changes_total",
+                service=self.name,
+                direction=direction,
+                reason=reason,
+            )
+        self._update_gauge()
+
+    def _update_gauge(self) -> None:
+        """上限の現在値をメトリクスに記録"""
+        if self.metrics:
+            self.metrics.set_gauge("service_concurrency_limit", self._limit, service=self.name)
@@ -0,0 +1,157 @@
+"""音楽サービスの認証トークン取得CLI
+
+Botとは別プロセスで対話的な OAuth 認証を行い、トークンファイルを保存する。
+ブラウザを開けないサーバー上でも使えるよう、既定では認証URLを表示し、
+認証後にリダイレクトされたURL（またはコード）を貼り付けてもらう方式で取得する。
+起動中のBotは定期的にトークンファイルを読み直し、保留していた追加を反映する。
+
+使い方:
+    python start.py auth youtube
+    python start.py auth soundcloud
+    python start.py auth youtube --local-server   # ブラウザのある端末ではリダイレクトを自動で受け取る
+"""
+
+import argparse
+import asyncio
+import logging
+import secrets
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from config import BotConfig
+from file_utils import write_text_atomic
+
+# 認証後のリダイレクト先（ページの表示には失敗するが、アドレスバーのURLにコードが含まれる）
+YOUTUBE_REDIRECT_URI = "http://localhost:8080/"
+
+
+def _parse_redirect(pasted: str, expected_state: str) -> Optional[str]:
+    """貼り付けられたリダイレクトURLまたはコードから認証コードを取り出す"""
+    pasted = pasted.strip()
+    if "://" not in pasted:
+        return pasted or None
+
+    query = parse_qs(urlparse(pasted).query)
+    if "error" in query:
+        print(f"❌ 認証が拒否されました: {query['error'][0]}")
+        return None
+    # 別の認証要求の結果を取り違えないよう state を照合する
+    if query.get("state", [None])[0] != expected_state:
+        print("❌ state が一致しません。表示された最新の認証URLからやり直してください")
+        return None
+    return query.get("code", [None])[0]
+
+
+def _prompt_redirect(auth_url: str, expected_state: str) -> Optional[str]:
+    """認証URLを表示し、リダイレクト後のURLの入力を受け付ける"""
+    print("\n1. 次のURLをブラウザで開いて認証してください:\n")
+    print(f"   {auth_url}\n")
+    print("2. 認証後に移動したページ（表示できなくても構いません）のURLを貼り付けてください")
+    return _parse_redirect(input("URL> "), expected_state)
+
+
+def authenticate_youtube(config: BotConfig, local_server: bool) -> bool:
+    """YouTube の OAuth トークンを取得して保存"""
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    from music_services import YouTubeService
+
+    credentials_file = config.oauth_credentials_file
+    if not credentials_file.exists():
+        print(f"❌ OAuth認証情報ファイルが見つかりません: {credentials_file}")
+        print("📋 Google Cloud Consoleから認証情報をダウンロードして配置してください")
+        return False
+
+    if local_server:
+        flow = InstalledAppFlow.from_client_secrets_file(str(credentials_file), YouTubeService.SCOPES)
+        creds = flow.run_local_server(port=0)
+    else:
+        flow = InstalledAppFlow.from_client_secrets_file(
+            str(credentials_file),
+            YouTubeService.SCOPES,
+            redirect_uri=YOUTUBE_REDIRECT_URI,
+        )
+        # リフレッシュトークンを確実に受け取るため毎回同意画面を表示する
+        auth_url, state = flow.authorization_url(access_type="offline", prompt="consent")
+        code = _prompt_redirect(auth_url, state)
+        if not code:
+            return False
+        flow.fetch_token(code=code)
+        creds = flow.credentials
+
+    write_text_atomic(config.oauth_token_file, creds.to_json())
+    print(f"✅ YouTubeのトークンを保存しました: {config.oauth_token_file}")
+    return True
+
+
+async def authenticate_soundcloud(config: BotConfig, local_server: bool, force: bool) -> bool:
+    """SoundCloud の OAuth トークンを取得して保存"""
+    from soundcloud_service import SoundCloudService, generate_pkce_pair
+
+    if not config.soundcloud_client_id or not config.soundcloud_client_secret:
+        print("❌ SOUNDCLOUD_CLIENT_ID / SOUNDCLOUD_CLIENT_SECRET が設定されていません")
+        return False
+
+    service = SoundCloudService()
+    try:
+        await service.initialize()
+        if service.is_available and not force:
+            print("✅ 保存済みのSoundCloudトークンは有効です（再取得する場合は --force）")
+            return True
+
+        if local_server:
+            return await service.authenticate_with_local_server()
+
+        code_verifier, code_challenge = generate_pkce_pair()
+        state = secrets.token_urlsafe(32)
+        auth_url = service.authorization_url(code_challenge, state)
+        code = _prompt_redirect(auth_url, state)
+        if not code:
+            return False
+        if not await service.exchange_code_for_token(code, code_verifier):
+            print("❌ トークンの取得に失敗しました。ログを確認してください")
+            return False
+
+        print(f"✅ SoundCloudのトークンを保存しました: {config.soundcloud_token_file}")
+        return True
+    finally:
+        await service.close()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """エントリーポイント（終了コードを返す）"""
+    parser = argparse.ArgumentParser(
+        prog="start.py auth",
+        description="音楽サービスの認証トークンを取得します",
+    )
+    parser.add_argument("service", choices=["youtube", "soundcloud"], help="認証するサービス")
+    parser.add_argument(
+        "--local-server",
+        action="store_true",
+        help="ブラウザを開き、ローカルサーバーでリダイレクトを受け取る",
+    )
+    parser.add_argument("--force", action="store_true", help="有効なトークンがあっても再取得する（SoundCloudのみ）")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s - %(message)s")
+    config = BotConfig()
+    config.oauth_token_file.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        if args.service == "youtube":
+            ok = authenticate_youtube(config, args.local_server)
+        else:
+            ok = asyncio.run(authenticate_soundcloud(config, args.local_server, args.force))
+    except KeyboardInterrupt:
+        print("\n⏹️ 認証を中断しました")
+        return 1
+    except Exception as e:
+        print(f"❌ 認証中にエラーが発生しました: {e}")
+        return 1
+
+    if ok:
+        print("💡 起動中のBotは次回の確認時（AUTH_RETRY_INTERVAL 秒ごと）にトークンを読み込みます")
+    return 0 if ok else 1
@@ -2,11 +2,14 @@
 """
 
 import logging
+import time
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
+from priority_scheduler import BULK
+
 
 async def setup_commands(bot: commands.Bot) -> None:
     """スラッシュコマンドを設定"""
@@ -15,16 +18,24 @@ async def setup_commands(bot: commands.Bot) -> None:
     @app_commands.describe(
         action="実行する設定アクション",
         channel="設定するチャンネル（未指定の場合は現在のチャンネル）",
+        days="URL履歴の保持日数（retention用、0で無期限、未指定でデフォルト）",
+        share="書き込みの重み（allocation用、Bot管理者のみ、未指定でデフォルト）",
+        concurrency="同時書き込み数の上限（allocation用、Bot管理者のみ、0で上限なし、未指定でデフォルト）",
     )
     @app_commands.choices(action=[
         app_commands.Choice(name="monitor", value="monitor"),
         app_commands.Choice(name="notification", value="notification"),
+        app_commands.Choice(name="retention", value="retention"),
+        app_commands.Choice(name="allocation", value="allocation"),
         app_commands.Choice(name="show", value="show"),
     ])
     async def setting(
         interaction: discord.Interaction,
         action: app_commands.Choice[str],
         channel: discord.TextChannel | None = None,
+        days: app_commands.Range[int, 0, 3650] | None = None,
+        share: app_commands.Range[int, 1, 100] | None = None,
+        concurrency: app_commands.Range[int, 0, 16] | None = None,
     ) -> None:
         """設定コマンド"""
         if not interaction.guild:
@@ -42,6 +53,10 @@ async def setup_commands(bot: commands.Bot) -> None:
             await _set_monitor_channel(interaction, target_channel, bot)
         elif action.value == "notification":
             await _set_notification_channel(interaction, target_channel, bot)
+        elif action.value == "retention":
+            await _set_retention_days(interaction, days, bot)
+        elif action.value == "allocation":
+            await _set_write_allocation(interaction, share, concurrency, bot)
         elif action.value == "show":
             await _show_settings(interaction, bot)
 
@@ -62,8 +77,66 @@ async def setup_commands(bot: commands.Bot) -> None:
             await interaction.response.send_message("メッセージ数は1から100の間で指定してください。", ephemeral=True)
             return
 
+        if bot.shutdown_drain.draining:
+            await interaction.response.send_message("Botの再起動中です。しばらくしてから再度実行してください。", ephemeral=True)
+            return
+
         await _process_backlog(interaction, count, bot)
 
+    @bot.tree.command(name="stats", description="追加統計やBotの稼働統計を表示します")
+    @app_commands.describe(view="表示する統計（未指定の場合はサーバーの追加統計）")
+    @app_commands.choices(view=[
+        app_commands.Choice(name="guild", value="guild"),
+        app_commands.Choice(name="runtime", value="runtime"),
+    ])
+    async def stats(
+        interaction: discord.Interaction,
+        view: app_commands.Choice[str] | None = None,
+    ) -> None:
+        """統計コマンド"""
+        if not interaction.guild:
+            await interaction.response.send_message("このコマンドはサーバー内でのみ使用できます。", ephemeral=True)
+            return
+
+        # 管理者権限チェック
+        if not interaction.user.guild_permissions.manage_channels:
+            await interaction.response.send_message("このコマンドを使用する権限がありません。", ephemeral=True)
+            return
+
+        if view and view.value == "runtime":
+            await _show_runtime_stats(interaction, bot)
+        else:
+            await _show_guild_stats(interaction, bot)
+
+    @bot.tree.command(name="unavailable", description="追加できなかった動画・トラックの記録を表示・削除します")
+    @app_commands.describe(
+        action="実行するアクション",
+        url="削除する楽曲のURL（purge用、未指定の場合は全件削除、Bot管理者のみ）",
+    )
+    @app_commands.choices(action=[
+        app_commands.Choice(name="list", value="list"),
+        app_commands.Choice(name="purge", value="purge"),
+    ])
+    async def unavailable(
+        interaction: discord.Interaction,
+        action: app_commands.Choice[str],
+        url: str | None = None,
+    ) -> None:
+        """否定キャッシュ管理コマンド"""
+        if not interaction.guild:
+            await interaction.response.send_message("このコマンドはサーバー内でのみ使用できます。", ephemeral=True)
+            return
+
+        # 管理者権限チェック
+        if not interaction.user.guild_permissions.manage_channels:
+            await interaction.response.send_message("このコマンドを使用する権限がありません。", ephemeral=True)
+            return
+
+        if action.value == "list":
+            await _show_unavailable(interaction, bot)
+        elif action.value == "purge":
+            await _purge_unavailable(interaction, url, bot)
+
     @bot.tree.command(name="help", description="Botの使い方を表示します")
     async def help_command(interaction: discord.Interaction) -> None:
         """ヘルプコマンド"""
@@ -78,6 +151,8 @@ async def setup_commands(bot: commands.Bot) -> None:
             value=(
                 "`/setting monitor [チャンネル]` - 監視するチャンネルを設定\n"
                 "`/setting notification [チャンネル]` - 通知チャンネルを設定\n"
+                "`/setting retention [日数]` - URL履歴の保持日数を設定\n"
+                "`/setting allocation [重み] [上限]` - 書き込み配分を設定（Bot管理者のみ）\n"
                 "`/setting show` - 現在の設定を表示"
             ),
             inline=False,
@@ -85,7 +160,11 @@ async def setup_commands(bot: commands.Bot) -> None:
 
         embed.add_field(
             name="🔄 操作コマンド",
-            value="`/backlog [件数]` - 過去のメッセージを遡って処理",
+            value=(
+                "`/backlog [件数]` - 過去のメッセージを遡って処理\n"
+                "`/stats [guild|runtime]` - 追加統計・稼働統計を表示\n"
+                "`/unavailable [list|purge] [URL]` - 追加できなかった楽曲の記録を表示・削除"
+            ),
             inline=False,
         )
 
@@ -94,6 +173,7 @@ async def setup_commands(bot: commands.Bot) -> None:
             value=(
                 "• YouTube: `youtube.com/watch`, `youtu.be`\n"
                 "• YouTube Music: `music.youtube.com`\n"
+                "• YouTube プレイリスト: `youtube.com/playlist?list=` （含まれる動画をまとめて追加）\n"
                 "• SoundCloud: `soundcloud.com` （設定済みの場合のみ）"
             ),
             inline=False,
@@ -123,6 +203,7 @@ async def _set_monitor_channel(
     """監視チャンネルを設定"""
     try:
         await bot.db_manager.set_monitored_channel(interaction.guild.id, channel.id)
+        await bot.refresh_monitored_channels()
 
         embed = discord.Embed(
             title="✅ 監視チャンネル設定完了",
@@ -161,6 +242,128 @@ async def _set_notification_channel(
         await interaction.response.send_message("設定の保存に失敗しました。", ephemeral=True)
 
 
+async def _set_retention_days(
+    interaction: discord.Interaction,
+    days: int | None,
+    bot: commands.Bot,
+) -> None:
+    """URL履歴の保持日数を設定"""
+    try:
+        await bot.db_manager.set_retention_days(interaction.guild.id, days)
+
+        if days is None:
+            description = f"デフォルト（{_format_retention(bot.config.url_retention_days)}）に戻しました"
+        else:
+            description = f"URL履歴の保持期間: {_format_retention(days)}"
+
+        embed = discord.Embed(
+            title="✅ 保持期間設定完了",
+            description=description,
+            color=discord.Color.green(),
+        )
+
+        await interaction.response.send_message(embed=embed)
+        logging.info(f"Guild {interaction.guild.id}: URL履歴保持日数設定 -> {days}")
+
+    except Exception as e:
+        logging.exception(f"保持期間設定エラー: {e}")
+        await interaction.response.send_message("設定の保存に失敗しました。", ephemeral=True)
+
+
+async def _set_write_allocation(
+    interaction: discord.Interaction,
+    share: int | None,
+    concurrency: int | None,
+    bot: commands.Bot,
+) -> None:
+    """サーバーの書き込み配分（重み・同時実行数の上限）を設定"""
+    # 他のサーバーとの配分を決める設定のため、サーバー管理者ではなくBot管理者のみ変更できる
+    if not await bot.is_owner(interaction.user):
+        await interaction.response.send_message("書き込み配分はBot管理者のみ変更できます。", ephemeral=True)
+        return
+
+    try:
+        await bot.db_manager.set_write_allocation(interaction.guild.id, share, concurrency)
+        bot.scheduler.set_guild_allocation(interaction.guild.id, share, concurrency)
+
+        embed = discord.Embed(
+            title="✅ 書き込み配分設定完了",
+            description=_format_write_allocation(share, concurrency, bot),
+            color=discord.Color.green(),
+        )
+
+        await interaction.response.send_message(embed=embed)
+        logging.info(f"Guild {interaction.guild.id}: 書き込み配分設定 -> 重み {share} / 同時実行数 {concurrency}")
+
+    except Exception as e:
+        logging.exception(f"書き込み配分設定エラー: {e}")
+        await interaction.response.send_message("設定の保存に失敗しました。", ephemeral=True)
+
+
+def _format_write_allocation(share: int | None, concurrency: int | None, bot: commands.Bot) -> str:
+    """書き込み配分を表示用に整形"""
+    share_text = f"{share}" if share is not None else "デフォルト（1）"
+    if concurrency is None:
+        default = bot.config.guild_write_concurrency
+        concurrency_text = f"デフォルト（{default if default else '上限なし'}）"
+    else:
+        concurrency_text = f"{concurrency}" if concurrency else "上限なし"
+    return f"重み: {share_text}\n同時書き込み数の上限: {concurrency_text}"
+
+
+async def _show_unavailable(interaction: discord.Interaction, bot: commands.Bot) -> None:
+    """追加できなかった楽曲の記録を表示"""
+    try:
+        entries = await bot.negative_cache.entries(limit=20)
+        lines = [
+            f"`{entry['canonical_id']}` - {entry['reason']}（{entry['failed_at']} UTC、<t:{int(entry['expires_at'])}:R>に失効）"
+            for entry in entries
+        ]
+        embed = discord.Embed(
+            title="⛔ 追加できなかった楽曲（新しい順・最大20件）",
+            description="\n".join(lines) if lines else "記録はありません",
+            color=discord.Color.orange(),
+        )
+        embed.set_footer(text="記録された楽曲は再投稿されても失効するまで追加を試みません")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    except Exception as e:
+        logging.exception(f"否定キャッシュ表示エラー: {e}")
+        await interaction.response.send_message("記録の取得に失敗しました。", ephemeral=True)
+
+
+async def _purge_unavailable(interaction: discord.Interaction, url: str | None, bot: commands.Bot) -> None:
+    """追加できなかった楽曲の記録を削除（URL未指定の場合は全件）"""
+    canonical_id = None
+    if url:
+        canonical_id = bot.url_extractor.get_canonical_id(url)
+        if not canonical_id:
+            await interaction.response.send_message("対応していないURLです。", ephemeral=True)
+            return
+    # 記録は全サーバーで共有されるため、全件削除はBot管理者のみ実行できる
+    elif not await bot.is_owner(interaction.user):
+        await interaction.response.send_message("全件削除はBot管理者のみ実行できます。", ephemeral=True)
+        return
+
+    try:
+        deleted = await bot.negative_cache.purge(canonical_id)
+        embed = discord.Embed(
+            title="✅ 記録を削除しました",
+            description=f"{canonical_id or '全件'}: {deleted}件（次回の投稿時に追加を再試行します）",
+            color=discord.Color.green(),
+        )
+        await interaction.response.send_message(embed=embed)
+
+    except Exception as e:
+        logging.exception(f"否定キャッシュ削除エラー: {e}")
+        await interaction.response.send_message("記録の削除に失敗しました。", ephemeral=True)
+
+
+def _format_retention(days: int) -> str:
+    """保持日数を表示用に整形"""
+    return "無期限" if days == 0 else f"{days}日"
+
+
 async def _show_settings(interaction: discord.Interaction, bot: commands.Bot) -> None:
     """現在の設定を表示"""
     try:
@@ -199,6 +402,25 @@ async def _show_settings(interaction: discord.Interaction, bot: commands.Bot) ->
             inline=False,
         )
 
+        # URL履歴の保持期間
+        retention_days = settings.get("retention_days")
+        if retention_days is None:
+            retention_text = f"デフォルト（{_format_retention(bot.config.url_retention_days)}）"
+        else:
+            retention_text = _format_retention(retention_days)
+
+        embed.add_field(
+            name="🗑️ URL履歴の保持期間",
+            value=retention_text,
+            inline=False,
+        )
+
+        embed.add_field(
+            name="⚖️ 書き込み配分",
+            value=_format_write_allocation(settings.get("write_share"), settings.get("write_concurrency"), bot),
+            inline=False,
+        )
+
         await interaction.response.send_message(embed=embed)
 
     except Exception as e:
@@ -206,6 +428,188 @@ async def _show_settings(interaction: discord.Interaction, bot: commands.Bot) ->
         await interaction.response.send_message("設定の取得に失敗しました。", ephemeral=True)
 
 
+async def _show_guild_stats(interaction: discord.Interaction, bot: commands.Bot) -> None:
+    """サーバーの追加統計を表示"""
+    try:
+        stats = await bot.db_manager.get_guild_stats(interaction.guild.id)
+
+        embed = discord.Embed(
+            title="📊 追加統計",
+            color=discord.Color.blue(),
+        )
+
+        totals = stats["totals"]
+        embed.add_field(name="総追加数", value=f"{sum(totals.values())}件", inline=True)
+        embed.add_field(name="YouTube", value=f"{totals.get('youtube', 0)}件", inline=True)
+        embed.add_field(name="SoundCloud", value=f"{totals.get('soundcloud', 0)}件", inline=True)
+
+        daily_lines = [
+            f"`{day}` YouTube: {counts.get('youtube', 0)}件 / "
+            f"SoundCloud: {counts.get('soundcloud', 0)}件"
+            for day, counts in stats["daily"].items()
+        ]
+        embed.add_field(
+            name="📅 直近7日間",
+            value="\n".join(daily_lines) if daily_lines else "追加なし",
+            inline=False,
+        )
+
+        submitter_lines = [
+            f"{rank}. <@{submitter_id}> - {add_count}件"
+            for rank, (submitter_id, add_count) in enumerate(stats["top_submitters"], start=1)
+        ]
+        embed.add_field(
+            name="🏆 上位投稿者",
+            value="\n".join(submitter_lines) if submitter_lines else "記録なし",
+            inline=False,
+        )
+
+        await interaction.response.send_message(embed=embed)
+
+    except Exception as e:
+        logging.exception(f"追加統計表示エラー: {e}")
+        await interaction.response.send_message("統計の取得に失敗しました。", ephemeral=True)
+
+
+def _format_seconds_as_ms(value: float | None) -> str:
+    """秒をミリ秒表記に変換"""
+    if value is None:
+        return "計測なし"
+    return f"{value * 1000:.1f} ms"
+
+
+async def _show_runtime_stats(interaction: discord.Interaction, bot: commands.Bot) -> None:
+    """稼働統計を表示"""
+    try:
+        embed = discord.Embed(
+            title="📊 稼働統計",
+            color=discord.Color.blue(),
+        )
+
+        if bot.loop_monitor:
+            lag = bot.loop_monitor.lag_percentiles()
+            embed.add_field(
+                name="⏱️ イベントループ遅延",
+                value=(
+                    f"p50: {_format_seconds_as_ms(lag['p50'])}\n"
+                    f"p99: {_format_seconds_as_ms(lag['p99'])}\n"
+                    f"最大: {_format_seconds_as_ms(lag['max'])}"
+                ),
+                inline=True,
+            )
+            stalls = int(bot.metrics.get_counter("event_loop_stalls_total"))
+            embed.add_field(name="🐢 ブロック検出回数", value=f"{stalls}回", inline=True)
+        else:
+            embed.add_field(name="⏱️ イベントループ遅延", value="監視無効", inline=True)
+
+        embed.add_field(
+            name="📡 Gateway遅延（平均）",
+            value=_format_seconds_as_ms(bot.latency),
+            inline=True,
+        )
+
+        rejected = {
+            stage: int(bot.metrics.get_counter("prefilter_rejected_total", stage=stage))
+            for stage in ("bot", "dm", "channel", "host", "no_url")
+        }
+        embed.add_field(
+            name="🧹 メッセージ前段フィルタ",
+            value=(
+                f"通過: {int(bot.metrics.get_counter('prefilter_passed_total'))}件\n"
+                f"除外: Bot {rejected['bot']} / DM {rejected['dm']} / チャンネル {rejected['channel']} / "
+                f"ホスト {rejected['host']} / URLなし {rejected['no_url']}"
+            ),
+            inline=False,
+        )
+
+        pending_counts = await bot.pending_adds.counts()
+        auth_lines = [
+            f"{name}: "
+            + ("認証待ち" if bot.pending_adds.is_degraded(service_type) else "利用可能")
+            + f" / 保留 {pending_counts.get(service_type, 0)}件"
+            for service_type, name in (("youtube", "YouTube"), ("soundcloud", "SoundCloud"))
+            if bot.pending_adds.services.get(service_type)
+        ]
+        embed.add_field(name="🔐 認証状態", value="\n".join(auth_lines), inline=False)
+
+        limit_lines = []
+        for service_type, name in (("youtube", "YouTube"), ("soundcloud", "SoundCloud")):
+            if not bot.pending_adds.services.get(service_type):
+                continue
+            line = f"{name}: {bot.scheduler.service_concurrency(service_type)}"
+            p99 = bot.metrics.get_gauge("service_latency_p99_seconds", service=service_type)
+            if p99 is not None:
+                line += f"（p99 {_format_seconds_as_ms(p99)}）"
+            limit_lines.append(line)
+        embed.add_field(
+            name="🎚️ 同時実行数" + ("（自動調整）" if bot.service_limits else ""),
+            value="\n".join(limit_lines),
+            inline=False,
+        )
+
+        if bot.dry_run:
+            summary = bot.dry_run.summary()
+            latency = summary["latency_seconds"]
+            writes = summary["writes_skipped"]
+            embed.add_field(
+                name="🧪 ドライラン",
+                value=(
+                    f"URL {sum(summary['urls'].values())}件 / "
+                    f"{summary['throughput_per_second']:.2f}件/秒（直近1分 {summary['recent_throughput_per_second']:.2f}件/秒）\n"
+                    f"投稿の処理時間: p50 {_format_seconds_as_ms(latency['p50'])} / "
+                    f"p99 {_format_seconds_as_ms(latency['p99'])}\n"
+                    f"省略した書き込み: YouTube {writes.get('youtube', 0)}件 / SoundCloud {writes.get('soundcloud', 0)}件 / "
+                    f"通知 {summary['notifications_suppressed']}件"
+                ),
+                inline=False,
+            )
+
+        # 上限に近づくと切り替わる YouTube の追加先
+        series = bot.youtube_service.playlist_series
+        if series and series.loaded:
+            embed.add_field(
+                name="📼 YouTube 追加先",
+                value=(
+                    f"{series.next_position}番目のプレイリスト `{series.active}`\n"
+                    f"{series.active_item_count}/{series.max_items}件（切り替え済み {len(series.sealed)}件）"
+                ),
+                inline=False,
+            )
+
+        # このサーバーの要求が実行枠・書き込みキューで待った平均時間
+        wait_lines = []
+        for stage, label in (("slot", "実行枠"), ("writer", "書き込みキュー")):
+            for service_type, name in (("youtube", "YouTube"), ("soundcloud", "SoundCloud")):
+                labels = {"guild": interaction.guild.id, "service": service_type, "stage": stage}
+                waits = bot.metrics.get_counter("guild_queue_waits_total", **labels)
+                if waits:
+                    average = bot.metrics.get_counter("guild_queue_wait_seconds_total", **labels) / waits
+                    wait_lines.append(f"{name} {label}: 平均 {_format_seconds_as_ms(average)}（{int(waits)}件）")
+        embed.add_field(
+            name="⏳ このサーバーの待ち時間",
+            value="\n".join(wait_lines) if wait_lines else "記録なし",
+            inline=False,
+        )
+
+        shard_lines = [
+            f"Shard {shard['shard_id']}: {_format_seconds_as_ms(shard['latency'])} / "
+            f"処理中 {shard['in_flight']}件 / メッセージ {shard['messages']}件 / "
+            f"URL {shard['urls']}件"
+            for shard in bot.shard_stats()
+        ]
+        embed.add_field(
+            name=f"🧩 シャード（全{bot.shard_count}シャード中）",
+            value="\n".join(shard_lines) if shard_lines else "接続なし",
+            inline=False,
+        )
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    except Exception as e:
+        logging.exception(f"稼働統計表示エラー: {e}")
+        await interaction.response.send_message("統計の取得に失敗しました。", ephemeral=True)
+
+
 async def _process_backlog(
     interaction: discord.Interaction,
     count: int,
@@ -230,7 +634,11 @@ async def _process_backlog(
         youtube_processed = 0
         soundcloud_processed = 0
         soundcloud_skipped = 0
+        unavailable = 0
+        deferred = 0
+        handed_off = 0
         total_urls = 0
+        started = time.monotonic()
 
         # 過去のメッセージを取得して処理
         async for message in channel.history(limit=count):
@@ -241,30 +649,83 @@ async def _process_backlog(
             total_urls += len(urls)
 
             for url in urls:
-                # 重複チェック
+                # 処理中に終了処理が始まった場合、残りは次の起動へ引き継ぐ
+                if bot.shutdown_drain.draining:
+                    if await bot.shutdown_drain.hand_off(url, message, "draining"):
+                        handed_off += 1
+                    continue
+
+                # 重複チェック（コミット待ちの記録も含める）
+                if bot.url_writer.is_pending(interaction.guild.id, url):
+                    continue
                 if await bot.db_manager.is_url_processed(interaction.guild.id, url):
                     continue
 
+                # 以前に追加できなかった楽曲はAPIを呼ばずにスキップ
+                if await bot.unavailable_reason(url):
+                    unavailable += 1
+                    continue
+
                 service_type = bot.url_extractor.identify_service(url)
 
-                if service_type == "youtube":
-                    success = await bot.youtube_service.add_to_playlist(url)
-                    if success:
-                        await bot.db_manager.mark_url_processed(
-                            interaction.guild.id, url, service_type,
-                        )
-                        youtube_processed += 1
+                # 認証待ちのサービスは保留キューに入れ、認証後に追加する
+                if bot.pending_adds.is_degraded(service_type):
+                    if await bot.pending_adds.enqueue(
+                        interaction.guild.id,
+                        url,
+                        service_type,
+                        submitter_id=message.author.id,
+                        message_id=message.id,
+                        channel_id=message.channel.id,
+                    ):
+                        deferred += 1
+                    continue
 
-                elif service_type == "soundcloud":
-                    if bot.soundcloud_service:
-                        success = await bot.soundcloud_service.add_to_playlist(url)
+                # 終了処理で期限までに終わらなかった場合は次の起動へ引き継がれる
+                with bot.shutdown_drain.track(url, message):
+                    playlist_id = bot.url_extractor.extract_youtube_playlist_id(url)
+                    if playlist_id:
+                        result = await bot.import_youtube_playlist(
+                            playlist_id,
+                            interaction.guild.id,
+                            submitter_id=message.author.id,
+                            message_id=message.id,
+                            channel_id=message.channel.id,
+                            notify=False,
+                        )
+                        if result:
+                            youtube_processed += result.added
+
+                    elif service_type == "youtube":
+                        success = await bot.add_to_playlist(
+                            service_type,
+                            url,
+                            lane=BULK,
+                            guild_id=interaction.guild.id,
+                        )
                         if success:
-                            await bot.db_manager.mark_url_processed(
-                                interaction.guild.id, url, service_type,
+                            await bot.record_processed_url(url, service_type, message, wait=False)
+                            youtube_processed += 1
+
+                    elif service_type == "soundcloud":
+                        if bot.soundcloud_service:
+                            success = await bot.add_to_playlist(
+                                service_type,
+                                url,
+                                lane=BULK,
+                                guild_id=interaction.guild.id,
                             )
-                            soundcloud_processed += 1
-                    else:
-                        soundcloud_skipped += 1
+                            if success:
+                                await bot.record_processed_url(url, service_type, message, wait=False)
+                                soundcloud_processed += 1
+                        else:
+                            soundcloud_skipped += 1
+
+        # 記録をまとめてコミットしてから結果を報告する
+        await bot.url_writer.flush()
+        elapsed = time.monotonic() - started
+        if bot.dry_run:
+            bot.dry_run.record_batch("backlog", total_urls, elapsed)
 
         # 結果報告
         total_processed = youtube_processed + soundcloud_processed
@@ -284,6 +745,37 @@ async def _process_backlog(
                 inline=False,
             )
 
+        if unavailable > 0:
+            embed.add_field(
+                name="⛔ 利用不可でスキップ",
+                value=f"{unavailable}件（削除済み・非公開など。`/unavailable list` で確認できます）",
+                inline=False,
+            )
+
+        if deferred > 0:
+            embed.add_field(
+                name="⏸️ 認証待ちで保留",
+                value=f"{deferred}件（認証後に自動で追加されます）",
+                inline=False,
+            )
+
+        if handed_off > 0:
+            embed.add_field(
+                name="🔁 再起動のため引き継ぎ",
+                value=f"{handed_off}件（再起動後に自動で追加されます）",
+                inline=False,
+            )
+
+        if bot.dry_run:
+            embed.add_field(
+                name="🧪 ドライラン",
+                value=(
+                    f"プレイリストは変更していません。{total_urls}件を{elapsed:.1f}秒で処理"
+                    f"（{total_urls / elapsed if elapsed else 0:.1f}件/秒）"
+                ),
+                inline=False,
+            )
+
         await interaction.followup.send(embed=embed)
 
     except Exception as e:
@@ -5,6 +5,14 @@ import os
 from pathlib import Path
 
 
+def _env_bool(name: str, default: bool) -> bool:
+    """真偽値の環境変数を読み込み"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 class BotConfig:
     """Bot設定クラス"""
 
@@ -13,20 +21,119 @@ class BotConfig:
         # Discord設定
         self.discord_token: str | None = os.getenv("DISCORD_BOT_TOKEN")
 
+        # シャーディング設定（未指定の場合はDiscord推奨のシャード数を自動使用）
+        shard_count = os.getenv("SHARD_COUNT")
+        self.shard_count: int | None = int(shard_count) if shard_count else None
+        shard_ids = os.getenv("SHARD_IDS")
+        self.shard_ids: list[int] | None = (
+            [int(shard_id) for shard_id in shard_ids.split(",") if shard_id.strip()]
+            if shard_ids
+            else None
+        )
+
+        # 省メモリモード（必要最小限のインテント・メンバーキャッシュ無効・起動時チャンク無効）
+        self.lean_mode: bool = _env_bool("LEAN_MODE", False)
+        # メッセージキャッシュ件数（0 で無効、未指定時は通常 1000 件・省メモリモードでは無効）
+        max_messages = os.getenv("MAX_MESSAGES")
+        if max_messages is None:
+            self.max_messages: int | None = None if self.lean_mode else 1000
+        else:
+            self.max_messages = int(max_messages) or None
+
         # YouTube API設定
         self.youtube_api_key: str | None = os.getenv("YOUTUBE_API_KEY")
         self.youtube_client_id: str | None = os.getenv("YOUTUBE_CLIENT_ID")
         self.youtube_client_secret: str | None = os.getenv("YOUTUBE_CLIENT_SECRET")
         self.youtube_playlist_id: str | None = os.getenv("YOUTUBE_PLAYLIST_ID")
+        # プレイリストの動画数がこの件数に達したら系列の次のプレイリストへ切り替える（0 で切り替えない）
+        # YouTube のプレイリストは最大5000件のため、他の経路からの追加に備えて少し手前で切り替える
+        self.youtube_playlist_max_items: int = int(os.getenv("YOUTUBE_PLAYLIST_MAX_ITEMS", "4900"))
+        # YOUTUBE_PLAYLIST_ID の後に順に使うプレイリストID（カンマ区切り）と、使い切った後に新規作成するか
+        successors = os.getenv("YOUTUBE_PLAYLIST_SUCCESSORS", "")
+        self.youtube_playlist_successors: list[str] = [
+            playlist_id.strip() for playlist_id in successors.split(",") if playlist_id.strip()
+        ]
+        self.youtube_playlist_auto_create: bool = _env_bool("YOUTUBE_PLAYLIST_AUTO_CREATE", True)
+        # 接続先の上書き（ローカルの偽APIサーバーでの検証用、通常は未設定）
+        self.youtube_api_base_url: str | None = os.getenv("YOUTUBE_API_BASE_URL")
 
         # SoundCloud API設定
         self.soundcloud_client_id: str | None = os.getenv("SOUNDCLOUD_CLIENT_ID")
         self.soundcloud_client_secret: str | None = os.getenv("SOUNDCLOUD_CLIENT_SECRET")
         self.soundcloud_playlist_id: str | None = os.getenv("SOUNDCLOUD_PLAYLIST_ID")
+        self.soundcloud_api_base_url: str | None = os.getenv("SOUNDCLOUD_API_BASE_URL")
 
         # その他設定
         self.database_path: Path = Path(os.getenv("DATABASE_PATH", "./data/bot_data.db"))
+        # 設定した場合は SQLite の代わりに PostgreSQL を使用（複数プロセスでの共有用）
+        self.database_url: str | None = os.getenv("DATABASE_URL")
+        self.database_pool_min_size: int = int(os.getenv("DATABASE_POOL_MIN_SIZE", "1"))
+        self.database_pool_max_size: int = int(os.getenv("DATABASE_POOL_MAX_SIZE", "10"))
         self.log_level: str = os.getenv("LOG_LEVEL", "INFO")
+        # true の場合はコマンド定義に変更がなくても起動時にスラッシュコマンドを同期
+        self.force_command_sync: bool = _env_bool("FORCE_COMMAND_SYNC", False)
+
+        # プレイリスト書き込みロック設定（複数プロセスで同じプレイリストを共有する場合）
+        self.playlist_lock_ttl: float = float(os.getenv("PLAYLIST_LOCK_TTL", "30"))
+        self.playlist_lock_timeout: float = float(os.getenv("PLAYLIST_LOCK_TIMEOUT", "120"))
+
+        # プレイリスト書き込みワーカー設定（rate は1秒あたりの最大追加数、0 で無制限）
+        self.playlist_write_workers: int = int(os.getenv("PLAYLIST_WRITE_WORKERS", "4"))
+        self.playlist_write_rate: float = float(os.getenv("PLAYLIST_WRITE_RATE", "5"))
+        # 1回のHTTPバッチリクエストにまとめる最大追加数（1 でバッチを使わない）
+        self.playlist_write_batch_size: int = int(os.getenv("PLAYLIST_WRITE_BATCH_SIZE", "50"))
+        # YouTube プレイリストURL投稿時に取り込む最大動画数
+        self.playlist_import_max_items: int = int(os.getenv("PLAYLIST_IMPORT_MAX_ITEMS", "5000"))
+
+        # サービスごとの同時実行数と、そのうち一括処理に使わせない枠数
+        self.service_concurrency: int = int(os.getenv("SERVICE_CONCURRENCY", "2"))
+        self.interactive_reserved_slots: int = int(os.getenv("INTERACTIVE_RESERVED_SLOTS", "1"))
+        # 応答時間とレート制限に応じて同時実行数を SERVICE_CONCURRENCY（初期値）から
+        # SERVICE_CONCURRENCY_MAX の間で自動調整する。p99 応答時間が平常時の
+        # ADAPTIVE_LATENCY_TOLERANCE 倍を超えたら悪化とみなして同時実行数を下げる
+        self.adaptive_concurrency: bool = _env_bool("ADAPTIVE_CONCURRENCY", True)
+        self.service_concurrency_max: int = int(os.getenv("SERVICE_CONCURRENCY_MAX", "8"))
+        self.adaptive_latency_tolerance: float = float(os.getenv("ADAPTIVE_LATENCY_TOLERANCE", "2"))
+        # 一括処理の待ち時間がこの秒数を超えるごとに優先度を1段階上げる（0 で無効）
+        self.priority_aging: float = float(os.getenv("PRIORITY_AGING", "5"))
+        # サーバーごとの同時実行数の既定の上限（0 で上限なし、サーバー個別の設定が優先）
+        self.guild_write_concurrency: int = int(os.getenv("GUILD_WRITE_CONCURRENCY", "0"))
+
+        # 認証待ちサービスの再確認間隔（秒）と保留中URLの追加再試行回数
+        self.auth_retry_interval: float = float(os.getenv("AUTH_RETRY_INTERVAL", "60"))
+        self.pending_add_max_attempts: int = int(os.getenv("PENDING_ADD_MAX_ATTEMPTS", "5"))
+
+        # 処理済みURLをまとめてコミットする件数と最大待ち時間（秒）
+        self.db_write_batch_size: int = int(os.getenv("DB_WRITE_BATCH_SIZE", "200"))
+        self.db_write_batch_delay: float = float(os.getenv("DB_WRITE_BATCH_DELAY", "0.05"))
+
+        # 削除済み・非公開などで追加できなかった楽曲を再試行しない時間（0 で無効）
+        self.negative_cache_ttl_hours: float = float(os.getenv("NEGATIVE_CACHE_TTL_HOURS", "168"))
+
+        # ドライラン（シャドーモード）: 処理はすべて行い、プレイリストへの書き込みと通知の送信だけを省略する
+        # DRY_RUN_WRITE_LATENCY は省略した書き込み1回あたりに待機する秒数（実際のAPIの応答時間の代わり）
+        self.dry_run: bool = _env_bool("DRY_RUN", False)
+        self.dry_run_write_latency: float = float(os.getenv("DRY_RUN_WRITE_LATENCY", "0"))
+
+        # 終了要求（SIGTERM）から処理中の追加の完了を待つ最大秒数（残りは保留キューへ引き継ぐ）
+        self.shutdown_drain_timeout: float = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "20"))
+        # 死活監視・準備完了確認用のHTTPエンドポイント（ポート 0 で無効）
+        self.health_host: str = os.getenv("HEALTH_HOST", "127.0.0.1")
+        self.health_port: int = int(os.getenv("HEALTH_PORT", "0"))
+
+        # データベースメンテナンス設定（保持日数 0 は無期限、既定は無期限で削除は明示的に有効にした場合のみ）
+        self.url_retention_days: int = int(os.getenv("URL_RETENTION_DAYS", "0"))
+        self.maintenance_interval_hours: float = float(
+            os.getenv("MAINTENANCE_INTERVAL_HOURS", "6"),
+        )
+        self.maintenance_batch_size: int = int(os.getenv("MAINTENANCE_BATCH_SIZE", "500"))
+
+        # イベントループ監視設定
+        self.loop_monitor_enabled: bool = _env_bool("LOOP_MONITOR_ENABLED", True)
+        self.loop_monitor_interval: float = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.5"))
+        self.loop_slow_callback_threshold: float = float(
+            os.getenv("LOOP_SLOW_CALLBACK_THRESHOLD", "0.25"),
+        )
 
     def validate_required_settings(self) -> list[str]:
         """必須設定の検証"""
@@ -52,6 +159,18 @@ class BotConfig:
             and self.soundcloud_playlist_id,
         )
 
+    @property
+    def log_file(self) -> Path:
+        """ログファイルのパス（シャードを分割起動する場合はプロセスごとに分ける）"""
+        if self.shard_ids:
+            return Path(f"bot-shard-{'-'.join(map(str, self.shard_ids))}.log")
+        return Path("bot.log")
+
+    @property
+    def command_sync_state_file(self) -> Path:
+        """最後に同期したスラッシュコマンド定義のハッシュ値を保存するファイルのパス"""
+        return Path("./data/command_sync_hash.txt")
+
     @property
     def oauth_credentials_file(self) -> Path:
         """OAuth認証情報ファイルのパス"""
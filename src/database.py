@@ -2,14 +2,21 @@
 """
 
 import logging
+import time
 from pathlib import Path
 from typing import Optional
 
 import aiosqlite
 
+from migrations import run_migrations
+from storage import ProcessedUrl, StorageBackend
 
-class DatabaseManager:
-    """データベース管理クラス"""
+# IN 句1回あたりの楽曲ID数（SQLite のパラメータ数上限より十分小さくする）
+CANONICAL_ID_CHUNK = 500
+
+
+class DatabaseManager(StorageBackend):
+    """データベース管理クラス（SQLite）"""
 
     def __init__(self, db_path: Path = Path("./data/bot_data.db")) -> None:
         """データベースマネージャーを初期化"""
@@ -17,41 +24,58 @@ class DatabaseManager:
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
     async def initialize(self) -> None:
-        """データベースとテーブルを初期化"""
-        async with aiosqlite.connect(self.db_path) as db:
-            # サーバー設定テーブル
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS server_settings (
-                    guild_id INTEGER PRIMARY KEY,
-                    monitored_channel_id INTEGER,
-                    notification_channel_id INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+        """データベースを初期化し、未適用のマイグレーションを適用"""
+        # マイグレーションはトランザクションを自前で制御するため自動コミットモードで接続
+        async with aiosqlite.connect(self.db_path, isolation_level=None) as db:
+            await self._configure_storage(db)
+            version = await run_migrations(db)
+            logging.info(f"データベースを初期化しました（スキーマバージョン: {version}）")
 
-            # 処理済みURL履歴テーブル（重複チェック用）
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS processed_urls (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    url TEXT NOT NULL,
-                    service_type TEXT NOT NULL,
-                    video_id TEXT,
-                    title TEXT,
-                    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(guild_id, url)
-                )
-            """)
+    async def _configure_storage(self, db: aiosqlite.Connection) -> None:
+        """ジャーナルモードと自動VACUUMを設定"""
+        # 削除後の空きページを incremental_vacuum で返却できるようにする
+        # （新規DBにはそのまま適用されるよう、ファイルに書き込む WAL の設定より先に指定する）
+        await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        # WALモードでメンテナンス中も読み込みをブロックしない
+        await db.execute("PRAGMA journal_mode=WAL")
 
-            # インデックス作成
-            await db.execute("""
-                CREATE INDEX IF NOT EXISTS idx_processed_urls_guild_url 
-                ON processed_urls(guild_id, url)
-            """)
+        if not await self._uses_incremental_vacuum(db):
+            # 既存DBの変換にはファイル全体を書き直す VACUUM が必要なため、Bot停止中にのみ行う
+            logging.warning(
+                "データベースは incremental auto_vacuum ではないため、削除後の空き領域を返却できません。"
+                "Botを停止して `python start.py vacuum` で変換してください",
+            )
 
-            await db.commit()
-            logging.info("データベースを初期化しました")
+    @staticmethod
+    async def _uses_incremental_vacuum(db: aiosqlite.Connection) -> bool:
+        """incremental auto_vacuum が有効か"""
+        cursor = await db.execute("PRAGMA auto_vacuum")
+        row = await cursor.fetchone()
+        return bool(row) and row[0] == 2
+
+    async def convert_to_incremental_vacuum(self) -> bool:
+        """既存DBを VACUUM で incremental auto_vacuum に変換（変換した場合は True）
+
+        VACUUM はファイル全体を書き直し、完了まで他の書き込みを待たせるため、Bot停止中（`python start.py vacuum`）にのみ呼び出す。
+        """
+        async with aiosqlite.connect(self.db_path, isolation_level=None) as db:
+            if await self._uses_incremental_vacuum(db):
+                return False
+            size_mb = self.db_path.stat().st_size / 1024 / 1024
+            logging.warning(
+                f"データベースを incremental auto_vacuum に変換するため、一度だけ VACUUM を実行します"
+                f"（{size_mb:.1f}MB）",
+            )
+            started = time.monotonic()
+            await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            await db.execute("VACUUM")
+            logging.info(f"データベースを incremental auto_vacuum に変換しました（{time.monotonic() - started:.1f}秒）")
+            return True
+
+    async def ping(self) -> None:
+        """ストレージに問い合わせできるか確認（できない場合は例外を送出）"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("SELECT 1")
 
     async def set_monitored_channel(self, guild_id: int, channel_id: int) -> None:
         """監視対象チャンネルを設定"""
@@ -75,6 +99,15 @@ class DatabaseManager:
             row = await cursor.fetchone()
             return row[0] if row and row[0] else None
 
+    async def get_monitored_channel_ids(self) -> set[int]:
+        """全サーバーの監視対象チャンネルIDを取得"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                SELECT monitored_channel_id FROM server_settings
+                WHERE monitored_channel_id IS NOT NULL
+            """)
+            return {row[0] for row in await cursor.fetchall()}
+
     async def set_notification_channel(self, guild_id: int, channel_id: Optional[int]) -> None:
         """通知チャンネルを設定"""
         async with aiosqlite.connect(self.db_path) as db:
@@ -105,6 +138,21 @@ class DatabaseManager:
             """, (guild_id, url))
             return await cursor.fetchone() is not None
 
+    async def get_processed_canonical_ids(self, guild_id: int, canonical_ids: list[str]) -> set[str]:
+        """指定した楽曲IDのうち処理済みのものをまとめて取得"""
+        found: set[str] = set()
+        async with aiosqlite.connect(self.db_path) as db:
+            # SQLite のパラメータ数上限を超えないよう分割して問い合わせる
+            for start in range(0, len(canonical_ids), CANONICAL_ID_CHUNK):
+                chunk = canonical_ids[start:start + CANONICAL_ID_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = await db.execute(f"""
+                    SELECT DISTINCT canonical_id FROM processed_urls
+                    WHERE guild_id = ? AND canonical_id IN ({placeholders})
+                """, (guild_id, *chunk))
+                found.update(row[0] for row in await cursor.fetchall())
+        return found
+
     async def mark_url_processed(
         self,
         guild_id: int,
@@ -112,21 +160,102 @@ class DatabaseManager:
         service_type: str,
         video_id: Optional[str] = None,
         title: Optional[str] = None,
+        *,
+        canonical_id: Optional[str] = None,
+        submitter_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
     ) -> None:
         """URLを処理済みとしてマーク"""
         async with aiosqlite.connect(self.db_path) as db:
             await db.execute("""
                 INSERT OR IGNORE INTO processed_urls 
-                (guild_id, url, service_type, video_id, title)
-                VALUES (?, ?, ?, ?, ?)
-            """, (guild_id, url, service_type, video_id, title))
+                (guild_id, url, service_type, video_id, title,
+                 canonical_id, submitter_id, message_id, channel_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                guild_id, url, service_type, video_id, title,
+                canonical_id, submitter_id, message_id, channel_id,
+            ))
+            await db.commit()
+
+    async def mark_urls_processed(self, records: list[ProcessedUrl]) -> None:
+        """複数のURLを1つのトランザクションで処理済みとしてマーク"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany("""
+                INSERT OR IGNORE INTO processed_urls
+                (guild_id, url, service_type, video_id, title,
+                 canonical_id, submitter_id, message_id, channel_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, records)
             await db.commit()
 
+    async def get_first_submission(self, guild_id: int, canonical_id: str) -> Optional[dict]:
+        """楽曲を最初に投稿したユーザー情報を取得"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                SELECT submitter_id, message_id, channel_id, processed_at
+                FROM processed_urls
+                WHERE guild_id = ? AND canonical_id = ?
+                ORDER BY processed_at
+                LIMIT 1
+            """, (guild_id, canonical_id))
+            row = await cursor.fetchone()
+
+            if row:
+                return {
+                    "submitter_id": row[0],
+                    "message_id": row[1],
+                    "channel_id": row[2],
+                    "processed_at": row[3],
+                }
+            return None
+
+    async def get_user_submissions(
+        self,
+        guild_id: int,
+        submitter_id: int,
+        limit: int = 20,
+    ) -> list[dict]:
+        """ユーザーの投稿履歴を新しい順に取得"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                SELECT url, service_type, processed_at
+                FROM processed_urls
+                WHERE guild_id = ? AND submitter_id = ?
+                ORDER BY processed_at DESC
+                LIMIT ?
+            """, (guild_id, submitter_id, limit))
+            return [
+                {"url": row[0], "service_type": row[1], "processed_at": row[2]}
+                for row in await cursor.fetchall()
+            ]
+
+    async def get_channel_urls_since(
+        self,
+        guild_id: int,
+        channel_id: int,
+        since: str,
+    ) -> list[dict]:
+        """チャンネルで指定日時（UTC, YYYY-MM-DD HH:MM:SS）以降に投稿されたURLを取得"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                SELECT url, submitter_id, processed_at
+                FROM processed_urls
+                WHERE guild_id = ? AND channel_id = ? AND processed_at >= ?
+                ORDER BY processed_at
+            """, (guild_id, channel_id, since))
+            return [
+                {"url": row[0], "submitter_id": row[1], "processed_at": row[2]}
+                for row in await cursor.fetchall()
+            ]
+
     async def get_server_settings(self, guild_id: int) -> dict:
         """サーバー設定を取得"""
         async with aiosqlite.connect(self.db_path) as db:
             cursor = await db.execute("""
-                SELECT monitored_channel_id, notification_channel_id 
+                SELECT monitored_channel_id, notification_channel_id, retention_days,
+                       write_share, write_concurrency
                 FROM server_settings WHERE guild_id = ?
             """, (guild_id,))
             row = await cursor.fetchone()
@@ -135,18 +264,331 @@ class DatabaseManager:
                 return {
                     "monitored_channel_id": row[0],
                     "notification_channel_id": row[1],
+                    "retention_days": row[2],
+                    "write_share": row[3],
+                    "write_concurrency": row[4],
                 }
             return {
                 "monitored_channel_id": None,
                 "notification_channel_id": None,
+                "retention_days": None,
+                "write_share": None,
+                "write_concurrency": None,
             }
 
-    async def cleanup_old_urls(self, days: int = 30) -> None:
-        """古いURL履歴をクリーンアップ"""
+    async def get_guild_stats(self, guild_id: int, days: int = 7) -> dict:
+        """集計テーブルからサーバーの追加統計を取得"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                SELECT service_type, add_count FROM guild_service_totals
+                WHERE guild_id = ?
+            """, (guild_id,))
+            totals = {row[0]: row[1] for row in await cursor.fetchall()}
+
+            cursor = await db.execute("""
+                SELECT day, service_type, add_count FROM guild_daily_stats
+                WHERE guild_id = ? AND day >= date('now', ?)
+                ORDER BY day DESC
+            """, (guild_id, f"-{days - 1} days"))
+            daily: dict[str, dict[str, int]] = {}
+            for day, service_type, add_count in await cursor.fetchall():
+                daily.setdefault(day, {})[service_type] = add_count
+
+            cursor = await db.execute("""
+                SELECT submitter_id, add_count FROM guild_submitter_stats
+                WHERE guild_id = ?
+                ORDER BY add_count DESC
+                LIMIT 5
+            """, (guild_id,))
+            top_submitters = [(row[0], row[1]) for row in await cursor.fetchall()]
+
+            return {
+                "totals": totals,
+                "daily": daily,
+                "top_submitters": top_submitters,
+            }
+
+    async def set_retention_days(self, guild_id: int, days: Optional[int]) -> None:
+        """URL履歴の保持日数を設定（None でデフォルトに戻す）"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                INSERT INTO server_settings (guild_id, retention_days)
+                VALUES (?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET
+                    retention_days = excluded.retention_days,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (guild_id, days))
+            await db.commit()
+            logging.info(f"Guild {guild_id}: URL履歴保持日数設定 -> {days}")
+
+    async def set_write_allocation(
+        self,
+        guild_id: int,
+        share: Optional[int],
+        concurrency: Optional[int],
+    ) -> None:
+        """書き込みの重みと同時実行数の上限を設定（None で既定値に戻す）"""
         async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(f"""
-                DELETE FROM processed_urls 
-                WHERE processed_at < datetime('now', '-{days} days')
+            await db.execute("""
+                INSERT INTO server_settings (guild_id, write_share, write_concurrency)
+                VALUES (?, ?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET
+                    write_share = excluded.write_share,
+                    write_concurrency = excluded.write_concurrency,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (guild_id, share, concurrency))
+            await db.commit()
+            logging.info(f"Guild {guild_id}: 書き込み配分設定 -> 重み {share} / 同時実行数 {concurrency}")
+
+    async def get_write_allocations(self) -> dict[int, tuple[Optional[int], Optional[int]]]:
+        """書き込み配分を個別に設定したサーバーの (重み, 同時実行数の上限) を取得"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                SELECT guild_id, write_share, write_concurrency FROM server_settings
+                WHERE write_share IS NOT NULL OR write_concurrency IS NOT NULL
             """)
+            return {row[0]: (row[1], row[2]) for row in await cursor.fetchall()}
+
+    async def get_retention_targets(self, default_days: int) -> list[tuple[int, int]]:
+        """URL履歴を持つ各サーバーの保持日数を取得（0 は無期限）"""
+        async with aiosqlite.connect(self.db_path) as db:
+            # 集計テーブルからサーバー一覧を取得（processed_urls の全走査を避ける）
+            cursor = await db.execute("""
+                SELECT DISTINCT t.guild_id, COALESCE(s.retention_days, ?)
+                FROM guild_service_totals AS t
+                LEFT JOIN server_settings AS s ON s.guild_id = t.guild_id
+            """, (default_days,))
+            return [(row[0], row[1]) for row in await cursor.fetchall() if row[1] > 0]
+
+    async def delete_expired_urls(self, guild_id: int, days: int, batch_size: int) -> int:
+        """保持期間を過ぎたURL履歴を最大 batch_size 件削除し、削除件数を返す"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                DELETE FROM processed_urls
+                WHERE id IN (
+                    SELECT id FROM processed_urls
+                    WHERE guild_id = ? AND processed_at < datetime('now', ?)
+                    LIMIT ?
+                )
+            """, (guild_id, f"-{days} days", batch_size))
+            await db.commit()
+            return cursor.rowcount
+
+    async def incremental_vacuum(self, pages: int = 0) -> None:
+        """空きページをファイルシステムに返却（0 は全ページ）"""
+        async with aiosqlite.connect(self.db_path) as db:
+            if not await self._uses_incremental_vacuum(db):
+                # 稼働中に VACUUM で変換すると書き込みが長時間止まるため、変換はBot停止中のコマンドに任せる
+                logging.warning(
+                    "データベースが incremental auto_vacuum ではないため、空き領域の返却を省略しました"
+                    "（Botを停止して `python start.py vacuum` で変換してください）",
+                )
+            else:
+                # PRAGMA はパラメータを受け付けないため整数化して埋め込む
+                # 1ステップごとに1ページ解放されるため結果を最後まで読み進める
+                cursor = await db.execute(f"PRAGMA incremental_vacuum({int(pages)})")
+                await cursor.fetchall()
+                await db.commit()
+            # WALの内容を本体に反映させてファイルを実際に縮小する
+            cursor = await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            await cursor.fetchall()
+
+    async def analyze(self) -> None:
+        """クエリプランナー用の統計情報を更新"""
+        async with aiosqlite.connect(self.db_path) as db:
+            # 大きなテーブルでも短時間で終わるようサンプリング数を制限
+            await db.execute("PRAGMA analysis_limit=1000")
+            await db.execute("ANALYZE")
+            await db.commit()
+
+    async def acquire_lease(self, name: str, holder: str, ttl: float) -> bool:
+        """リースを取得または延長（他の保持者の有効なリースがある場合は False）"""
+        now = time.time()
+        async with aiosqlite.connect(self.db_path) as db:
+            # 期限切れ、または自身が保持しているリースのみ上書きする
+            cursor = await db.execute("""
+                INSERT INTO playlist_leases (name, holder, expires_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    holder = excluded.holder,
+                    expires_at = excluded.expires_at
+                WHERE playlist_leases.holder = excluded.holder
+                   OR playlist_leases.expires_at <= ?
+            """, (name, holder, now + ttl, now))
+            await db.commit()
+            return cursor.rowcount > 0
+
+    async def release_lease(self, name: str, holder: str) -> None:
+        """保持しているリースを解放"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                DELETE FROM playlist_leases WHERE name = ? AND holder = ?
+            """, (name, holder))
+            await db.commit()
+
+    async def enqueue_pending_add(
+        self,
+        guild_id: int,
+        url: str,
+        service_type: str,
+        *,
+        submitter_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+    ) -> bool:
+        """認証待ちのURLを保留キューに追加（既に保留中なら False）"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                INSERT OR IGNORE INTO pending_adds
+                    (guild_id, url, service_type, submitter_id, message_id, channel_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (guild_id, url, service_type, submitter_id, message_id, channel_id))
+            await db.commit()
+            return cursor.rowcount > 0
+
+    async def get_pending_adds(self, service_type: str, limit: int) -> list[dict]:
+        """保留中のURLを古い順に取得"""
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            cursor = await db.execute("""
+                SELECT id, guild_id, url, service_type, submitter_id, message_id, channel_id, attempts
+                FROM pending_adds
+                WHERE service_type = ?
+                ORDER BY id
+                LIMIT ?
+            """, (service_type, limit))
+            return [dict(row) for row in await cursor.fetchall()]
+
+    async def delete_pending_add(self, pending_id: int) -> None:
+        """保留キューから削除"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("DELETE FROM pending_adds WHERE id = ?", (pending_id,))
+            await db.commit()
+
+    async def record_pending_add_failure(self, pending_id: int) -> int:
+        """保留中URLの追加失敗回数を加算し、加算後の回数を返す"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                UPDATE pending_adds SET attempts = attempts + 1 WHERE id = ?
+            """, (pending_id,))
+            await db.commit()
+            cursor = await db.execute("SELECT attempts FROM pending_adds WHERE id = ?", (pending_id,))
+            row = await cursor.fetchone()
+            return row[0] if row else 0
+
+    async def count_pending_adds(self) -> dict[str, int]:
+        """サービスごとの保留件数を取得"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                SELECT service_type, COUNT(*) FROM pending_adds GROUP BY service_type
+            """)
+            return {service_type: count for service_type, count in await cursor.fetchall()}
+
+    async def set_negative_cache(self, canonical_id: str, service_type: str, reason: str, ttl: float) -> None:
+        """追加できなかった楽曲を理由と共に ttl 秒間記録"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                INSERT INTO negative_cache (canonical_id, service_type, reason, expires_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(canonical_id) DO UPDATE SET
+                    service_type = excluded.service_type,
+                    reason = excluded.reason,
+                    failed_at = CURRENT_TIMESTAMP,
+                    expires_at = excluded.expires_at
+            """, (canonical_id, service_type, reason, time.time() + ttl))
+            await db.commit()
+
+    async def load_negative_cache(self) -> dict[str, tuple[str, float]]:
+        """有効期限内の全記録を {楽曲ID: (理由, 有効期限の UNIX 時刻)} で取得"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                SELECT canonical_id, reason, expires_at FROM negative_cache
+                WHERE expires_at > ?
+            """, (time.time(),))
+            return {row[0]: (row[1], row[2]) for row in await cursor.fetchall()}
+
+    async def list_negative_cache(self, limit: int = 20) -> list[dict]:
+        """有効期限内の記録を新しい順に取得（expires_at は UNIX 時刻）"""
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            cursor = await db.execute("""
+                SELECT canonical_id, service_type, reason, failed_at, expires_at
+                FROM negative_cache
+                WHERE expires_at > ?
+                ORDER BY failed_at DESC
+                LIMIT ?
+            """, (time.time(), limit))
+            return [dict(row) for row in await cursor.fetchall()]
+
+    async def delete_negative_cache(self, canonical_id: Optional[str] = None) -> int:
+        """記録を削除し、削除件数を返す（None で全件）"""
+        async with aiosqlite.connect(self.db_path) as db:
+            if canonical_id is None:
+                cursor = await db.execute("DELETE FROM negative_cache")
+            else:
+                cursor = await db.execute("""
+                    DELETE FROM negative_cache WHERE canonical_id = ?
+                """, (canonical_id,))
+            await db.commit()
+            return cursor.rowcount
+
+    async def delete_expired_negative_cache(self) -> int:
+        """有効期限を過ぎた記録を削除し、削除件数を返す"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                DELETE FROM negative_cache WHERE expires_at <= ?
+            """, (time.time(),))
+            await db.commit()
+            return cursor.rowcount
+
+    async def get_playlist_series(self, series_id: str) -> list[dict]:
+        """系列のプレイリストを順番通りに取得"""
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            cursor = await db.execute("""
+                SELECT position, playlist_id, item_count
+                FROM playlist_series
+                WHERE series_id = ?
+                ORDER BY position
+            """, (series_id,))
+            return [dict(row) for row in await cursor.fetchall()]
+
+    async def add_playlist_to_series(
+        self,
+        series_id: str,
+        position: int,
+        playlist_id: str,
+        item_count: int = 0,
+    ) -> bool:
+        """系列の position 番目にプレイリストを登録（他のプロセスが登録済みなら False）"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                INSERT OR IGNORE INTO playlist_series (series_id, position, playlist_id, item_count)
+                VALUES (?, ?, ?, ?)
+            """, (series_id, position, playlist_id, item_count))
+            await db.commit()
+            return cursor.rowcount > 0
+
+    async def add_playlist_item_count(self, series_id: str, playlist_id: str, count: int) -> int:
+        """系列のプレイリストの動画数を加算し、加算後の値を返す"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                UPDATE playlist_series SET item_count = item_count + ?
+                WHERE series_id = ? AND playlist_id = ?
+            """, (count, series_id, playlist_id))
+            cursor = await db.execute("""
+                SELECT item_count FROM playlist_series
+                WHERE series_id = ? AND playlist_id = ?
+            """, (series_id, playlist_id))
+            row = await cursor.fetchone()
+            await db.commit()
+            return row[0] if row else 0
+
+    async def set_playlist_item_count(self, series_id: str, playlist_id: str, count: int) -> None:
+        """系列のプレイリストの動画数を実際の値に合わせる"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                UPDATE playlist_series SET item_count = ?
+                WHERE series_id = ? AND playlist_id = ?
+            """, (count, series_id, playlist_id))
             await db.commit()
-            logging.info(f"{days}日以前の古いURL履歴をクリーンアップしました")
@@ -0,0 +1,126 @@
+"""ドライラン（シャドーモード）の記録モジュール
+
+DRY_RUN を有効にすると、URL抽出・重複チェック・スケジューリングなどの処理はそのまま行い、
+最後のプレイリストへの書き込みだけを記録のみの空操作に置き換える。本番のGatewayのトラフィックで
+新しいビルドの処理能力を、クォータを消費せずプレイリストも変更せずに計測するために使う。
+書き込みを省略した件数と、URLごとの処理時間・スループットを集計する。
+省略した書き込みの楽曲は記録しておき、プレイリストの重複チェックでは追加済みとして扱う。
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from typing import Optional
+
+from metrics import BotMetrics, percentile
+
+# 直近のスループットを計算する期間（秒）
+RECENT_WINDOW = 60.0
+
+
+class DryRunRecorder:
+    """ドライランで省略した書き込みと処理時間の記録クラス"""
+
+    def __init__(
+        self,
+        write_latency: float = 0.0,
+        metrics: Optional[BotMetrics] = None,
+        window: int = 10000,
+    ) -> None:
+        """記録を初期化
+
+        write_latency は省略した書き込み1回あたりに待機する秒数で、実際のAPIの応答時間を指定すると
+        実行枠の占有時間も本番に近づく（0 で待機しない）。
+        """
+        self.write_latency = write_latency
+        self.metrics = metrics
+        self.started = time.monotonic()
+        # 直近に処理したURLごとの処理完了時刻と処理時間
+        self.samples: deque[tuple[float, float]] = deque(maxlen=window)
+        self.urls: Counter[str] = Counter()
+        self.writes: Counter[str] = Counter()
+        # 書き込みを省略したサービス名と動画ID・トラックIDの組
+        self._written: set[tuple[str, str]] = set()
+        self.notifications = 0
+        # 処理元ごとの直近の一括処理のURL数と所要秒数
+        self.batches: dict[str, tuple[int, float]] = {}
+
+    async def write(self, service_type: str, item_ids: list[str]) -> None:
+        """プレイリストへの書き込みを省略して記録"""
+        count = len(item_ids)
+        self.writes[service_type] += count
+        self._written.update((service_type, item_id) for item_id in item_ids)
+        if self.metrics:
+            self.metrics.increment("dry_run_writes_total", count, service=service_type)
+        logging.debug(f"[ドライラン] {service_type} への書き込みを省略しました（{count}件）")
+        if self.write_latency > 0:
+            await asyncio.sleep(self.write_latency)
+
+    def was_written(self, service_type: str, item_id: str) -> bool:
+        """書き込みを省略した楽曲か（重複チェックでは追加済みとして扱う）"""
+        return (service_type, item_id) in self._written
+
+    def written_ids(self, service_type: str) -> set[str]:
+        """書き込みを省略した楽曲のIDを取得"""
+        return {item_id for service, item_id in self._written if service == service_type}
+
+    def suppress_notification(self, guild_id: int, message: str) -> None:
+        """通知の送信を省略して記録"""
+        self.notifications += 1
+        if self.metrics:
+            self.metrics.increment("dry_run_notifications_suppressed_total")
+        logging.info(f"[ドライラン] Guild {guild_id} への通知を省略しました: {message}")
+
+    def record_url(self, source: str, seconds: float) -> None:
+        """1件のURLの処理時間を記録"""
+        self.urls[source] += 1
+        self.samples.append((time.monotonic(), seconds))
+        if self.metrics:
+            self.metrics.increment("dry_run_urls_total", source=source)
+            self.metrics.increment("dry_run_url_seconds_total", seconds, source=source)
+
+    def record_batch(self, source: str, urls: int, seconds: float) -> None:
+        """一括処理（過去ログなど）のURL数と所要時間を記録"""
+        self.urls[source] += urls
+        self.batches[source] = (urls, seconds)
+        if self.metrics:
+            self.metrics.increment("dry_run_urls_total", urls, source=source)
+            self.metrics.increment("dry_run_url_seconds_total", seconds, source=source)
+
+    def summary(self) -> dict:
+        """開始からの集計を取得（スループットは URL/秒、処理時間は秒）"""
+        now = time.monotonic()
+        elapsed = now - self.started
+        latencies = [seconds for _, seconds in self.samples]
+        recent = sum(1 for finished, _ in self.samples if now - finished <= RECENT_WINDOW)
+        return {
+            "elapsed_seconds": elapsed,
+            "urls": dict(self.urls),
+            "throughput_per_second": sum(self.urls.values()) / elapsed if elapsed > 0 else 0.0,
+            "recent_throughput_per_second": recent / min(elapsed, RECENT_WINDOW) if elapsed > 0 else 0.0,
+            "latency_seconds": {
+                "p50": percentile(latencies, 50),
+                "p99": percentile(latencies, 99),
+                "max": max(latencies, default=None),
+            },
+            "batches": {
+                source: {"urls": urls, "seconds": seconds, "throughput_per_second": urls / seconds if seconds else 0.0}
+                for source, (urls, seconds) in self.batches.items()
+            },
+            "writes_skipped": dict(self.writes),
+            "notifications_suppressed": self.notifications,
+        }
+
+    def log_summary(self) -> None:
+        """集計をログに出力"""
+        summary = self.summary()
+        latency = summary["latency_seconds"]
+        latency_text = " / ".join(
+            f"{key} {value * 1000:.0f}ms" for key, value in latency.items() if value is not None
+        ) or "記録なし"
+        logging.info(
+            f"[ドライラン] {summary['elapsed_seconds']:.0f}秒間で URL {sum(summary['urls'].values())}件"
+            f"（{summary['throughput_per_second']:.2f}件/秒）、投稿の処理時間 {latency_text}、"
+            f"省略した書き込み {summary['writes_skipped']}、省略した通知 {summary['notifications_suppressed']}件",
+        )
@@ -0,0 +1,86 @@
+"""サーバー単位の重み付き公平キューモジュール
+
+要求にサーバー（guild_id）ごとの仮想開始時刻のタグを付け（開始時刻公平キューイング）、
+タグの小さい順に取り出す。1つのサーバーが大量の要求を投入しても、他のサーバーの要求は
+重みに応じた割合で間に挟まって処理される。
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+# 終了タグの表がこの件数を超えたら、仮想時刻より前に終わったサーバーを削除する
+PRUNE_THRESHOLD = 1024
+
+
+class FairTagger:
+    """サーバーごとの仮想開始時刻を割り当てるクラス"""
+
+    def __init__(self, weight: Callable[[int], float]) -> None:
+        """weight はサーバーIDから重み（大きいほど多く処理される）を返す関数"""
+        self.weight = weight
+        self.virtual_time = 0.0
+        self._finish: dict[int, float] = {}
+        self._prune_at = PRUNE_THRESHOLD
+
+    def tag(self, key: int) -> float:
+        """要求の開始タグを割り当てる"""
+        start = max(self.virtual_time, self._finish.get(key, 0.0))
+        self._finish[key] = start + 1.0 / max(self.weight(key), 1e-9)
+        return start
+
+    def advance(self, start: float) -> None:
+        """取り出した要求の開始タグまで仮想時刻を進める"""
+        if start <= self.virtual_time:
+            return
+        self.virtual_time = start
+        if len(self._finish) > self._prune_at:
+            # 仮想時刻より前に終わったサーバーは新規のサーバーと同じ扱いになるため削除する
+            self._finish = {key: finish for key, finish in self._finish.items() if finish > start}
+            self._prune_at = max(PRUNE_THRESHOLD, len(self._finish) * 2)
+
+
+class FairQueue(Generic[T]):
+    """サーバーごとの重みに応じて公平に取り出す非同期キュー"""
+
+    def __init__(self, weight: Callable[[int], float] = lambda key: 1.0) -> None:
+        """キューを初期化"""
+        self._tagger = FairTagger(weight)
+        self._heap: list[tuple[float, int, int, float, T]] = []
+        self._counter = itertools.count()
+        self._not_empty = asyncio.Event()
+
+    def qsize(self) -> int:
+        """キュー内の要求数"""
+        return len(self._heap)
+
+    def empty(self) -> bool:
+        """キューが空か"""
+        return not self._heap
+
+    def put_nowait(self, key: int, item: T) -> None:
+        """サーバー key の要求を追加"""
+        start = self._tagger.tag(key)
+        heapq.heappush(self._heap, (start, next(self._counter), key, time.monotonic(), item))
+        self._not_empty.set()
+
+    def get_nowait(self) -> tuple[int, T, float]:
+        """次の要求を (サーバーID, 要求, 追加時刻) で取り出す（空の場合は asyncio.QueueEmpty）"""
+        if not self._heap:
+            raise asyncio.QueueEmpty
+        start, _, key, enqueued_at, item = heapq.heappop(self._heap)
+        self._tagger.advance(start)
+        if not self._heap:
+            self._not_empty.clear()
+        return key, item, enqueued_at
+
+    async def get(self) -> tuple[int, T, float]:
+        """次の要求を取り出す（空の場合は追加されるまで待機）"""
+        while not self._heap:
+            await self._not_empty.wait()
+        return self.get_nowait()
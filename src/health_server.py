@@ -0,0 +1,68 @@
+"""死活監視・準備完了確認エンドポイントモジュール
+
+ローカルの aiohttp サーバーで、オーケストレーター（systemd・Docker・Kubernetes など）向けに
+/healthz（プロセスとイベントループが応答しているか）と /readyz（Gateway・データベース・音楽サービスの状態）を返す。
+/readyz は新しい追加を受け付けられない場合（起動中・終了処理中・データベース障害など）に 503 を返す。
+"""
+
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Optional
+
+from aiohttp import web
+
+
+class HealthServer:
+    """死活監視・準備完了確認用のHTTPサーバー"""
+
+    def __init__(
+        self,
+        readiness: Callable[[], Awaitable[dict]],
+        liveness: Optional[Callable[[], dict]] = None,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+    ) -> None:
+        """サーバーを初期化
+
+        readiness は "ready"（bool）と各項目の状態を含む辞書を返すコルーチン関数、
+        liveness は /healthz の応答に含める情報を返す関数。
+        """
+        self.readiness = readiness
+        self.liveness = liveness
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> None:
+        """待ち受けを開始"""
+        if self._runner:
+            return
+        app = web.Application()
+        app.router.add_get("/healthz", self._handle_liveness)
+        app.router.add_get("/readyz", self._handle_readiness)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logging.info(f"ヘルスチェックを待ち受けています: http://{self.host}:{self.port}/readyz")
+
+    async def stop(self) -> None:
+        """待ち受けを停止"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_liveness(self, request: web.Request) -> web.Response:
+        """プロセスが応答していれば 200 を返す（終了処理中も含む）"""
+        body = {"status": "ok"}
+        if self.liveness:
+            body.update(self.liveness())
+        return web.json_response(body)
+
+    async def _handle_readiness(self, request: web.Request) -> web.Response:
+        """新しい追加を受け付けられる場合は 200、それ以外は 503 を返す"""
+        try:
+            report = await self.readiness()
+        except Exception as e:
+            logging.exception(f"準備完了の確認中にエラーが発生: {e}")
+            return web.json_response({"ready": False, "error": str(e)}, status=503)
+        return web.json_response(report, status=200 if report.get("ready") else 503)
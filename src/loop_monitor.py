@@ -0,0 +1,144 @@
+"""イベントループ監視モジュール
+
+イベントループの遅延を継続的に計測し、長時間ブロックしたコールバックを検出する
+"""
+
+import asyncio
+import inspect
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from types import FrameType
+
+from metrics import BotMetrics, percentile
+
+
+class EventLoopMonitor:
+    """イベントループ遅延の監視クラス"""
+
+    def __init__(
+        self,
+        metrics: BotMetrics,
+        interval: float = 0.5,
+        slow_threshold: float = 0.25,
+        window: int = 1200,
+    ) -> None:
+        """監視クラスを初期化"""
+        self.metrics = metrics
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.samples: deque[float] = deque(maxlen=window)
+
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._heartbeat = time.monotonic()
+
+    def start(self) -> None:
+        """監視タスクとウォッチドッグスレッドを開始"""
+        if self._task:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop_event.clear()
+
+        self._task = self._loop.create_task(self._measure_lag(), name="event-loop-monitor")
+        self._watchdog = threading.Thread(
+            target=self._watch_for_stalls,
+            name="event-loop-watchdog",
+            daemon=True,
+        )
+        self._watchdog.start()
+        logging.info(
+            f"イベントループ監視を開始しました（間隔: {self.interval}秒, "
+            f"閾値: {self.slow_threshold}秒）",
+        )
+
+    async def stop(self) -> None:
+        """監視を停止"""
+        self._stop_event.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog:
+            self._watchdog.join(timeout=self.interval + self.slow_threshold)
+            self._watchdog = None
+
+    def lag_percentiles(self) -> dict[str, float | None]:
+        """遅延のp50/p99/最大値（秒）を取得"""
+        samples = list(self.samples)
+        return {
+            "p50": percentile(samples, 50),
+            "p99": percentile(samples, 99),
+            "max": max(samples) if samples else None,
+        }
+
+    async def _measure_lag(self) -> None:
+        """一定間隔でスリープし、予定時刻からの遅れを遅延として記録"""
+        while True:
+            started = self._loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, self._loop.time() - started - self.interval)
+
+            self._heartbeat = time.monotonic()
+            self.samples.append(lag)
+            self._publish()
+
+    def _publish(self) -> None:
+        """遅延統計をメトリクスに反映"""
+        stats = self.lag_percentiles()
+        for name, value in stats.items():
+            if value is not None:
+                self.metrics.set_gauge(f"event_loop_lag_{name}_seconds", value)
+
+    def _watch_for_stalls(self) -> None:
+        """ハートビートの途絶を検出してループスレッドのスタックを記録"""
+        stall_reported = False
+        check_interval = max(self.slow_threshold / 2, 0.01)
+
+        while not self._stop_event.wait(check_interval):
+            blocked_for = time.monotonic() - self._heartbeat - self.interval
+            if blocked_for < self.slow_threshold:
+                stall_reported = False
+                continue
+
+            # 同じ停止は一度だけ報告する
+            if stall_reported:
+                continue
+            stall_reported = True
+
+            self.metrics.increment("event_loop_stalls_total")
+            self._report_stall(blocked_for)
+
+    def _report_stall(self, blocked_for: float) -> None:
+        """ブロック中のコルーチンとスタックをログ出力"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+
+        coroutine = self._find_coroutine_name(frame)
+        stack = "".join(traceback.format_stack(frame))
+        logging.warning(
+            f"イベントループが{blocked_for:.3f}秒以上ブロックされています"
+            f"（コルーチン: {coroutine}）\n{stack}",
+        )
+
+    @staticmethod
+    def _find_coroutine_name(frame: FrameType | None) -> str:
+        """スタックを遡ってブロック中のコルーチン名を特定"""
+        while frame is not None:
+            if frame.f_code.co_flags & inspect.CO_COROUTINE:
+                return f"{frame.f_code.co_qualname} ({frame.f_code.co_filename}:{frame.f_lineno})"
+            frame = frame.f_back
+        return "不明（コルーチン外のコールバック）"
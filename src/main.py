@@ -3,42 +3,191 @@ YouTubeとSoundCloudのリンクを自動でプレイリストに追加するBot
 """
 
 import asyncio
+import hashlib
+import json
 import logging
+import math
 import os
+import signal
+import time
 from pathlib import Path
 
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 
+from adaptive_limit import AdaptiveLimit
 from config import BotConfig
-from database import DatabaseManager
+from dry_run import DryRunRecorder
+from file_utils import write_text_atomic
+from health_server import HealthServer
+from loop_monitor import EventLoopMonitor
+from maintenance import DatabaseMaintenance
+from metrics import BotMetrics
 from music_services import YouTubeService
-from soundcloud_service import SoundCloudService
+from negative_cache import NegativeCache
+from pending_adds import PendingAddQueue
+from playlist_import import ImportResult, YouTubePlaylistImporter
+from playlist_lock import PlaylistLock
+from playlist_series import PlaylistSeries
+from playlist_writer import PlaylistWriter
+from priority_scheduler import BULK, INTERACTIVE, PriorityScheduler
+from processed_url_writer import ProcessedUrlWriter
+from shutdown_drain import ShutdownDrain
+from storage import create_storage
 from url_extractor import URLExtractor
 
+# 起動時間計測の基準（このモジュールの読み込み時点）
+_PROCESS_STARTED = time.perf_counter()
 
-class MusicPlaylistBot(commands.Bot):
+# 通知に表示するサービス名
+SERVICE_NAMES = {"youtube": "YouTube", "soundcloud": "SoundCloud"}
+
+# 準備完了の確認でデータベースの応答を待つ最大秒数
+DB_PING_TIMEOUT = 2.0
+
+
+class MusicPlaylistBot(commands.AutoShardedBot):
     """音楽プレイリスト収集Bot"""
 
     def __init__(self) -> None:
-        intents = discord.Intents.default()
-        intents.message_content = True
-        intents.guilds = True
+        config = BotConfig()
+
+        if config.lean_mode:
+            # 機能に必要なインテントのみ（サーバー・チャンネル情報とサーバー内メッセージ本文）
+            intents = discord.Intents.none()
+            intents.guilds = True
+            intents.guild_messages = True
+            intents.message_content = True
+            cache_options = {
+                "member_cache_flags": discord.MemberCacheFlags.none(),
+                "chunk_guilds_at_startup": False,
+            }
+        else:
+            intents = discord.Intents.default()
+            intents.message_content = True
+            intents.guilds = True
+            cache_options = {}
 
+        # SHARD_IDS を指定すると一部のシャードだけをこのプロセスで担当する
         super().__init__(
             command_prefix="!",  # スラッシュコマンド使用のため、プレフィックスは使用しない
             intents=intents,
             help_command=None,
+            shard_count=config.shard_count,
+            shard_ids=config.shard_ids,
+            max_messages=config.max_messages,
+            **cache_options,
         )
 
-        self.config = BotConfig()
-        self.db_manager = DatabaseManager()
-        self.youtube_service = YouTubeService()
+        self.config = config
+        # 起動から最初の on_ready までの秒数
+        self.startup_seconds: float | None = None
+        # 監視対象チャンネルID（メッセージ受信時にDBを参照せず判定するためのキャッシュ）
+        self.monitored_channel_ids: frozenset[int] = frozenset()
+        # シャードごとの処理中URL数
+        self.in_flight_by_shard: dict[int, int] = {}
+        self.metrics = BotMetrics()
+        # ドライランではプレイリストへの書き込みと通知を省略し、処理時間とスループットを記録する
+        self.dry_run = (
+            DryRunRecorder(write_latency=self.config.dry_run_write_latency, metrics=self.metrics)
+            if self.config.dry_run
+            else None
+        )
+        self.db_manager = create_storage(self.config)
+        self.maintenance = DatabaseMaintenance(
+            self.db_manager,
+            interval=self.config.maintenance_interval_hours * 60 * 60,
+            default_retention_days=self.config.url_retention_days,
+            batch_size=self.config.maintenance_batch_size,
+        )
+        # 処理済みURLは行ごとにコミットせず、一定件数・一定時間ごとにまとめて書き込む
+        self.url_writer = ProcessedUrlWriter(
+            self.db_manager,
+            max_rows=self.config.db_write_batch_size,
+            max_delay=self.config.db_write_batch_delay,
+            metrics=self.metrics,
+        )
+        # 削除済み・非公開などで追加できなかった楽曲は再投稿されてもAPIを呼ばずにスキップする
+        self.negative_cache = NegativeCache(
+            self.db_manager,
+            ttl=self.config.negative_cache_ttl_hours * 60 * 60,
+            metrics=self.metrics,
+        )
+        # 複数プロセスが同じプレイリストへ書き込む際の重複チェックと追加を直列化
+        self.playlist_lock = PlaylistLock(
+            self.db_manager,
+            ttl=self.config.playlist_lock_ttl,
+            timeout=self.config.playlist_lock_timeout,
+        )
+        # 投稿されたURLの追加を過去ログ・プレイリスト取り込みなどの一括処理より優先する
+        self.scheduler = PriorityScheduler(
+            concurrency=self.config.service_concurrency,
+            reserved_interactive=self.config.interactive_reserved_slots,
+            aging=self.config.priority_aging,
+            guild_concurrency=self.config.guild_write_concurrency,
+            metrics=self.metrics,
+        )
+        # サービスごとの同時実行数を応答時間とレート制限に応じて調整する
+        self.service_limits: dict[str, AdaptiveLimit] = {}
+        if self.config.adaptive_concurrency:
+            for service_type in ("youtube", "soundcloud"):
+                limit = AdaptiveLimit(
+                    service_type,
+                    initial=self.config.service_concurrency,
+                    maximum=self.config.service_concurrency_max,
+                    latency_tolerance=self.config.adaptive_latency_tolerance,
+                    metrics=self.metrics,
+                )
+                self.scheduler.set_limit(service_type, limit)
+                self.service_limits[service_type] = limit
+        # 収集用プレイリストが上限に近づいたら系列の次のプレイリストへ追加先を切り替える
+        self.playlist_series = None
+        if self.config.youtube_playlist_id and self.config.youtube_playlist_max_items > 0:
+            self.playlist_series = PlaylistSeries(
+                self.db_manager,
+                self.config.youtube_playlist_id,
+                successors=self.config.youtube_playlist_successors,
+                max_items=self.config.youtube_playlist_max_items,
+                metrics=self.metrics,
+            )
+        self.youtube_service = YouTubeService(
+            playlist_lock=self.playlist_lock,
+            limiter=self.service_limits.get("youtube"),
+            negative_cache=self.negative_cache,
+            playlist_series=self.playlist_series,
+            dry_run=self.dry_run,
+        )
+        # プレイリスト取り込みなど大量の追加はレート制限付きのワーカープールから送信する
+        self.youtube_writer = PlaylistWriter(
+            "youtube",
+            self.youtube_service.insert_video,
+            workers=self.config.playlist_write_workers,
+            rate=self.config.playlist_write_rate,
+            metrics=self.metrics,
+            write_batch=self.youtube_service.insert_videos,
+            batch_size=self.config.playlist_write_batch_size,
+            scheduler=self.scheduler,
+        )
+        self.playlist_importer = YouTubePlaylistImporter(
+            self.youtube_service,
+            self.youtube_writer,
+            self.db_manager,
+            max_items=self.config.playlist_import_max_items,
+            url_writer=self.url_writer,
+            negative_cache=self.negative_cache,
+        )
 
         # SoundCloudサービスは設定がある場合のみ初期化
         if self.config.is_soundcloud_available:
-            self.soundcloud_service = SoundCloudService()
+            from soundcloud_service import SoundCloudService
+
+            self.soundcloud_service = SoundCloudService(
+                playlist_lock=self.playlist_lock,
+                limiter=self.service_limits.get("soundcloud"),
+                negative_cache=self.negative_cache,
+                dry_run=self.dry_run,
+            )
             logging.info("SoundCloud設定を検出しました")
         else:
             self.soundcloud_service = None
@@ -46,19 +195,120 @@ class MusicPlaylistBot(commands.Bot):
 
         self.url_extractor = URLExtractor()
 
+        # 認証待ちのサービス宛てのURLを保留し、トークンが用意されたら追加する
+        self.pending_adds = PendingAddQueue(
+            self.db_manager,
+            {"youtube": self.youtube_service, "soundcloud": self.soundcloud_service},
+            self._process_pending_add,
+            interval=self.config.auth_retry_interval,
+            max_attempts=self.config.pending_add_max_attempts,
+            playlist_lock=self.playlist_lock,
+        )
+
+        # 終了時は処理中の追加を期限まで待ち、残りと新しく受け付けたURLを保留キューへ引き継ぐ
+        self.shutdown_drain = ShutdownDrain(
+            self._hand_off_url,
+            timeout=self.config.shutdown_drain_timeout,
+            metrics=self.metrics,
+        )
+        self._closing: asyncio.Task | None = None
+        # 死活監視・準備完了確認エンドポイントは設定で有効な場合のみ
+        self.health_server = (
+            HealthServer(
+                self.health_report,
+                liveness=self.liveness_report,
+                host=self.config.health_host,
+                port=self.config.health_port,
+            )
+            if self.config.health_port > 0
+            else None
+        )
+
+        # イベントループ監視は設定で有効な場合のみ
+        if self.config.loop_monitor_enabled:
+            self.loop_monitor = EventLoopMonitor(
+                self.metrics,
+                interval=self.config.loop_monitor_interval,
+                slow_threshold=self.config.loop_slow_callback_threshold,
+            )
+        else:
+            self.loop_monitor = None
+
     async def setup_hook(self) -> None:
         """Bot起動時の初期設定"""
+        # 起動処理中のブロッキングも検出できるよう最初に開始する
+        if self.loop_monitor:
+            self.loop_monitor.start()
+        # 起動中も死活監視に応答する（準備完了は on_ready 後）
+        if self.health_server:
+            try:
+                await self.health_server.start()
+            except OSError as e:
+                logging.exception(f"ヘルスチェックの待ち受けを開始できませんでした: {e}")
+
+        # データベースと各音楽サービスは互いに依存しないため並行して初期化する
+        phase_started = time.perf_counter()
+        await asyncio.gather(self._initialize_storage(), self._initialize_services())
+        phase_started = self._log_startup_phase("データベース・音楽サービス初期化", phase_started)
+        # 認証待ちのサービスがあっても起動は止めず、保留キューで後から追加する
+        self.pending_adds.start()
+        self.youtube_writer.start()
+        self.url_writer.start()
+
+        await self._sync_commands_if_changed()
+        self._log_startup_phase("スラッシュコマンド同期", phase_started)
+
+    async def _initialize_storage(self) -> None:
+        """データベースを初期化し、定期メンテナンスを開始"""
         await self.db_manager.initialize()
-        await self.youtube_service.initialize()
+        await self.refresh_monitored_channels()
+        await self.refresh_write_allocations()
+        self.maintenance.start()
 
+    async def _initialize_services(self) -> None:
+        """音楽サービスを初期化"""
+        initializers = [self.youtube_service.initialize()]
         # SoundCloudサービスがある場合のみ初期化
         if self.soundcloud_service:
-            await self.soundcloud_service.initialize()
+            initializers.append(self.soundcloud_service.initialize())
+        await asyncio.gather(*initializers)
+
+    def _log_startup_phase(self, name: str, started: float) -> float:
+        """起動処理の各段階の所要時間を記録し、次の段階の開始時刻を返す"""
+        now = time.perf_counter()
+        logging.info(f"起動処理: {name} {now - started:.2f}秒")
+        return now
+
+    def _command_tree_hash(self) -> str:
+        """スラッシュコマンド定義のハッシュ値を計算"""
+        definitions = sorted(
+            (command.to_dict(self.tree) for command in self.tree.get_commands()),
+            key=lambda definition: definition["name"],
+        )
+        payload = json.dumps(
+            {"application_id": self.application_id, "commands": definitions},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def _sync_commands_if_changed(self) -> None:
+        """スラッシュコマンド定義が前回の同期から変わった場合のみ同期"""
+        # 同期は遅くレート制限の対象となるため、毎回の起動では行わない
+        state_file = self.config.command_sync_state_file
+        command_hash = self._command_tree_hash()
+        if (
+            not self.config.force_command_sync
+            and state_file.exists()
+            and state_file.read_text(encoding="utf-8").strip() == command_hash
+        ):
+            logging.info("スラッシュコマンドに変更がないため同期をスキップしました")
+            return
 
-        # スラッシュコマンドを同期
         try:
             synced = await self.tree.sync()
             logging.info(f"同期されたスラッシュコマンド: {len(synced)}個")
+            write_text_atomic(state_file, command_hash)
         except Exception as e:
             logging.exception(f"スラッシュコマンドの同期に失敗: {e}")
 
@@ -70,35 +320,188 @@ class MusicPlaylistBot(commands.Bot):
         if self.soundcloud_service:
             services.append("SoundCloud")
         logging.info(f"音楽リンク収集Botが起動しました（対応サービス: {', '.join(services)}）")
+        degraded = [name for service_type, name in SERVICE_NAMES.items() if self.pending_adds.is_degraded(service_type)]
+        if degraded:
+            logging.warning(f"認証待ちのサービス: {', '.join(degraded)}（認証が済むまで追加は保留されます）")
+        logging.info(f"担当シャード: {sorted(self.shards)} / 全{self.shard_count}シャード")
+        if self.dry_run:
+            logging.warning("ドライランモードで動作中です（プレイリストへの書き込みと通知の送信は行いません）")
+
+        # 再接続時にも呼ばれるため、起動時間は最初の1回のみ記録
+        if self.startup_seconds is None:
+            self.startup_seconds = time.perf_counter() - _PROCESS_STARTED
+            self.metrics.set_gauge("startup_seconds", self.startup_seconds)
+            logging.info(f"起動完了までの所要時間: {self.startup_seconds:.2f}秒")
+
+    async def on_shard_ready(self, shard_id: int) -> None:
+        """シャード接続完了時の処理"""
+        logging.info(f"シャード {shard_id} の準備が完了しました")
+
+    async def on_shard_disconnect(self, shard_id: int) -> None:
+        """シャード切断時の処理"""
+        self.metrics.increment("shard_disconnects_total", shard=shard_id)
+        logging.warning(f"シャード {shard_id} が切断されました")
+
+    async def on_shard_resumed(self, shard_id: int) -> None:
+        """シャード再開時の処理"""
+        logging.info(f"シャード {shard_id} のセッションを再開しました")
+
+    def shard_stats(self) -> list[dict]:
+        """担当シャードごとのGateway遅延・処理状況を取得"""
+        stats = []
+        for shard_id, latency in self.latencies:
+            self.metrics.set_gauge("shard_latency_seconds", latency, shard=shard_id)
+            stats.append({
+                "shard_id": shard_id,
+                "latency": latency,
+                "in_flight": self.in_flight_by_shard.get(shard_id, 0),
+                "messages": int(self.metrics.get_counter("gateway_messages_total", shard=shard_id)),
+                "urls": int(self.metrics.get_counter("urls_processed_total", shard=shard_id)),
+            })
+        return stats
+
+    def liveness_report(self) -> dict:
+        """死活監視の応答に含める情報"""
+        report = {"draining": self.shutdown_drain.draining, "in_flight": self.shutdown_drain.in_flight}
+        if self.loop_monitor:
+            report["loop_lag_p99_seconds"] = self.loop_monitor.lag_percentiles()["p99"]
+        return report
+
+    async def health_report(self) -> dict:
+        """Gateway・データベース・音楽サービスの状態と、新しい追加を受け付けられるか"""
+        shards = {
+            str(shard_id): {
+                "connected": not shard.is_closed(),
+                "latency_seconds": shard.latency if math.isfinite(shard.latency) else None,
+            }
+            for shard_id, shard in self.shards.items()
+        }
+        gateway = {"ready": self.is_ready() and not self.is_closed(), "shards": shards}
+
+        database = {"ok": True}
+        try:
+            await asyncio.wait_for(self.db_manager.ping(), DB_PING_TIMEOUT)
+        except Exception as e:
+            database = {"ok": False, "error": str(e) or type(e).__name__}
+
+        # 認証待ちのサービス宛ての追加は保留キューで受け付けるため、準備完了の条件には含めない
+        services = {}
+        for service_type, service in (("youtube", self.youtube_service), ("soundcloud", self.soundcloud_service)):
+            if service is None:
+                services[service_type] = {"configured": False}
+            else:
+                services[service_type] = {"configured": True, "available": service.is_available}
+
+        return {
+            "ready": gateway["ready"] and database["ok"] and not self.shutdown_drain.draining,
+            "draining": self.shutdown_drain.draining,
+            "gateway": gateway,
+            "database": database,
+            "services": services,
+            "in_flight": self.shutdown_drain.in_flight,
+        }
+
+    async def refresh_monitored_channels(self) -> None:
+        """監視対象チャンネルIDのキャッシュをDBから再読み込み"""
+        self.monitored_channel_ids = frozenset(await self.db_manager.get_monitored_channel_ids())
+        logging.info(f"監視対象チャンネル: {len(self.monitored_channel_ids)}件")
+
+    async def refresh_write_allocations(self) -> None:
+        """サーバーごとの書き込み配分（重み・同時実行数の上限）をスケジューラーに読み込む"""
+        for guild_id, (share, concurrency) in (await self.db_manager.get_write_allocations()).items():
+            self.scheduler.set_guild_allocation(guild_id, share, concurrency)
 
     async def on_message(self, message: discord.Message) -> None:
         """メッセージ受信時の処理"""
+        received = time.monotonic()
+        # 無関係なメッセージはDB参照や正規表現の前に安価な判定から順に除外する
         # Bot自身またはその他のBotのメッセージは無視
         if message.author.bot:
+            self.metrics.increment("prefilter_rejected_total", stage="bot")
+            return
+
+        # DMなどサーバー外のメッセージは対象外
+        if message.guild is None:
+            self.metrics.increment("prefilter_rejected_total", stage="dm")
             return
 
+        shard_id = message.guild.shard_id
+        self.metrics.increment("gateway_messages_total", shard=shard_id)
+
         # 監視対象チャンネルかチェック
-        monitored_channel_id = await self.db_manager.get_monitored_channel(message.guild.id)
-        if not monitored_channel_id or message.channel.id != monitored_channel_id:
+        if message.channel.id not in self.monitored_channel_ids:
+            self.metrics.increment("prefilter_rejected_total", stage="channel")
+            return
+
+        # 対応サービスのホスト名を含まなければ正規表現を実行しない
+        if not self.url_extractor.may_contain_music_url(message.content):
+            self.metrics.increment("prefilter_rejected_total", stage="host")
             return
 
         # URLを抽出
         urls = self.url_extractor.extract_urls(message.content)
         if not urls:
+            self.metrics.increment("prefilter_rejected_total", stage="no_url")
             return
+        self.metrics.increment("prefilter_passed_total")
 
         # 各URLを処理
         for url in urls:
-            await self._process_music_url(url, message)
+            # 終了処理中は追加を始めず、次のプロセスへ引き継ぐ
+            if self.shutdown_drain.draining:
+                await self.shutdown_drain.hand_off(url, message, "draining")
+                continue
+            self._update_in_flight(shard_id, 1)
+            try:
+                with self.shutdown_drain.track(url, message):
+                    await self._process_music_url(url, message)
+            finally:
+                self._update_in_flight(shard_id, -1)
+            self.metrics.increment("urls_processed_total", shard=shard_id)
+            if self.dry_run:
+                # 受信からこのURLの処理完了まで（同じメッセージ内の先行URLの処理時間も含む）
+                self.dry_run.record_url("message", time.monotonic() - received)
+
+    def _update_in_flight(self, shard_id: int, delta: int) -> None:
+        """シャードごとの処理中URL数を更新"""
+        count = self.in_flight_by_shard.get(shard_id, 0) + delta
+        self.in_flight_by_shard[shard_id] = count
+        self.metrics.set_gauge("urls_in_flight", count, shard=shard_id)
 
     async def _process_music_url(self, url: str, message: discord.Message) -> None:
         """音楽URLの処理"""
         try:
             service_type = self.url_extractor.identify_service(url)
 
-            if service_type == "youtube":
-                success = await self.youtube_service.add_to_playlist(url)
+            # 以前に追加できなかった楽曲は重複チェックや追加を行わない
+            reason = await self.unavailable_reason(url)
+            if reason:
+                await self._send_notification(
+                    message.guild.id,
+                    f"⛔ 以前に追加できなかったためスキップしました（{reason}）: {url}",
+                )
+                return
+
+            # 認証待ちのサービスは起動を止めずに保留し、認証後に追加する
+            if self.pending_adds.is_degraded(service_type):
+                await self._defer_until_authenticated(url, service_type, message)
+                return
+
+            # プレイリストURLは含まれる動画をまとめて取り込む
+            playlist_id = self.url_extractor.extract_youtube_playlist_id(url)
+            if playlist_id:
+                await self.import_youtube_playlist(
+                    playlist_id,
+                    message.guild.id,
+                    submitter_id=message.author.id,
+                    message_id=message.id,
+                    channel_id=message.channel.id,
+                )
+
+            elif service_type == "youtube":
+                success = await self.add_to_playlist(service_type, url, guild_id=message.guild.id)
                 if success:
+                    await self.record_processed_url(url, service_type, message)
                     await self._send_notification(
                         message.guild.id,
                         f"✅ YouTubeプレイリストに追加しました: {url}",
@@ -111,8 +514,9 @@ class MusicPlaylistBot(commands.Bot):
 
             elif service_type == "soundcloud":
                 if self.soundcloud_service:
-                    success = await self.soundcloud_service.add_to_playlist(url)
+                    success = await self.add_to_playlist(service_type, url, guild_id=message.guild.id)
                     if success:
+                        await self.record_processed_url(url, service_type, message)
                         await self._send_notification(
                             message.guild.id,
                             f"✅ SoundCloudプレイリストに追加しました: {url}",
@@ -131,11 +535,197 @@ class MusicPlaylistBot(commands.Bot):
                 f"❌ URL処理中にエラーが発生しました: {url}",
             )
 
+    async def _defer_until_authenticated(
+        self,
+        url: str,
+        service_type: str,
+        message: discord.Message,
+    ) -> None:
+        """認証待ちのサービス宛てのURLを保留キューに追加"""
+        queued = await self.pending_adds.enqueue(
+            message.guild.id,
+            url,
+            service_type,
+            submitter_id=message.author.id,
+            message_id=message.id,
+            channel_id=message.channel.id,
+        )
+        self.metrics.increment("pending_adds_queued_total", service=service_type)
+        if queued:
+            await self._send_notification(
+                message.guild.id,
+                f"⏸️ {SERVICE_NAMES[service_type]}の認証待ちのため追加を保留しました: {url}",
+            )
+
+    async def _hand_off_url(self, url: str, message: discord.Message) -> bool:
+        """終了時に追加できなかったURLを保留キューに記録（ShutdownDrain から呼ばれる）"""
+        service_type = self.url_extractor.identify_service(url)
+        # 保留キューは設定済みのサービスの分だけを処理する
+        if service_type not in SERVICE_NAMES or (service_type == "soundcloud" and not self.soundcloud_service):
+            return False
+        queued = await self.pending_adds.enqueue(
+            message.guild.id,
+            url,
+            service_type,
+            submitter_id=message.author.id,
+            message_id=message.id,
+            channel_id=message.channel.id,
+        )
+        if queued:
+            logging.info(f"終了処理中のため次の起動へ引き継ぎました: {url}")
+        return queued
+
+    async def _process_pending_add(self, item: dict) -> bool:
+        """保留していたURLをプレイリストに追加して記録（PendingAddQueue から呼ばれる）"""
+        url = item["url"]
+        service_type = item["service_type"]
+
+        playlist_id = self.url_extractor.extract_youtube_playlist_id(url)
+        if playlist_id:
+            result = await self.import_youtube_playlist(
+                playlist_id,
+                item["guild_id"],
+                submitter_id=item["submitter_id"],
+                message_id=item["message_id"],
+                channel_id=item["channel_id"],
+            )
+            return result is not None
+
+        # 保留中に追加できないと判明した楽曲は再試行せず保留キューから外す
+        reason = await self.unavailable_reason(url)
+        if reason:
+            logging.info(f"追加できない楽曲のため保留を破棄しました（{reason}）: {url}")
+            return True
+
+        if not await self.add_to_playlist(service_type, url, lane=BULK, guild_id=item["guild_id"]):
+            return False
+
+        await self._mark_processed(
+            item["guild_id"],
+            url,
+            service_type,
+            submitter_id=item["submitter_id"],
+            message_id=item["message_id"],
+            channel_id=item["channel_id"],
+        )
+        await self._send_notification(
+            item["guild_id"],
+            f"✅ 保留していたURLを{SERVICE_NAMES[service_type]}プレイリストに追加しました: {url}",
+        )
+        return True
+
+    async def unavailable_reason(self, url: str) -> str | None:
+        """以前に追加できなかった楽曲であれば理由を返す"""
+        return await self.negative_cache.lookup(self.url_extractor.get_canonical_id(url))
+
+    async def add_to_playlist(
+        self,
+        service_type: str,
+        url: str,
+        lane: str = INTERACTIVE,
+        guild_id: int | None = None,
+    ) -> bool:
+        """優先度クラスとサーバーの配分に応じた実行枠を取得してプレイリストに追加（サービス未設定の場合は False）"""
+        service = self.youtube_service if service_type == "youtube" else self.soundcloud_service
+        if not service:
+            return False
+        async with self.scheduler.slot(service_type, lane, guild_id):
+            return await service.add_to_playlist(url)
+
+    async def import_youtube_playlist(
+        self,
+        playlist_id: str,
+        guild_id: int,
+        *,
+        submitter_id: int | None = None,
+        message_id: int | None = None,
+        channel_id: int | None = None,
+        notify: bool = True,
+    ) -> ImportResult | None:
+        """YouTube プレイリストの動画をまとめて取り込み、結果を通知"""
+        result = await self.playlist_importer.run(
+            playlist_id,
+            guild_id,
+            submitter_id=submitter_id,
+            message_id=message_id,
+            channel_id=channel_id,
+        )
+        if not notify:
+            return result
+
+        if result is None:
+            await self._send_notification(
+                guild_id,
+                f"❌ YouTubeプレイリストを取得できませんでした: {playlist_id}",
+            )
+            return None
+
+        summary = (
+            f"📥 YouTubeプレイリストを取り込みました: 追加 {result.added}件 / "
+            f"追加済み {result.already_in_playlist + result.already_processed}件 / 失敗 {result.failed}件"
+        )
+        if result.unavailable:
+            summary += f" / 利用不可 {result.unavailable}件"
+        if result.truncated:
+            summary += f"（先頭{self.config.playlist_import_max_items}件のみ）"
+        await self._send_notification(guild_id, summary)
+        return result
+
+    async def record_processed_url(
+        self,
+        url: str,
+        service_type: str,
+        message: discord.Message,
+        *,
+        wait: bool = True,
+    ) -> None:
+        """処理済みURLを投稿メタデータと共に記録（wait=False ではコミットを待たない）"""
+        await self._mark_processed(
+            message.guild.id,
+            url,
+            service_type,
+            submitter_id=message.author.id,
+            message_id=message.id,
+            channel_id=message.channel.id,
+            wait=wait,
+        )
+
+    async def _mark_processed(
+        self,
+        guild_id: int,
+        url: str,
+        service_type: str,
+        *,
+        submitter_id: int | None,
+        message_id: int | None,
+        channel_id: int | None,
+        wait: bool = True,
+    ) -> None:
+        """処理済みURLを記録"""
+        video_id = None
+        if service_type == "youtube":
+            video_id = self.url_extractor.extract_youtube_video_id(url)
+
+        await self.url_writer.mark_url_processed(
+            guild_id,
+            url,
+            service_type,
+            video_id=video_id,
+            canonical_id=self.url_extractor.get_canonical_id(url),
+            submitter_id=submitter_id,
+            message_id=message_id,
+            channel_id=channel_id,
+            wait=wait,
+        )
+
     async def _send_notification(self, guild_id: int, message: str) -> None:
         """通知メッセージの送信"""
         notification_channel_id = await self.db_manager.get_notification_channel(guild_id)
         if not notification_channel_id:
             return
+        if self.dry_run:
+            self.dry_run.suppress_notification(guild_id, message)
+            return
 
         channel = self.get_channel(notification_channel_id)
         if channel:
@@ -146,11 +736,35 @@ class MusicPlaylistBot(commands.Bot):
             except Exception as e:
                 logging.exception(f"通知送信中にエラーが発生: {e}")
 
+    def request_shutdown(self, reason: str) -> asyncio.Task:
+        """終了処理を開始（既に開始している場合はその処理を返す）"""
+        if self._closing is None:
+            logging.info(f"{reason} を受信しました。処理中の追加を引き継いで終了します")
+            self._closing = asyncio.get_running_loop().create_task(self._shutdown(), name="shutdown")
+        return self._closing
+
     async def close(self) -> None:
-        """Botを終了"""
+        """Botを終了（複数回呼ばれても終了処理は1回だけ行い、完了まで待つ）"""
+        await asyncio.shield(self.request_shutdown("終了要求"))
+
+    async def _shutdown(self) -> None:
+        """新しい作業を止め、処理中の追加を引き継いでから各コンポーネントを停止"""
+        await self.pending_adds.stop()
+        await self.maintenance.stop()
+        # Gatewayの接続を保ったまま待つため、この間に届いたURLも保留キューへ引き継がれる
+        await self.shutdown_drain.drain()
+        await self.youtube_writer.stop()
+        await self.url_writer.stop()
+        if self.loop_monitor:
+            await self.loop_monitor.stop()
         if self.soundcloud_service and hasattr(self.soundcloud_service, "close"):
             await self.soundcloud_service.close()
+        if self.dry_run:
+            self.dry_run.log_summary()
         await super().close()
+        if self.health_server:
+            await self.health_server.stop()
+        await self.db_manager.close()
 
 
 async def main() -> None:
@@ -163,7 +777,7 @@ async def main() -> None:
         level=getattr(logging, os.getenv("LOG_LEVEL", "INFO")),
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         handlers=[
-            logging.FileHandler("bot.log", encoding="utf-8"),
+            logging.FileHandler(BotConfig().log_file, encoding="utf-8"),
             logging.StreamHandler(),
         ],
     )
@@ -185,6 +799,15 @@ async def main() -> None:
     from commands import setup_commands
     await setup_commands(bot)
 
+    # SIGTERM（コンテナの停止など）と SIGINT で処理中の追加を引き継いでから終了する
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, bot.request_shutdown, signal.Signals(signum).name)
+        except (NotImplementedError, RuntimeError):
+            # Windows ではシグナルハンドラーを登録できないため従来どおり KeyboardInterrupt で終了する
+            pass
+
     try:
         await bot.start(token)
     except KeyboardInterrupt:
@@ -0,0 +1,84 @@
+"""データベースメンテナンスモジュール
+
+URL履歴の保持期間管理・期限切れの否定キャッシュの削除・incremental VACUUM・ANALYZE を定期実行する
+"""
+
+import asyncio
+import logging
+
+from storage import StorageBackend
+
+
+class DatabaseMaintenance:
+    """データベースの定期メンテナンスクラス"""
+
+    def __init__(
+        self,
+        db_manager: StorageBackend,
+        interval: float = 6 * 60 * 60,
+        default_retention_days: int = 0,
+        batch_size: int = 500,
+        batch_pause: float = 0.05,
+        analyze_every: int = 4,
+    ) -> None:
+        """メンテナンスクラスを初期化"""
+        self.db_manager = db_manager
+        self.interval = interval
+        self.default_retention_days = default_retention_days
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.analyze_every = analyze_every
+
+        self._task: asyncio.Task | None = None
+        self._runs = 0
+
+    def start(self) -> None:
+        """定期メンテナンスタスクを開始"""
+        if self._task:
+            return
+        self._task = asyncio.get_running_loop().create_task(
+            self._run_periodically(),
+            name="database-maintenance",
+        )
+        logging.info(f"データベースメンテナンスを開始しました（間隔: {self.interval}秒）")
+
+    async def stop(self) -> None:
+        """定期メンテナンスタスクを停止"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run_periodically(self) -> None:
+        """一定間隔でメンテナンスを実行"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logging.exception(f"データベースメンテナンス中にエラーが発生: {e}")
+
+    async def run_once(self) -> None:
+        """メンテナンスを1回実行"""
+        deleted = await self.db_manager.cleanup_old_urls(
+            self.default_retention_days,
+            batch_size=self.batch_size,
+            pause=self.batch_pause,
+        )
+
+        expired = await self.db_manager.delete_expired_negative_cache()
+        if expired:
+            logging.info(f"期限切れの否定キャッシュを削除しました（{expired}件）")
+
+        # 削除で生じた空きページを返却してファイルサイズを抑える
+        if deleted:
+            await self.db_manager.incremental_vacuum()
+
+        # ANALYZE は数回に一度だけ実行する
+        if self._runs % self.analyze_every == 0:
+            await self.db_manager.analyze()
+            logging.info("データベース統計情報を更新しました")
+        self._runs += 1
@@ -0,0 +1,66 @@
+"""メトリクス収集モジュール
+"""
+
+import math
+import threading
+from collections.abc import Iterable
+
+
+def _format_key(name: str, labels: dict[str, object]) -> str:
+    """メトリクス名とラベルからキーを生成"""
+    if not labels:
+        return name
+    label_text = ",".join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    return f"{name}{{{label_text}}}"
+
+
+def percentile(samples: Iterable[float], q: float) -> float | None:
+    """サンプル列のパーセンタイル値を計算（q は 0〜100）"""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    rank = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class BotMetrics:
+    """Bot内部メトリクスの集計クラス"""
+
+    def __init__(self) -> None:
+        """メトリクスを初期化"""
+        # 監視スレッドからも更新されるためロックで保護する
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = {}
+        self._gauges: dict[str, float] = {}
+
+    def increment(self, name: str, value: float = 1, **labels: object) -> None:
+        """カウンターを加算"""
+        key = _format_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: object) -> None:
+        """ゲージを設定"""
+        key = _format_key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def get_counter(self, name: str, **labels: object) -> float:
+        """カウンターの現在値を取得"""
+        with self._lock:
+            return self._counters.get(_format_key(name, labels), 0)
+
+    def get_gauge(self, name: str, **labels: object) -> float | None:
+        """ゲージの現在値を取得"""
+        with self._lock:
+            return self._gauges.get(_format_key(name, labels))
+
+    def snapshot(self) -> dict[str, float]:
+        """全メトリクスのスナップショットを取得"""
+        with self._lock:
+            return {**self._counters, **self._gauges}
+
+    def render_text(self) -> str:
+        """Prometheusテキスト形式でメトリクスを出力"""
+        lines = [f"{key} {value}" for key, value in sorted(self.snapshot().items())]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,344 @@
+"""データベースマイグレーションモジュール
+
+スキーマのバージョンを PRAGMA user_version で管理し、未適用のマイグレーションを
+1バージョンずつトランザクション内で適用する。
+
+マイグレーション導入前のコードで作成されたDB（user_version = 0）にも適用できるよう、
+各マイグレーションは既存のテーブル・列・インデックスがあっても安全に実行できる形で記述する。
+"""
+
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import aiosqlite
+
+
+@dataclass(frozen=True)
+class Migration:
+    """スキーママイグレーション定義"""
+
+    version: int
+    description: str
+    apply: Callable[[aiosqlite.Connection], Awaitable[None]]
+
+
+async def _table_exists(db: aiosqlite.Connection, table: str) -> bool:
+    """テーブルが存在するかチェック"""
+    cursor = await db.execute("""
+        SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?
+    """, (table,))
+    return await cursor.fetchone() is not None
+
+
+async def _add_missing_columns(
+    db: aiosqlite.Connection,
+    table: str,
+    columns: dict[str, str],
+) -> None:
+    """テーブルに存在しない列を追加"""
+    cursor = await db.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in await cursor.fetchall()}
+
+    for name, column_type in columns.items():
+        if name not in existing:
+            await db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+
+async def _create_base_tables(db: aiosqlite.Connection) -> None:
+    """サーバー設定・処理済みURL履歴テーブルを作成"""
+    # サーバー設定テーブル
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS server_settings (
+            guild_id INTEGER PRIMARY KEY,
+            monitored_channel_id INTEGER,
+            notification_channel_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # 処理済みURL履歴テーブル（重複チェック用）
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS processed_urls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            url TEXT NOT NULL,
+            service_type TEXT NOT NULL,
+            video_id TEXT,
+            title TEXT,
+            processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(guild_id, url)
+        )
+    """)
+
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_processed_urls_guild_url
+        ON processed_urls(guild_id, url)
+    """)
+
+
+async def _create_stats_tables(db: aiosqlite.Connection) -> None:
+    """統計集計テーブルと更新トリガーを作成"""
+    needs_backfill = not await _table_exists(db, "guild_daily_stats")
+
+    # 日別・サービス別の追加件数（統計表示用の集計テーブル）
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS guild_daily_stats (
+            guild_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            service_type TEXT NOT NULL,
+            add_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, day, service_type)
+        ) WITHOUT ROWID
+    """)
+
+    # サービス別の累計追加件数
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS guild_service_totals (
+            guild_id INTEGER NOT NULL,
+            service_type TEXT NOT NULL,
+            add_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, service_type)
+        ) WITHOUT ROWID
+    """)
+
+    # processed_urls への新規挿入時に集計を加算（INSERT OR IGNORE で無視された行は対象外）
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_processed_urls_stats
+        AFTER INSERT ON processed_urls
+        BEGIN
+            INSERT INTO guild_daily_stats (guild_id, day, service_type, add_count)
+            VALUES (NEW.guild_id, date(NEW.processed_at), NEW.service_type, 1)
+            ON CONFLICT(guild_id, day, service_type) DO UPDATE SET
+                add_count = add_count + 1;
+
+            INSERT INTO guild_service_totals (guild_id, service_type, add_count)
+            VALUES (NEW.guild_id, NEW.service_type, 1)
+            ON CONFLICT(guild_id, service_type) DO UPDATE SET
+                add_count = add_count + 1;
+        END
+    """)
+
+    # 集計テーブル新設時は既存履歴から一度だけ集計する
+    if needs_backfill:
+        await db.execute("""
+            INSERT INTO guild_daily_stats (guild_id, day, service_type, add_count)
+            SELECT guild_id, date(processed_at), service_type, COUNT(*)
+            FROM processed_urls
+            GROUP BY guild_id, date(processed_at), service_type
+        """)
+        await db.execute("""
+            INSERT INTO guild_service_totals (guild_id, service_type, add_count)
+            SELECT guild_id, service_type, COUNT(*)
+            FROM processed_urls
+            GROUP BY guild_id, service_type
+        """)
+
+
+async def _add_submission_metadata(db: aiosqlite.Connection) -> None:
+    """投稿メタデータ列・カバリングインデックス・投稿者別集計を追加"""
+    await _add_missing_columns(db, "processed_urls", {
+        "canonical_id": "TEXT",
+        "submitter_id": "INTEGER",
+        "message_id": "INTEGER",
+        "channel_id": "INTEGER",
+    })
+
+    # 「最初の投稿者」検索用のカバリングインデックス
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_processed_urls_guild_canonical
+        ON processed_urls(guild_id, canonical_id, processed_at, submitter_id, message_id, channel_id)
+    """)
+
+    # 「ユーザーの投稿一覧」検索用のカバリングインデックス
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_processed_urls_guild_submitter
+        ON processed_urls(guild_id, submitter_id, processed_at, url, service_type)
+    """)
+
+    # 「チャンネルの期間内リンク」検索用のカバリングインデックス
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_processed_urls_guild_channel
+        ON processed_urls(guild_id, channel_id, processed_at, url, submitter_id)
+    """)
+
+    # 投稿者別の累計追加件数（上位投稿者の表示用）
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS guild_submitter_stats (
+            guild_id INTEGER NOT NULL,
+            submitter_id INTEGER NOT NULL,
+            add_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, submitter_id)
+        ) WITHOUT ROWID
+    """)
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_guild_submitter_stats_count
+        ON guild_submitter_stats(guild_id, add_count)
+    """)
+
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_processed_urls_submitter_stats
+        AFTER INSERT ON processed_urls
+        WHEN NEW.submitter_id IS NOT NULL
+        BEGIN
+            INSERT INTO guild_submitter_stats (guild_id, submitter_id, add_count)
+            VALUES (NEW.guild_id, NEW.submitter_id, 1)
+            ON CONFLICT(guild_id, submitter_id) DO UPDATE SET
+                add_count = add_count + 1;
+        END
+    """)
+
+
+async def _add_retention_settings(db: aiosqlite.Connection) -> None:
+    """保持期間設定列と保持期間削除用のインデックスを追加"""
+    await _add_missing_columns(db, "server_settings", {
+        "retention_days": "INTEGER",
+    })
+
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_processed_urls_guild_processed_at
+        ON processed_urls(guild_id, processed_at)
+    """)
+
+
+async def _drop_redundant_guild_url_index(db: aiosqlite.Connection) -> None:
+    """UNIQUE(guild_id, url) の自動インデックスと重複するインデックスを削除"""
+    await db.execute("DROP INDEX IF EXISTS idx_processed_urls_guild_url")
+
+
+async def _create_lease_table(db: aiosqlite.Connection) -> None:
+    """複数プロセス間でプレイリスト書き込みを直列化するリーステーブルを作成"""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS playlist_leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+
+
+async def _create_pending_adds_table(db: aiosqlite.Connection) -> None:
+    """認証待ちのサービスに追加できなかったURLの保留キューを作成"""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS pending_adds (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            url TEXT NOT NULL,
+            service_type TEXT NOT NULL,
+            submitter_id INTEGER,
+            message_id INTEGER,
+            channel_id INTEGER,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(guild_id, url)
+        )
+    """)
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pending_adds_service
+        ON pending_adds(service_type, id)
+    """)
+
+
+async def _add_write_allocation_settings(db: aiosqlite.Connection) -> None:
+    """サーバーごとの書き込み配分（重み・同時実行数の上限）の列を追加"""
+    await _add_missing_columns(db, "server_settings", {
+        "write_share": "INTEGER",
+        "write_concurrency": "INTEGER",
+    })
+
+
+async def _create_negative_cache_table(db: aiosqlite.Connection) -> None:
+    """追加できなかった動画・トラックを記録する否定キャッシュを作成"""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS negative_cache (
+            canonical_id TEXT PRIMARY KEY,
+            service_type TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_negative_cache_expires_at
+        ON negative_cache(expires_at)
+    """)
+
+
+async def _create_playlist_series_table(db: aiosqlite.Connection) -> None:
+    """上限に達したプレイリストの後続を含む追加先プレイリストの系列を作成"""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS playlist_series (
+            series_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            playlist_id TEXT NOT NULL,
+            item_count INTEGER NOT NULL DEFAULT 0,
+            activated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (series_id, position)
+        ) WITHOUT ROWID
+    """)
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "初期スキーマ", _create_base_tables),
+    Migration(2, "統計集計テーブル", _create_stats_tables),
+    Migration(3, "投稿メタデータとカバリングインデックス", _add_submission_metadata),
+    Migration(4, "URL履歴の保持期間設定", _add_retention_settings),
+    Migration(5, "重複インデックスの削除", _drop_redundant_guild_url_index),
+    Migration(6, "プレイリスト書き込みリース", _create_lease_table),
+    Migration(7, "認証待ちの追加保留キュー", _create_pending_adds_table),
+    Migration(8, "サーバーごとの書き込み配分", _add_write_allocation_settings),
+    Migration(9, "追加できなかった動画・トラックの否定キャッシュ", _create_negative_cache_table),
+    Migration(10, "追加先プレイリストの系列", _create_playlist_series_table),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+async def get_schema_version(db: aiosqlite.Connection) -> int:
+    """現在のスキーマバージョンを取得"""
+    cursor = await db.execute("PRAGMA user_version")
+    row = await cursor.fetchone()
+    return row[0]
+
+
+async def run_migrations(
+    db: aiosqlite.Connection,
+    target_version: int = LATEST_VERSION,
+) -> int:
+    """未適用のマイグレーションを順に適用し、適用後のバージョンを返す
+
+    DDLも含めてトランザクションを明示的に制御するため、
+    db は isolation_level=None（自動コミットモード）で接続しておくこと。
+    """
+    current_version = await get_schema_version(db)
+    if current_version > LATEST_VERSION:
+        msg = (
+            f"データベースのスキーマバージョン({current_version})が"
+            f"このBotの対応バージョン({LATEST_VERSION})より新しいため起動できません"
+        )
+        raise RuntimeError(msg)
+
+    for migration in MIGRATIONS:
+        if migration.version <= current_version or migration.version > target_version:
+            continue
+
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            await migration.apply(db)
+            # PRAGMA は値をパラメータで受け付けないため整数化して埋め込む
+            await db.execute(f"PRAGMA user_version = {int(migration.version)}")
+            await db.execute("COMMIT")
+        except Exception:
+            await db.execute("ROLLBACK")
+            logging.exception(
+                f"マイグレーション v{migration.version}（{migration.description}）に失敗しました",
+            )
+            raise
+
+        current_version = migration.version
+        logging.info(
+            f"マイグレーション v{migration.version}（{migration.description}）を適用しました",
+        )
+
+    return current_version
@@ -3,89 +3,150 @@
 YouTube APIとSoundCloud API（実装済み）
 """
 
+import asyncio
+import contextlib
 import json
 import logging
+import sys
+import time
 from typing import Any
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+# google-api-python-client 本体・認証ライブラリは起動時間への影響が大きいため使用時に読み込む
 from googleapiclient.errors import HttpError
 
+from adaptive_limit import AdaptiveLimit
 from config import BotConfig
+from dry_run import DryRunRecorder
+from file_utils import write_text_atomic
+from negative_cache import NegativeCache
+from playlist_lock import PlaylistLock
+from playlist_series import PlaylistSeries
 from url_extractor import URLExtractor
 
+# プレイリストのページ取得で一時的なエラー（429・5xx）を再試行する回数
+PAGE_FETCH_RETRIES = 3
+# 403 のうち、レート制限・クォータ超過を表すエラー理由
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded")
+# プレイリストが動画数の上限に達していることを表すエラー理由
+PLAYLIST_FULL_REASON = "playlistContainsMaximumNumberOfVideos"
+
 
 class YouTubeService:
     """YouTube API サービスクラス"""
 
     SCOPES: list[str] = ["https://www.googleapis.com/auth/youtube"]
 
-    def __init__(self) -> None:
-        """YouTube サービスを初期化"""
+    def __init__(
+        self,
+        playlist_lock: PlaylistLock | None = None,
+        limiter: AdaptiveLimit | None = None,
+        negative_cache: NegativeCache | None = None,
+        playlist_series: PlaylistSeries | None = None,
+        dry_run: DryRunRecorder | None = None,
+    ) -> None:
+        """YouTube サービスを初期化
+
+        limiter を渡すとAPI呼び出しの応答時間とレート制限を記録し、
+        negative_cache を渡すと存在しない動画を記録する。
+        playlist_series を渡すと、追加先が上限に近づいたら系列の次のプレイリストへ切り替え、
+        重複チェックは系列全体を対象に行う。
+        dry_run を渡すとプレイリストへの書き込みを行わずに記録だけを残す。
+        """
         self.config = BotConfig()
         self.url_extractor = URLExtractor()
         self.service = None
         self.credentials = None
+        self.playlist_lock = playlist_lock
+        self.limiter = limiter
+        self.negative_cache = negative_cache
+        self.playlist_series = playlist_series
+        self.dry_run = dry_run
+        # 追加先でなくなったプレイリストの動画ID（内容が変わらないため一度だけ取得する）
+        self._sealed_video_ids: dict[str, frozenset[str]] = {}
+        self._series_lock = asyncio.Lock()
+
+    def _playlist_write_guard(self) -> contextlib.AbstractAsyncContextManager:
+        """プレイリストへの書き込みを他プロセスと直列化するコンテキスト"""
+        if self.playlist_lock:
+            return self.playlist_lock.hold(f"youtube:{self.config.youtube_playlist_id}")
+        return contextlib.nullcontext()
+
+    @property
+    def is_available(self) -> bool:
+        """認証済みでプレイリスト操作が可能か"""
+        return self.service is not None
 
     async def initialize(self) -> None:
-        """YouTube API サービスを初期化"""
+        """YouTube API サービスを初期化
+
+        保存済みトークンの読み込み・更新のみを行い、対話的な認証は行わない。
+        トークンがない場合は未認証のまま返り、再度呼び出すとトークンファイルを読み直す。
+        """
         try:
-            self.credentials = await self._get_credentials()
+            # ライブラリ読み込み・トークン更新・クライアント作成は同期処理のため
+            # スレッドで実行し、その間も他の起動処理を進められるようにする
+            self.credentials = await asyncio.to_thread(self._get_credentials)
             if self.credentials:
-                self.service = build("youtube", "v3", credentials=self.credentials)
+                self.service = await asyncio.to_thread(self._build_client, self.credentials)
                 logging.info("YouTube API サービスを初期化しました")
-            else:
-                logging.warning("YouTube API の認証情報が見つかりません")
         except Exception as e:
             logging.exception(f"YouTube API 初期化エラー: {e}")
 
-    async def _get_credentials(self) -> Any:
-        """OAuth認証情報を取得"""
-        creds = None
+    def _build_client(self, credentials: Any) -> Any:
+        """YouTube API クライアントを作成（YOUTUBE_API_BASE_URL 指定時はその接続先を使用）"""
+        from googleapiclient.discovery import build
+
+        client_options = None
+        if self.config.youtube_api_base_url:
+            client_options = {"api_endpoint": self.config.youtube_api_base_url}
+        # ライブラリ同梱のディスカバリー文書を使い、起動時のネットワーク取得を避ける
+        return build(
+            "youtube",
+            "v3",
+            credentials=credentials,
+            client_options=client_options,
+            static_discovery=True,
+            cache_discovery=False,
+        )
+
+    def _get_credentials(self) -> Any:
+        """保存済みのOAuth認証情報を取得（対話的な認証は `python start.py auth youtube` で行う）"""
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+
         token_file = self.config.oauth_token_file
+        if not token_file.exists():
+            logging.warning(
+                "YouTubeのOAuthトークンがありません。"
+                "`python start.py auth youtube` で取得するまで追加は保留されます",
+            )
+            return None
+
+        creds = Credentials.from_authorized_user_file(str(token_file), self.SCOPES)
+        if creds.valid:
+            return creds
 
-        # 保存されたトークンがあるかチェック
-        if token_file.exists():
-            creds = Credentials.from_authorized_user_file(str(token_file), self.SCOPES)
-
-        # 認証情報が無効または期限切れの場合
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                try:
-                    creds.refresh(Request())
-                except Exception as e:
-                    logging.exception(f"トークンのリフレッシュに失敗: {e}")
-                    creds = None
-
-            if not creds:
-                credentials_file = self.config.oauth_credentials_file
-                if not credentials_file.exists():
-                    logging.error(
-                        f"OAuth認証情報ファイルが見つかりません: {credentials_file}\n"
-                        "Google Cloud Consoleから認証情報をダウンロードして配置してください。",
-                    )
-                    return None
-
-                try:
-                    flow = InstalledAppFlow.from_client_secrets_file(
-                        str(credentials_file),
-                        self.SCOPES,
-                    )
-                    creds = flow.run_local_server(port=0)
-                except Exception as e:
-                    logging.exception(f"OAuth認証に失敗: {e}")
-                    return None
-
-            # トークンを保存
-            if creds:
-                token_file.parent.mkdir(parents=True, exist_ok=True)
-                with open(token_file, "w", encoding="utf-8") as token:
-                    token.write(creds.to_json())
+        if not (creds.expired and creds.refresh_token):
+            logging.warning("YouTubeのOAuthトークンが無効です。`python start.py auth youtube` で再取得してください")
+            return None
 
+        try:
+            creds.refresh(Request())
+        except Exception as e:
+            logging.exception(f"トークンのリフレッシュに失敗: {e}")
+            return None
+
+        # 複数シャードプロセスが同時に更新しても壊れないよう置き換えで書き込む
+        write_text_atomic(token_file, creds.to_json())
         return creds
 
+    def _thread_http(self) -> Any:
+        """別スレッドで実行するリクエスト用のHTTPクライアント（httplib2 はスレッドセーフでないため共有しない）"""
+        from google_auth_httplib2 import AuthorizedHttp
+        from googleapiclient.http import build_http
+
+        return AuthorizedHttp(self.credentials, http=build_http())
+
     async def add_to_playlist(self, url: str) -> bool:
         """YouTube プレイリストに動画を追加"""
         if not self.service:
@@ -103,74 +164,498 @@ class YouTubeService:
             return False
 
         try:
-            # 重複チェック
-            if await self._is_video_in_playlist(video_id):
-                logging.info(f"動画は既にプレイリストに存在します: {video_id}")
+            # 重複チェックから追加までの間に他プロセスが同じ動画を追加しないようロックする
+            async with self._playlist_write_guard():
+                # 重複チェック
+                if await self._is_video_in_playlist(video_id):
+                    logging.info(f"動画は既にプレイリストに存在します: {video_id}")
+                    return True
+
+                # プレイリストに追加
+                await self._insert_into_series(video_id)
+                logging.info(f"YouTube プレイリストに動画を追加しました: {video_id}")
                 return True
 
-            # プレイリストに追加
-            request = self.service.playlistItems().insert(
-                part="snippet",
-                body={
-                    "snippet": {
-                        "playlistId": self.config.youtube_playlist_id,
-                        "resourceId": {
-                            "kind": "youtube#video",
-                            "videoId": video_id,
-                        },
-                    },
-                },
-            )
+        except TimeoutError as e:
+            logging.warning(f"YouTube プレイリストへの追加を中止しました: {e}")
+            return False
+
+        except HttpError as e:
+            self._log_insert_error(e, video_id, exc_info=True)
+            await self._remember_unavailable(video_id, e)
+            return False
+
+        except Exception as e:
+            logging.exception(f"予期しないエラーが発生しました: {e}")
+            return False
 
-            response = request.execute()
+    async def insert_video(self, video_id: str) -> bool:
+        """重複チェックを行わずにプレイリストへ動画を追加（呼び出し側で既存動画を除外済みの場合に使用）"""
+        if not self.service:
+            logging.error("YouTube API サービスが初期化されていません")
+            return False
+
+        try:
+            async with self._playlist_write_guard():
+                await self._insert_into_series(video_id)
             logging.info(f"YouTube プレイリストに動画を追加しました: {video_id}")
             return True
 
-        except HttpError as e:
-            error_details = json.loads(e.content.decode("utf-8"))
-            error_message = error_details.get("error", {}).get("message", str(e))
-
-            if "videoNotFound" in str(e):
-                logging.warning(
-                    f"動画が見つかりません（削除済みまたは非公開）: {video_id}",
-                )
-            elif "playlistNotFound" in str(e):
-                logging.exception(
-                    f"プレイリストが見つかりません: {self.config.youtube_playlist_id}",
-                )
-            else:
-                logging.exception(f"YouTube API エラー: {error_message}")
+        except TimeoutError as e:
+            logging.warning(f"YouTube プレイリストへの追加を中止しました: {e}")
+            return False
 
+        except HttpError as e:
+            self._log_insert_error(e, video_id, exc_info=True)
+            await self._remember_unavailable(video_id, e)
             return False
 
         except Exception as e:
             logging.exception(f"予期しないエラーが発生しました: {e}")
             return False
 
-    async def _is_video_in_playlist(self, video_id: str) -> bool:
-        """動画がプレイリストに既に存在するかチェック"""
+    async def insert_videos(self, video_ids: list[str]) -> list[bool]:
+        """複数の動画を1回のHTTPバッチリクエストでプレイリストに追加し、入力と同じ順で成否を返す
+
+        一時的なエラー（409・429・5xx）で追加できなかった動画は個別に再試行する。
+        バッチ自体が失敗した場合は一部の追加が反映されている可能性があるため、追加先を再取得して
+        登録されていない動画だけを個別に再試行する（再取得できない場合は重複追加を避けるため再試行しない）。
+        """
+        if len(video_ids) <= 1:
+            return [await self.insert_video(video_id) for video_id in video_ids]
         if not self.service:
             logging.error("YouTube API サービスが初期化されていません")
+            return [False] * len(video_ids)
+
+        def execute_batch(playlist_id: str, video_ids: list[str]) -> dict[str, Exception | None]:
+            errors: dict[str, Exception | None] = {}
+
+            def callback(request_id: str, response: Any, exception: Exception | None) -> None:
+                errors[request_id] = exception
+
+            batch = self._new_batch_request(callback)
+            for index, video_id in enumerate(video_ids):
+                batch.add(self._playlist_item_insert_request(video_id, playlist_id), request_id=str(index))
+            started = time.monotonic()
+            try:
+                batch.execute(http=self._thread_http())
+            except Exception as e:
+                self._record_call(started, e)
+                raise
+            # バッチ内の個別リクエストがレート制限された場合もバッチ全体の結果として記録する
+            self._record_call(started, next((e for e in errors.values() if self._is_rate_limited(e)), None))
+            return errors
+
+        sending = video_ids
+        playlist_id = None
+        try:
+            async with self._playlist_write_guard():
+                playlist_id = await self._target_playlist_id()
+                room = self._remaining_capacity()
+                if 0 < room < len(video_ids):
+                    # 追加先の残り件数を超える分は、上限で失敗させずに切り替え後の追加先へ送る
+                    sending = video_ids[:room]
+                if self.dry_run:
+                    await self.dry_run.write("youtube", sending)
+                    errors = dict.fromkeys(map(str, range(len(sending))))
+                else:
+                    # バッチ全体の応答を待つ間もイベントループを止めないようスレッドで実行する
+                    errors = await asyncio.to_thread(execute_batch, playlist_id, sending)
+                    # 次の追加が残り件数を正しく判断できるよう、書き込みロックを保持したまま記録する
+                    await self._record_added(playlist_id, sum(1 for error in errors.values() if error is None))
+        except TimeoutError as e:
+            logging.warning(f"YouTube プレイリストへの一括追加を中止しました: {e}")
+            return [False] * len(video_ids)
+        except Exception as e:
+            logging.exception(f"YouTube バッチリクエストに失敗しました。追加先を確認して未登録の動画を再試行します: {e}")
+            reconciled = await self._reconcile_failed_batch(playlist_id, sending)
+            if reconciled is None:
+                return [False] * len(video_ids)
+            errors = reconciled
+
+        if self.playlist_series and any(self._is_playlist_full(error) for error in errors.values()):
+            # 上限で追加できなかった動画は切り替え後の追加先へ個別に再試行する
+            await self.playlist_series.mark_full(playlist_id)
+
+        results = []
+        retried = 0
+        for index, video_id in enumerate(sending):
+            key = str(index)
+            if key in errors and errors[key] is None:
+                results.append(True)
+            elif key not in errors or self._is_retryable(errors[key]):
+                retried += 1
+                results.append(await self.insert_video(video_id))
+            else:
+                self._log_insert_error(errors[key], video_id)
+                await self._remember_unavailable(video_id, errors[key])
+                results.append(False)
+
+        logging.info(
+            f"YouTube プレイリストに一括追加しました: {sum(results)}/{len(sending)}件（個別再試行 {retried}件）",
+        )
+        if len(sending) < len(video_ids):
+            results += await self.insert_videos(video_ids[len(sending):])
+        return results
+
+    async def _reconcile_failed_batch(
+        self,
+        playlist_id: str | None,
+        video_ids: list[str],
+    ) -> dict[str, Exception | None] | None:
+        """失敗したバッチの動画ごとの結果を追加先の登録状況から求める
+
+        登録済みの動画は成功、未登録の動画は結果なし（個別の再試行対象）とし、確認できない場合は None を返す。
+        """
+        if playlist_id is None:
+            # 追加先を決める前に失敗した場合は何も送信していない
+            return {}
+        try:
+            present = await self.list_playlist_video_ids(playlist_id)
+        except Exception as e:
+            logging.exception(f"プレイリスト取得中にエラー: {playlist_id}: {e}")
+            present = None
+        if present is None:
+            logging.error(f"バッチの追加結果を確認できないため、重複追加を避けて再試行しません: {len(video_ids)}件")
+            return None
+
+        present_ids = set(present)
+        errors = {str(index): None for index, video_id in enumerate(video_ids) if video_id in present_ids}
+        await self._record_added(playlist_id, len(errors))
+        return errors
+
+    def _new_batch_request(self, callback: Any) -> Any:
+        """HTTPバッチリクエストを作成（YOUTUBE_API_BASE_URL 指定時はその接続先に送信）"""
+        if self.config.youtube_api_base_url:
+            from googleapiclient.http import BatchHttpRequest
+
+            return BatchHttpRequest(
+                callback=callback,
+                batch_uri=f"{self.config.youtube_api_base_url.rstrip('/')}/batch",
+            )
+        return self.service.new_batch_http_request(callback=callback)
+
+    def _is_retryable(self, error: Exception | None) -> bool:
+        """個別に再試行すべきエラーか（同時追加の競合・レート制限・サーバーエラー・系列の追加先の上限）"""
+        if not isinstance(error, HttpError):
+            return True
+        if self.playlist_series and self._is_playlist_full(error):
+            return True
+        return error.resp.status in (409, 429) or error.resp.status >= 500
+
+    @staticmethod
+    def _is_playlist_full(error: Exception | None) -> bool:
+        """プレイリストが動画数の上限に達しているエラーか"""
+        return isinstance(error, HttpError) and error.resp.status == 403 and PLAYLIST_FULL_REASON in str(error)
+
+    @staticmethod
+    def _is_rate_limited(error: Exception | None) -> bool:
+        """レート制限・クォータ超過のエラーか"""
+        if not isinstance(error, HttpError):
             return False
+        if error.resp.status == 429:
+            return True
+        return error.resp.status == 403 and any(reason in str(error) for reason in RATE_LIMIT_REASONS)
+
+    def _execute(self, request: Any, **kwargs: Any) -> Any:
+        """APIリクエストを実行し、応答時間とエラーを同時実行数の制御に記録"""
+        started = time.monotonic()
+        try:
+            response = request.execute(**kwargs)
+        except Exception as e:
+            self._record_call(started, e)
+            raise
+        self._record_call(started)
+        return response
+
+    def _record_call(self, started: float, error: Exception | None = None) -> None:
+        """API呼び出しの結果を記録（レート制限以外の 4xx はサービスの不調とみなさない）"""
+        if not self.limiter:
+            return
+        failed = error is not None and (not isinstance(error, HttpError) or error.resp.status >= 500)
+        self.limiter.record(started, throttled=self._is_rate_limited(error), failed=failed)
+
+    def _playlist_item_insert_request(self, video_id: str, playlist_id: str) -> Any:
+        """playlistItems.insert のリクエストを作成"""
+        return self.service.playlistItems().insert(
+            part="snippet",
+            body={
+                "snippet": {
+                    "playlistId": playlist_id,
+                    "resourceId": {
+                        "kind": "youtube#video",
+                        "videoId": video_id,
+                    },
+                },
+            },
+        )
+
+    def _insert_playlist_item(self, video_id: str, playlist_id: str) -> Any:
+        """playlistItems.insert を実行（asyncio.to_thread から呼び出す）"""
+        return self._execute(self._playlist_item_insert_request(video_id, playlist_id), http=self._thread_http())
+
+    async def _insert_into_series(self, video_id: str) -> None:
+        """現在の追加先に動画を追加（上限に達していた場合は次のプレイリストへ切り替えて1回だけ再試行）"""
+        playlist_id = await self._target_playlist_id()
+        if self.dry_run:
+            await self.dry_run.write("youtube", [video_id])
+            return
+        try:
+            # 応答を待つ間もイベントループを止めないようスレッドで実行する
+            await asyncio.to_thread(self._insert_playlist_item, video_id, playlist_id)
+        except HttpError as e:
+            if not (self.playlist_series and self._is_playlist_full(e)):
+                raise
+            await self.playlist_series.mark_full(playlist_id)
+            next_playlist_id = await self._target_playlist_id()
+            if next_playlist_id == playlist_id:
+                raise
+            playlist_id = next_playlist_id
+            await asyncio.to_thread(self._insert_playlist_item, video_id, playlist_id)
+        await self._record_added(playlist_id)
+
+    async def _target_playlist_id(self) -> str:
+        """追加先のプレイリストID（系列の追加先が上限に近ければ次のプレイリストへ切り替える）"""
+        series = self.playlist_series
+        if not series:
+            return self.config.youtube_playlist_id
+        if series.loaded and not series.is_full:
+            return series.active
+
+        # 同じプロセス内の複数の追加が同時に後続のプレイリストを作成しないよう直列化する
+        async with self._series_lock:
+            if not series.loaded:
+                await series.load()
+                # 手動での追加・削除もあるため、起動後最初の追加時に実際の動画数に合わせる
+                item_count = await asyncio.to_thread(self._fetch_item_count, series.active)
+                if item_count is not None:
+                    await series.set_item_count(series.active, item_count)
+            while series.is_full:
+                previous = series.active
+                await self._roll_over()
+                if series.active == previous:
+                    break
+        return series.active
+
+    def _remaining_capacity(self) -> int:
+        """系列の追加先に切り替えの基準まで追加できる件数（系列を使わない場合や未読み込みの場合は制限なし）"""
+        series = self.playlist_series
+        if not series or not series.loaded:
+            return sys.maxsize
+        return series.max_items - series.active_item_count
+
+    async def _roll_over(self) -> None:
+        """系列の次のプレイリストを追加先にする（設定された後続がなければ新規作成）"""
+        series = self.playlist_series
+        # 他のプロセスが先に切り替えていればその追加先を使う
+        await series.load()
+        if not series.is_full:
+            return
+
+        if self.dry_run:
+            logging.warning(f"[ドライラン] プレイリストが上限に近づいていますが、追加先は切り替えません: {series.active}")
+            return
+
+        position = series.next_position
+        playlist_id = series.successor(position)
+        item_count = 0
+        if playlist_id:
+            item_count = await asyncio.to_thread(self._fetch_item_count, playlist_id) or 0
+        elif self.config.youtube_playlist_auto_create:
+            playlist_id = await asyncio.to_thread(self._create_series_playlist, position)
+        if not playlist_id:
+            logging.error(
+                f"プレイリストが上限に近づいていますが、次の追加先がありません: {series.active}"
+                "（YOUTUBE_PLAYLIST_SUCCESSORS を設定するか YOUTUBE_PLAYLIST_AUTO_CREATE を有効にしてください）",
+            )
+            return
+
+        if not await series.activate(position, playlist_id, item_count):
+            logging.warning(f"他のプロセスが先に追加先を切り替えたため、このプレイリストは使用しません: {playlist_id}")
+
+    def _fetch_item_count(self, playlist_id: str) -> int | None:
+        """プレイリストの動画数を取得（取得できない場合は None、asyncio.to_thread から呼び出す）"""
+        try:
+            response = self._execute(self.service.playlists().list(
+                part="contentDetails",
+                id=playlist_id,
+                fields="items/contentDetails/itemCount",
+            ), http=self._thread_http())
+        except HttpError as e:
+            logging.exception(f"プレイリストの動画数を取得できませんでした: {playlist_id}: {e}")
+            return None
+        items = response.get("items", [])
+        return items[0]["contentDetails"]["itemCount"] if items else None
+
+    def _create_series_playlist(self, position: int) -> str | None:
+        """系列の最初のプレイリストと同じタイトル（連番付き）・公開設定でプレイリストを作成（asyncio.to_thread から呼び出す）"""
+        series_id = self.playlist_series.series_id
+        http = self._thread_http()
+        try:
+            response = self._execute(self.service.playlists().list(
+                part="snippet,status",
+                id=series_id,
+                fields="items(snippet/title,status/privacyStatus)",
+            ), http=http)
+            items = response.get("items", [])
+            title = items[0]["snippet"]["title"] if items else "Music Collection"
+            privacy = items[0]["status"]["privacyStatus"] if items else "private"
+            created = self._execute(self.service.playlists().insert(
+                part="snippet,status",
+                body={
+                    "snippet": {
+                        "title": f"{title} ({position + 1})",
+                        "description": f"{title} の続き（上限に達したため自動作成）",
+                    },
+                    "status": {"privacyStatus": privacy},
+                },
+            ), http=http)
+        except HttpError as e:
+            logging.exception(f"後続のプレイリストを作成できませんでした: {series_id}: {e}")
+            return None
+        logging.info(f"後続のプレイリストを作成しました: {created['id']}")
+        return created["id"]
+
+    async def _record_added(self, playlist_id: str, count: int = 1) -> None:
+        """追加先に追加した動画数を系列に記録"""
+        if not self.playlist_series:
+            return
+        try:
+            await self.playlist_series.record_added(playlist_id, count)
+        except Exception as e:
+            # 動画数は起動時と上限エラー時に実際の値へ合わせ直すため、記録の失敗で追加を失敗扱いにしない
+            logging.exception(f"プレイリストの動画数を記録できませんでした: {playlist_id}: {e}")
+
+    def _log_insert_error(self, error: HttpError, video_id: str, *, exc_info: bool = False) -> None:
+        """playlistItems.insert のエラーを記録（except 節から呼ぶ場合は exc_info=True でトレースバックも記録）"""
+        error_details = json.loads(error.content.decode("utf-8"))
+        error_message = error_details.get("error", {}).get("message", str(error))
+
+        if "videoNotFound" in str(error):
+            logging.warning(
+                f"動画が見つかりません（削除済みまたは非公開）: {video_id}",
+            )
+        elif PLAYLIST_FULL_REASON in str(error):
+            logging.warning(f"プレイリストが動画数の上限に達しているため追加できませんでした: {video_id}")
+        elif "playlistNotFound" in str(error):
+            logging.error(
+                f"プレイリストが見つかりません: {self.config.youtube_playlist_id}",
+                exc_info=exc_info,
+            )
+        else:
+            logging.error(f"YouTube API エラー: {error_message}", exc_info=exc_info)
+
+    async def _remember_unavailable(self, video_id: str, error: Exception | None) -> None:
+        """削除済み・非公開の動画を否定キャッシュに記録し、再投稿時に重複走査と追加を省く"""
+        if self.negative_cache and "videoNotFound" in str(error):
+            await self.negative_cache.add(f"youtube:{video_id}", "youtube", "videoNotFound")
+
+    async def list_playlist_video_ids(
+        self,
+        playlist_id: str,
+        limit: int | None = None,
+    ) -> list[str] | None:
+        """プレイリストの動画IDを順番通りに取得（取得失敗時は None）
+
+        1ページ50件の最大サイズで取得し、fields で動画IDとページトークンだけに絞る。
+        """
+        if not self.service:
+            logging.error("YouTube API サービスが初期化されていません")
+            return None
+
+        def fetch() -> list[str]:
+            http = self._thread_http()
+            video_ids: list[str] = []
+            request = self.service.playlistItems().list(
+                part="contentDetails",
+                playlistId=playlist_id,
+                maxResults=50,
+                fields="nextPageToken,items/contentDetails/videoId",
+            )
+            while request is not None and (limit is None or len(video_ids) < limit):
+                # 一時的なエラーで取り込み全体が失敗しないよう、ページ単位で再試行する
+                response = self._execute(request, http=http, num_retries=PAGE_FETCH_RETRIES)
+                video_ids.extend(item["contentDetails"]["videoId"] for item in response.get("items", []))
+                request = self.service.playlistItems().list_next(request, response)
+            return video_ids if limit is None else video_ids[:limit]
 
         try:
+            # ページ数が多いと時間がかかるため、イベントループを止めないようスレッドで実行する
+            return await asyncio.to_thread(fetch)
+        except HttpError as e:
+            logging.exception(f"プレイリスト取得中にエラー: {playlist_id}: {e}")
+            return None
+
+    async def list_collected_video_ids(self) -> set[str] | None:
+        """追加先の系列全体に登録済みの動画IDを取得（取得失敗時は None）"""
+        if not self.service:
+            logging.error("YouTube API サービスが初期化されていません")
+            return None
+
+        playlist_id = await self._target_playlist_id()
+        video_ids = await self.list_playlist_video_ids(playlist_id)
+        if video_ids is None:
+            return None
+        collected = set(video_ids)
+        if self.dry_run:
+            collected |= self.dry_run.written_ids("youtube")
+        for sealed_id in self.playlist_series.sealed if self.playlist_series else []:
+            sealed_ids = await self._get_sealed_video_ids(sealed_id)
+            if sealed_ids is None:
+                return None
+            collected |= sealed_ids
+        return collected
+
+    async def _get_sealed_video_ids(self, playlist_id: str) -> frozenset[str] | None:
+        """追加先でなくなったプレイリストの動画IDを取得（取得に成功した内容はプロセス内で再利用）"""
+        video_ids = self._sealed_video_ids.get(playlist_id)
+        if video_ids is None:
+            fetched = await self.list_playlist_video_ids(playlist_id)
+            if fetched is None:
+                return None
+            video_ids = self._sealed_video_ids[playlist_id] = frozenset(fetched)
+        return video_ids
+
+    async def _is_video_in_playlist(self, video_id: str) -> bool:
+        """動画が追加先の系列のいずれかのプレイリストに既に存在するかチェック"""
+        if not self.service:
+            logging.error("YouTube API サービスが初期化されていません")
+            return False
+
+        if self.dry_run and self.dry_run.was_written("youtube", video_id):
+            return True
+
+        playlist_id = await self._target_playlist_id()
+        # 追加先でなくなったプレイリストは内容が変わらないため、毎回走査せず取得済みの動画IDで判定する
+        for sealed_id in self.playlist_series.sealed if self.playlist_series else []:
+            sealed_ids = await self._get_sealed_video_ids(sealed_id)
+            if sealed_ids and video_id in sealed_ids:
+                return True
+
+        def scan() -> bool:
+            http = self._thread_http()
             request = self.service.playlistItems().list(
-                part="snippet",
-                playlistId=self.config.youtube_playlist_id,
+                part="contentDetails",
+                playlistId=playlist_id,
                 maxResults=50,  # 最大50件ずつチェック
+                fields="nextPageToken,items/contentDetails/videoId",
             )
 
             while request is not None:
-                response = request.execute()
+                response = self._execute(request, http=http, num_retries=PAGE_FETCH_RETRIES)
 
                 for item in response.get("items", []):
-                    if item["snippet"]["resourceId"]["videoId"] == video_id:
+                    if item["contentDetails"]["videoId"] == video_id:
                         return True
 
                 request = self.service.playlistItems().list_next(request, response)
 
             return False
 
+        try:
+            # 大きなプレイリストの走査中も他の処理を止めないようスレッドで実行する
+            return await asyncio.to_thread(scan)
+
         except HttpError as e:
             logging.exception(f"プレイリスト重複チェック中にエラー: {e}")
             return False
@@ -185,7 +670,7 @@ class YouTubeService:
                 part="snippet",
                 id=video_id,
             )
-            response = request.execute()
+            response = self._execute(request)
 
             items = response.get("items", [])
             if items:
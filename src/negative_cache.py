@@ -0,0 +1,107 @@
+"""追加できなかった動画・トラックの否定キャッシュモジュール
+
+削除済み・非公開などの理由で追加できなかった楽曲を、楽曲ID（canonical_id）ごとに理由と有効期限付きで
+データベースに記録する。同じリンクが再投稿された場合は、プレイリストの重複走査や失敗する追加を
+行わずにスキップする。投稿ごとにデータベースを参照しないよう有効な記録の写しをメモリに持ち、
+他のプロセスが追加・削除した記録は REFRESH_INTERVAL 秒ごとの再読み込みで反映する。
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from metrics import BotMetrics
+from storage import StorageBackend
+
+# データベースから記録を読み直す間隔（秒）
+REFRESH_INTERVAL = 60.0
+
+
+class NegativeCache:
+    """追加できなかった楽曲の記録クラス"""
+
+    def __init__(
+        self,
+        db_manager: StorageBackend,
+        ttl: float = 7 * 24 * 60 * 60,
+        metrics: Optional[BotMetrics] = None,
+    ) -> None:
+        """否定キャッシュを初期化（ttl は記録の有効期間（秒）、0 以下で記録も参照もしない）"""
+        self.db_manager = db_manager
+        self.ttl = ttl
+        self.metrics = metrics
+        # {楽曲ID: (理由, 有効期限の UNIX 時刻)}
+        self._entries: dict[str, tuple[str, float]] = {}
+        self._loaded_at: Optional[float] = None
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """否定キャッシュが有効か"""
+        return self.ttl > 0
+
+    async def lookup(self, canonical_id: Optional[str]) -> Optional[str]:
+        """楽曲が記録されていれば理由を返す（楽曲IDを特定できない場合や参照に失敗した場合は None）"""
+        if not canonical_id:
+            return None
+        return (await self.lookup_many([canonical_id])).get(canonical_id)
+
+    async def lookup_many(self, canonical_ids: list[str]) -> dict[str, str]:
+        """記録されている楽曲を {楽曲ID: 理由} でまとめて取得"""
+        if not self.enabled or not canonical_ids:
+            return {}
+        await self._refresh_if_stale()
+        now = time.time()
+        reasons = {
+            canonical_id: entry[0]
+            for canonical_id in canonical_ids
+            if (entry := self._entries.get(canonical_id)) and entry[1] > now
+        }
+        if self.metrics and reasons:
+            for canonical_id in reasons:
+                self.metrics.increment("negative_cache_hits_total", service=canonical_id.split(":", 1)[0])
+        return reasons
+
+    async def add(self, canonical_id: Optional[str], service_type: str, reason: str) -> None:
+        """追加できなかった楽曲を記録（記録に失敗しても呼び出し元の処理は続ける）"""
+        if not self.enabled or not canonical_id:
+            return
+        try:
+            await self.db_manager.set_negative_cache(canonical_id, service_type, reason, self.ttl)
+        except Exception as e:
+            logging.exception(f"否定キャッシュの記録に失敗しました: {canonical_id}: {e}")
+            return
+        self._entries[canonical_id] = (reason, time.time() + self.ttl)
+        logging.info(f"追加できない楽曲として記録しました: {canonical_id}（{reason}）")
+        if self.metrics:
+            self.metrics.increment("negative_cache_entries_added_total", service=service_type, reason=reason)
+
+    async def purge(self, canonical_id: Optional[str] = None) -> int:
+        """記録を削除し、削除件数を返す（None で全件）"""
+        deleted = await self.db_manager.delete_negative_cache(canonical_id)
+        if canonical_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(canonical_id, None)
+        logging.info(f"否定キャッシュを削除しました: {canonical_id or '全件'}（{deleted}件）")
+        return deleted
+
+    async def entries(self, limit: int = 20) -> list[dict]:
+        """有効期限内の記録を新しい順に取得"""
+        return await self.db_manager.list_negative_cache(limit)
+
+    async def _refresh_if_stale(self) -> None:
+        """前回の読み込みから REFRESH_INTERVAL 秒以上経っていれば記録を読み直す"""
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < REFRESH_INTERVAL:
+            return
+        async with self._refresh_lock:
+            # 待っている間に他の参照が読み直した場合はそのまま使う
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < REFRESH_INTERVAL:
+                return
+            try:
+                self._entries = await self.db_manager.load_negative_cache()
+            except Exception as e:
+                # 読み込めない場合は手元の記録で判定し、次の間隔まで再試行しない
+                logging.exception(f"否定キャッシュの読み込みに失敗しました: {e}")
+            self._loaded_at = time.monotonic()
@@ -0,0 +1,92 @@
+"""OAuth リダイレクト受信モジュール
+
+ローカルの aiohttp サーバーで認証後のリダイレクトを受け取り、state ごとに登録した
+Future をコールバック内で直接解決する。待機側はポーリングせずに認証コードを受け取れる。
+1つのポートで複数の認証要求（state）を同時に待機できる。
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+
+class OAuthCallbackServer:
+    """state ごとに認証コードを受け渡すOAuthコールバックサーバー"""
+
+    def __init__(self, host: str = "localhost", port: int = 8888, path: str = "/callback") -> None:
+        """コールバックサーバーを初期化"""
+        self.host = host
+        self.port = port
+        self.path = path
+        self._pending: dict[str, asyncio.Future[str]] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> None:
+        """コールバックの待ち受けを開始"""
+        if self._runner:
+            return
+        app = web.Application()
+        app.router.add_get(self.path, self._handle_callback)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        """待ち受けを停止し、待機中の認証要求を中断"""
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "OAuthCallbackServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.stop()
+
+    def expect(self, state: str) -> None:
+        """認証URLを開く前に state を登録（登録前に届いたコールバックは拒否される）"""
+        if state in self._pending:
+            msg = f"同じ state の認証要求が既に待機中です: {state}"
+            raise ValueError(msg)
+        self._pending[state] = asyncio.get_running_loop().create_future()
+
+    async def wait_for_code(self, state: str, timeout: float = 300.0) -> str:
+        """登録した state の認証コードを受け取るまで待機
+
+        タイムアウト時は TimeoutError、認証が拒否された場合は RuntimeError を送出する。
+        """
+        if state not in self._pending:
+            self.expect(state)
+        try:
+            return await asyncio.wait_for(self._pending[state], timeout)
+        finally:
+            self._pending.pop(state, None)
+
+    async def _handle_callback(self, request: web.Request) -> web.Response:
+        """リダイレクトを受け取り、state に対応する Future を解決"""
+        state = request.query.get("state")
+        future = self._pending.get(state) if state else None
+        if future is None or future.done():
+            # 登録していない state は別の認証要求や偽装リクエストのため受け付けない
+            logging.warning("不明な state のOAuthコールバックを拒否しました")
+            return web.Response(text="認証要求が見つかりません。もう一度やり直してください。", status=400)
+
+        if error := request.query.get("error"):
+            description = request.query.get("error_description", "")
+            future.set_exception(RuntimeError(f"認証が拒否されました: {error} {description}".strip()))
+            return web.Response(text="認証がキャンセルされました。このウィンドウを閉じてください。", status=400)
+
+        code = request.query.get("code")
+        if not code:
+            future.set_exception(RuntimeError("コールバックに認証コードが含まれていません"))
+            return web.Response(text="認証失敗", status=400)
+
+        future.set_result(code)
+        return web.Response(text="認証成功！このウィンドウを閉じてください。")
@@ -0,0 +1,156 @@
+"""認証待ちサービスの追加保留モジュール
+
+トークン未取得などで利用できないサービス宛てのURLをデータベースに保留し、
+定期的にトークンファイルを読み直して、認証が済んだサービスの保留分を順に追加する。
+Botの起動は認証を待たずに完了し、認証後に保留分が反映される。
+"""
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional
+
+from playlist_lock import PlaylistLock
+from storage import StorageBackend
+
+
+class PendingAddQueue:
+    """認証待ちサービス向けの追加保留キュー"""
+
+    def __init__(
+        self,
+        db_manager: StorageBackend,
+        services: dict[str, Any],
+        process: Callable[[dict], Awaitable[bool]],
+        interval: float = 60.0,
+        batch_size: int = 50,
+        max_attempts: int = 5,
+        playlist_lock: Optional[PlaylistLock] = None,
+    ) -> None:
+        """保留キューを初期化
+
+        services はサービス種別（"youtube" など）から is_available / initialize() を持つ
+        サービスへの対応、process は保留中の1件を追加して成否を返すコールバック。
+        """
+        self.db_manager = db_manager
+        self.services = services
+        self.process = process
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.playlist_lock = playlist_lock
+
+        self._task: asyncio.Task | None = None
+
+    def is_degraded(self, service_type: str) -> bool:
+        """サービスが設定済みだが認証待ちで利用できないか"""
+        service = self.services.get(service_type)
+        return service is not None and not service.is_available
+
+    async def enqueue(
+        self,
+        guild_id: int,
+        url: str,
+        service_type: str,
+        *,
+        submitter_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+    ) -> bool:
+        """URLを保留キューに追加（既に保留中なら False）"""
+        queued = await self.db_manager.enqueue_pending_add(
+            guild_id,
+            url,
+            service_type,
+            submitter_id=submitter_id,
+            message_id=message_id,
+            channel_id=channel_id,
+        )
+        if queued:
+            logging.info(f"認証待ちのため追加を保留しました: {service_type} {url}")
+        return queued
+
+    def start(self) -> None:
+        """認証状態の再確認タスクを開始"""
+        if self._task:
+            return
+        self._task = asyncio.get_running_loop().create_task(
+            self._run_periodically(),
+            name="pending-adds",
+        )
+
+    async def stop(self) -> None:
+        """認証状態の再確認タスクを停止"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run_periodically(self) -> None:
+        """一定間隔で認証状態を確認し、保留分を追加"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logging.exception(f"保留中URLの処理中にエラーが発生: {e}")
+
+    async def run_once(self) -> int:
+        """認証待ちサービスを再初期化し、利用可能なサービスの保留分を追加（追加件数を返す）"""
+        added = 0
+        for service_type, service in self.services.items():
+            if service is None:
+                continue
+            if not service.is_available:
+                # 別途 `start.py auth` で保存されたトークンを読み直す
+                await service.initialize()
+                if not service.is_available:
+                    continue
+                logging.info(f"{service_type} の認証を確認しました。保留中のURLを追加します")
+            added += await self._drain(service_type)
+        return added
+
+    async def _drain(self, service_type: str) -> int:
+        """サービスの保留分を古い順に追加"""
+        # 複数プロセスが同じ保留分を重複して処理しないよう直列化する
+        guard = (
+            self.playlist_lock.hold(f"pending-adds:{service_type}")
+            if self.playlist_lock
+            else contextlib.nullcontext()
+        )
+        added = 0
+        try:
+            async with guard:
+                while True:
+                    items = await self.db_manager.get_pending_adds(service_type, self.batch_size)
+                    failed = False
+                    for item in items:
+                        if await self.process(item):
+                            await self.db_manager.delete_pending_add(item["id"])
+                            added += 1
+                            continue
+
+                        failed = True
+                        attempts = await self.db_manager.record_pending_add_failure(item["id"])
+                        if attempts >= self.max_attempts:
+                            await self.db_manager.delete_pending_add(item["id"])
+                            logging.error(
+                                f"保留中URLの追加を{attempts}回失敗したため破棄しました: {item['url']}",
+                            )
+                    # 失敗があった場合は次回の確認まで待つ
+                    if failed or len(items) < self.batch_size:
+                        break
+        except TimeoutError as e:
+            logging.warning(f"保留中URLの処理を見送りました: {e}")
+
+        if added:
+            logging.info(f"保留中のURLを{added}件追加しました: {service_type}")
+        return added
+
+    async def counts(self) -> dict[str, int]:
+        """サービスごとの保留件数を取得"""
+        return await self.db_manager.count_pending_adds()
@@ -0,0 +1,135 @@
+"""YouTube プレイリスト取り込みモジュール
+
+投稿されたプレイリストの動画をまとめて収集用プレイリストへ追加する。
+取り込み元は1ページ50件・必要な項目のみで取得し、処理済みかどうかと追加できない動画（否定キャッシュ）は
+データベースへ一括で問い合わせ、
+追加先プレイリスト（上限で切り替えた系列全体）の既存動画も1回の走査で取得する。動画ごとの重複チェックは行わず、
+残った動画だけをレート制限付きのワーカープールから追加する。
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from music_services import YouTubeService
+from negative_cache import NegativeCache
+from playlist_writer import PlaylistWriter
+from processed_url_writer import ProcessedUrlWriter
+from storage import StorageBackend
+
+
+@dataclass
+class ImportResult:
+    """プレイリスト取り込みの結果"""
+
+    total: int = 0
+    added: int = 0
+    already_in_playlist: int = 0
+    already_processed: int = 0
+    # 以前に追加できなかったためスキップした動画数
+    unavailable: int = 0
+    failed: int = 0
+    # 取り込み件数の上限で打ち切った場合は True
+    truncated: bool = False
+
+
+class YouTubePlaylistImporter:
+    """YouTube プレイリストの一括取り込みクラス"""
+
+    def __init__(
+        self,
+        youtube_service: YouTubeService,
+        writer: PlaylistWriter,
+        db_manager: StorageBackend,
+        max_items: int = 5000,
+        url_writer: Optional[ProcessedUrlWriter] = None,
+        negative_cache: Optional[NegativeCache] = None,
+    ) -> None:
+        """取り込みクラスを初期化
+
+        url_writer を渡すと処理済みの記録をまとめてコミットし、
+        negative_cache を渡すと以前に追加できなかった動画を追加せずにスキップする。
+        """
+        self.youtube_service = youtube_service
+        self.writer = writer
+        self.db_manager = db_manager
+        self.max_items = max_items
+        self.url_writer = url_writer
+        self.negative_cache = negative_cache
+
+    async def run(
+        self,
+        playlist_id: str,
+        guild_id: int,
+        *,
+        submitter_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+    ) -> Optional[ImportResult]:
+        """プレイリストを取り込み、結果を返す（プレイリストを取得できない場合は None）"""
+        source_ids = await self.youtube_service.list_playlist_video_ids(playlist_id, limit=self.max_items + 1)
+        if source_ids is None:
+            return None
+
+        result = ImportResult()
+        if len(source_ids) > self.max_items:
+            source_ids = source_ids[:self.max_items]
+            result.truncated = True
+        # 取り込み元で同じ動画が複数回登場しても1回だけ扱う
+        video_ids = list(dict.fromkeys(source_ids))
+        result.total = len(video_ids)
+
+        processed = await self.db_manager.get_processed_canonical_ids(
+            guild_id,
+            [f"youtube:{video_id}" for video_id in video_ids],
+        )
+        candidates = [video_id for video_id in video_ids if f"youtube:{video_id}" not in processed]
+        result.already_processed = len(video_ids) - len(candidates)
+        if self.negative_cache:
+            unavailable = await self.negative_cache.lookup_many([f"youtube:{video_id}" for video_id in candidates])
+            candidates = [video_id for video_id in candidates if f"youtube:{video_id}" not in unavailable]
+            result.unavailable = len(unavailable)
+        if not candidates:
+            return result
+
+        # 上限で切り替えた過去の追加先も含め、系列全体の既存動画を除外する
+        existing = await self.youtube_service.list_collected_video_ids()
+        if existing is None:
+            return None
+
+        metadata = {"submitter_id": submitter_id, "message_id": message_id, "channel_id": channel_id}
+        to_insert = []
+        for video_id in candidates:
+            if video_id in existing:
+                # 追加済みの動画は記録だけ行う（通常の追加と同じ扱い）
+                await self._record(guild_id, video_id, metadata)
+                result.already_in_playlist += 1
+            else:
+                to_insert.append(video_id)
+
+        logging.info(
+            f"プレイリスト取り込み {playlist_id}: {result.total}件中 {len(to_insert)}件を追加します",
+        )
+        successes = await self.writer.submit_many(to_insert, guild_id)
+        for video_id, success in zip(to_insert, successes, strict=True):
+            if success:
+                await self._record(guild_id, video_id, metadata)
+                result.added += 1
+            else:
+                result.failed += 1
+        if self.url_writer:
+            await self.url_writer.flush()
+        return result
+
+    async def _record(self, guild_id: int, video_id: str, metadata: dict) -> None:
+        """追加した動画を処理済みとして記録（url_writer 使用時は取り込みの最後にまとめてコミット）"""
+        record = {
+            "video_id": video_id,
+            "canonical_id": f"youtube:{video_id}",
+            **metadata,
+        }
+        url = f"https://www.youtube.com/watch?v={video_id}"
+        if self.url_writer:
+            await self.url_writer.mark_url_processed(guild_id, url, "youtube", wait=False, **record)
+        else:
+            await self.db_manager.mark_url_processed(guild_id, url, "youtube", **record)
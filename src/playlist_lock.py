@@ -0,0 +1,81 @@
+"""プレイリスト書き込みロックモジュール
+
+複数のBotプロセス（シャード）が同じプレイリストへ同時に書き込まないよう、
+共有データベース上のリース（有効期限付きロック）で重複チェックと追加を直列化する。
+読み込みのみの処理はロックの外で並列に実行できる。
+"""
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from storage import StorageBackend
+
+
+class PlaylistLock:
+    """共有データベースのリースによるプレイリスト単位の排他ロック"""
+
+    def __init__(
+        self,
+        storage: StorageBackend,
+        ttl: float = 30.0,
+        timeout: float = 120.0,
+        retry_interval: float = 0.2,
+    ) -> None:
+        """ロックを初期化"""
+        self.storage = storage
+        self.ttl = ttl
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        # プロセスを識別するリース保持者ID
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        # 同一プロセス内のタスク同士はリースを共有するため、ローカルロックでも直列化する
+        self._local_locks: dict[str, asyncio.Lock] = {}
+
+    @asynccontextmanager
+    async def hold(self, name: str) -> AsyncIterator[None]:
+        """リースを取得し、ブロックを抜けるまで保持する"""
+        local_lock = self._local_locks.setdefault(name, asyncio.Lock())
+        async with local_lock:
+            await self._acquire(name)
+            keep_alive = asyncio.create_task(self._keep_alive(name), name=f"lease-{name}")
+            try:
+                yield
+            finally:
+                keep_alive.cancel()
+                try:
+                    await keep_alive
+                except asyncio.CancelledError:
+                    pass
+                try:
+                    await self.storage.release_lease(name, self.holder)
+                except Exception as e:
+                    # 解放に失敗してもTTL経過後に他プロセスが取得できる
+                    logging.exception(f"プレイリストロックの解放に失敗: {name}: {e}")
+
+    async def _acquire(self, name: str) -> None:
+        """リースを取得できるまで待機"""
+        deadline = time.monotonic() + self.timeout
+        while not await self.storage.acquire_lease(name, self.holder, self.ttl):
+            if time.monotonic() >= deadline:
+                msg = f"プレイリストロックを{self.timeout}秒以内に取得できませんでした: {name}"
+                raise TimeoutError(msg)
+            # 複数プロセスが同時に再試行しないよう待機時間をばらつかせる
+            await asyncio.sleep(self.retry_interval * random.uniform(0.5, 1.5))
+
+    async def _keep_alive(self, name: str) -> None:
+        """処理がTTLを超えても他プロセスに奪われないよう定期的にリースを延長"""
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                if not await self.storage.acquire_lease(name, self.holder, self.ttl):
+                    logging.warning(f"プレイリストロックの延長に失敗しました: {name}")
+            except Exception as e:
+                logging.exception(f"プレイリストロックの延長中にエラー: {name}: {e}")
@@ -0,0 +1,129 @@
+"""追加先プレイリストの系列モジュール
+
+YouTube のプレイリストに登録できる動画数には上限がある。収集用プレイリストの動画数が上限に近づいたら、
+設定された後続のプレイリスト（使い切った場合は新規作成したもの）へ追加先を切り替える。
+系列と各プレイリストの動画数はデータベースに記録し、複数プロセスで同じ追加先を使う。
+系列内で position が最大のプレイリストが現在の追加先で、それより前のプレイリストには追加しない。
+"""
+
+import logging
+from typing import Optional
+
+from metrics import BotMetrics
+from storage import StorageBackend
+
+
+class PlaylistSeries:
+    """追加先プレイリストの系列クラス"""
+
+    def __init__(
+        self,
+        db_manager: StorageBackend,
+        series_id: str,
+        successors: Optional[list[str]] = None,
+        max_items: int = 4900,
+        metrics: Optional[BotMetrics] = None,
+        service_type: str = "youtube",
+    ) -> None:
+        """系列を初期化
+
+        series_id は系列の最初のプレイリストID、successors はその後に順に使うプレイリストID。
+        """
+        self.db_manager = db_manager
+        self.series_id = series_id
+        self.successors = successors or []
+        self.max_items = max_items
+        self.metrics = metrics
+        self.service_type = service_type
+        # データベースから読み込んだ [{position, playlist_id, item_count}]（position 順）
+        self._playlists: list[dict] = []
+
+    @property
+    def loaded(self) -> bool:
+        """データベースから読み込み済みか"""
+        return bool(self._playlists)
+
+    @property
+    def active(self) -> str:
+        """現在の追加先プレイリストID"""
+        return self._playlists[-1]["playlist_id"] if self._playlists else self.series_id
+
+    @property
+    def active_item_count(self) -> int:
+        """現在の追加先プレイリストの動画数"""
+        return self._playlists[-1]["item_count"] if self._playlists else 0
+
+    @property
+    def sealed(self) -> list[str]:
+        """上限に達して追加先でなくなったプレイリストID（新しい順）"""
+        return [playlist["playlist_id"] for playlist in reversed(self._playlists[:-1])]
+
+    @property
+    def is_full(self) -> bool:
+        """現在の追加先の動画数が切り替えの基準に達しているか"""
+        return self.active_item_count >= self.max_items
+
+    @property
+    def next_position(self) -> int:
+        """次に追加先とするプレイリストの位置"""
+        return self._playlists[-1]["position"] + 1 if self._playlists else 0
+
+    def successor(self, position: int) -> Optional[str]:
+        """position 番目に使うよう設定されたプレイリストID（設定がなければ None）"""
+        index = position - 1
+        return self.successors[index] if 0 <= index < len(self.successors) else None
+
+    async def load(self) -> None:
+        """系列を読み込む（未登録の場合は最初のプレイリストを登録）"""
+        playlists = await self.db_manager.get_playlist_series(self.series_id)
+        if not playlists:
+            await self.db_manager.add_playlist_to_series(self.series_id, 0, self.series_id)
+            playlists = await self.db_manager.get_playlist_series(self.series_id)
+        self._playlists = playlists
+        self._update_gauge()
+
+    async def activate(self, position: int, playlist_id: str, item_count: int = 0) -> bool:
+        """position 番目のプレイリストを追加先にする（他のプロセスが先に切り替えていた場合は False）"""
+        activated = await self.db_manager.add_playlist_to_series(self.series_id, position, playlist_id, item_count)
+        await self.load()
+        if activated:
+            logging.info(
+                f"プレイリストの追加先を切り替えました: {self.series_id} の {position + 1}番目 {playlist_id}",
+            )
+            if self.metrics:
+                self.metrics.increment("playlist_rollovers_total", service=self.service_type)
+        return activated
+
+    async def record_added(self, playlist_id: str, count: int = 1) -> None:
+        """追加した動画数を記録"""
+        if count <= 0:
+            return
+        total = await self.db_manager.add_playlist_item_count(self.series_id, playlist_id, count)
+        self._set_local_count(playlist_id, total)
+
+    async def set_item_count(self, playlist_id: str, count: int) -> None:
+        """プレイリストの動画数を実際の値に合わせる"""
+        await self.db_manager.set_playlist_item_count(self.series_id, playlist_id, count)
+        self._set_local_count(playlist_id, count)
+
+    async def mark_full(self, playlist_id: str) -> None:
+        """上限に達して追加できなかったプレイリストを切り替え対象にする"""
+        logging.warning(f"プレイリストが動画数の上限に達しています: {playlist_id}")
+        current = next(
+            (playlist["item_count"] for playlist in self._playlists if playlist["playlist_id"] == playlist_id),
+            0,
+        )
+        await self.set_item_count(playlist_id, max(current, self.max_items))
+
+    def _set_local_count(self, playlist_id: str, count: int) -> None:
+        """読み込み済みの動画数を更新"""
+        for playlist in self._playlists:
+            if playlist["playlist_id"] == playlist_id:
+                playlist["item_count"] = count
+        self._update_gauge()
+
+    def _update_gauge(self) -> None:
+        """現在の追加先の位置と動画数をメトリクスに記録"""
+        if self.metrics and self._playlists:
+            self.metrics.set_gauge("playlist_series_position", self._playlists[-1]["position"], service=self.service_type)
+            self.metrics.set_gauge("playlist_active_items", self.active_item_count, service=self.service_type)
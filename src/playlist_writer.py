@@ -0,0 +1,198 @@
+"""プレイリスト書き込みワーカープールモジュール
+
+書き込み要求をキューに入れ、固定数のワーカーが送信レートの上限を守りながら実行する。
+プレイリストの取り込みなどで大量の追加が発生しても、APIのレート制限に達しないよう平準化する。
+一括書き込み関数を渡すと、キューに溜まった要求をまとめて1回の呼び出し（HTTPバッチ）で送信する。
+スケジューラーを渡すと、送信ごとに要求元サーバーの一括処理用の実行枠を取得し、投稿されたURLの追加を優先させる。
+一度に取り出した要求はサーバーごとに分けて送信するため、サーバーごとの同時実行数の上限も守られる。
+キューはサーバーごとの重みに応じた公平キューで、1つのサーバーの大量取り込みが他のサーバーを待たせない。
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Optional
+
+from fair_queue import FairQueue
+from metrics import BotMetrics
+from priority_scheduler import BULK, NO_GUILD, PriorityScheduler
+
+
+class PlaylistWriter:
+    """レート制限付きのプレイリスト書き込みワーカープール"""
+
+    def __init__(
+        self,
+        name: str,
+        write: Callable[[str], Awaitable[bool]],
+        workers: int = 4,
+        rate: float = 5.0,
+        metrics: Optional[BotMetrics] = None,
+        write_batch: Optional[Callable[[list[str]], Awaitable[list[bool]]]] = None,
+        batch_size: int = 50,
+        batch_linger: float = 0.05,
+        scheduler: Optional[PriorityScheduler] = None,
+        lane: str = BULK,
+    ) -> None:
+        """ワーカープールを初期化
+
+        write は1件を書き込んで成否を返すコルーチン関数、rate は1秒あたりの最大送信数（0 で無制限）。
+        write_batch は複数件を書き込んで入力と同じ順で成否を返すコルーチン関数で、
+        指定した場合は最大 batch_size 件を batch_linger 秒まで待ってまとめて送信する。
+        scheduler を指定した場合は、送信のたびにサービス名 name の lane の実行枠を取得する。
+        """
+        self.name = name
+        self.write = write
+        self.workers = workers
+        self.rate = rate
+        self.metrics = metrics
+        self.write_batch = write_batch
+        self.batch_size = batch_size if write_batch else 1
+        self.batch_linger = batch_linger
+        self.scheduler = scheduler
+        self.lane = lane
+
+        self._queue: FairQueue[tuple[str, asyncio.Future[bool]]] = FairQueue(
+            scheduler.share if scheduler else lambda guild_id: 1.0,
+        )
+        self._tasks: list[asyncio.Task] = []
+        self._rate_lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    def start(self) -> None:
+        """ワーカーを起動"""
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._tasks = [
+            loop.create_task(self._run_worker(), name=f"playlist-writer-{self.name}-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """ワーカーを停止し、未処理の要求を取り消す"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+        while not self._queue.empty():
+            _, (_, future), _ = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+        self._update_queue_depth()
+
+    async def submit(self, item: str, guild_id: Optional[int] = None) -> bool:
+        """1件の書き込みをサーバー guild_id の要求としてキューに入れ、完了まで待機して成否を返す"""
+        if not self._tasks:
+            self.start()
+        future: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(guild_id or NO_GUILD, (item, future))
+        self._update_queue_depth()
+        return await future
+
+    async def submit_many(self, items: Iterable[str], guild_id: Optional[int] = None) -> list[bool]:
+        """複数の書き込みをまとめてキューに入れ、入力と同じ順で成否を返す"""
+        return list(await asyncio.gather(*(self.submit(item, guild_id) for item in items)))
+
+    async def _run_worker(self) -> None:
+        """キューから取り出した書き込みを順に実行"""
+        while True:
+            batches: dict[int, list[tuple[str, asyncio.Future[bool]]]] = {}
+            for guild_id, (item, future) in await self._next_batch():
+                if not future.cancelled():
+                    batches.setdefault(guild_id, []).append((item, future))
+            # サーバーごとの同時実行数の上限を守るよう、サーバーごとに分けてそれぞれの実行枠で送信する
+            await asyncio.gather(*(self._send(guild_id, batch) for guild_id, batch in batches.items()))
+
+    async def _send(self, guild_id: int, batch: list[tuple[str, asyncio.Future[bool]]]) -> None:
+        """サーバー guild_id の書き込みをまとめて送信し、結果を待機中の要求に返す"""
+        await self._throttle(len(batch))
+        items = [item for item, _ in batch]
+        try:
+            async with self._slot(guild_id):
+                if len(items) == 1:
+                    results = [await self.write(items[0])]
+                else:
+                    results = await self.write_batch(items)
+            if len(results) != len(items):
+                msg = f"一括書き込みの結果数が要求数と一致しません: {len(results)}/{len(items)}"
+                raise ValueError(msg)
+        except Exception as e:
+            logging.exception(f"プレイリスト書き込み中にエラーが発生: {self.name} {items}: {e}")
+            results = [False] * len(items)
+
+        for (_, future), result in zip(batch, results, strict=True):
+            if self.metrics:
+                self.metrics.increment(
+                    "playlist_writes_total",
+                    service=self.name,
+                    result="success" if result else "failure",
+                )
+            if not future.done():
+                future.set_result(result)
+        if self.metrics and len(items) > 1:
+            self.metrics.increment("playlist_write_batches_total", service=self.name)
+
+    async def _next_batch(self) -> list[tuple[int, tuple[str, asyncio.Future[bool]]]]:
+        """次に送信する要求を (サーバーID, 要求) で取り出す（一括書き込み時は後続の要求を少し待ってまとめる）"""
+        entries = [await self._queue.get()]
+        deadline = time.monotonic() + self.batch_linger
+        try:
+            while len(entries) < self.batch_size:
+                try:
+                    entries.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entries.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # 停止時に取り出し済みの要求を待機させたままにしない
+            for _, (_, future), _ in entries:
+                if not future.done():
+                    future.cancel()
+            raise
+
+        self._update_queue_depth()
+        if self.metrics:
+            now = time.monotonic()
+            for guild_id, _, enqueued_at in entries:
+                if guild_id != NO_GUILD:
+                    labels = {"guild": guild_id, "service": self.name, "stage": "writer"}
+                    self.metrics.increment("guild_queue_waits_total", **labels)
+                    self.metrics.increment("guild_queue_wait_seconds_total", now - enqueued_at, **labels)
+        return [(guild_id, request) for guild_id, request, _ in entries]
+
+    def _slot(self, guild_id: int) -> contextlib.AbstractAsyncContextManager:
+        """サーバー guild_id のスケジューラーの実行枠（未設定の場合は何もしない）"""
+        if self.scheduler:
+            return self.scheduler.slot(self.name, self.lane, guild_id)
+        return contextlib.nullcontext()
+
+    async def _throttle(self, count: int = 1) -> None:
+        """送信間隔が count/rate 秒以上空くまで待機"""
+        if self.rate <= 0:
+            return
+        async with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + count / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _update_queue_depth(self) -> None:
+        """待機中の書き込み数をメトリクスに記録"""
+        if self.metrics:
+            self.metrics.set_gauge("playlist_write_queue_depth", self._queue.qsize(), service=self.name)
@@ -0,0 +1,681 @@
+"""PostgreSQLデータベース管理モジュール
+
+複数のBotプロセス（シャード）から同じ重複チェック用データを共有するためのストレージ実装。
+asyncpg はオプション依存のため、このモジュールを使う場合のみ必要となる。
+"""
+
+import logging
+from typing import Any, Optional
+
+from storage import ProcessedUrl, StorageBackend
+
+# マイグレーションを複数プロセスで同時に実行しないためのアドバイザリロックキー
+MIGRATION_LOCK_KEY = 7_340_912_001
+
+# PostgreSQL用マイグレーション（バージョン, 説明, SQL）
+MIGRATIONS: list[tuple[int, str, str]] = [
+    (1, "初期スキーマ", """
+        CREATE TABLE IF NOT EXISTS server_settings (
+            guild_id BIGINT PRIMARY KEY,
+            monitored_channel_id BIGINT,
+            notification_channel_id BIGINT,
+            created_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc'),
+            updated_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc'),
+            retention_days INTEGER
+        );
+
+        CREATE TABLE IF NOT EXISTS processed_urls (
+            id BIGSERIAL PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            url TEXT NOT NULL,
+            service_type TEXT NOT NULL,
+            video_id TEXT,
+            title TEXT,
+            processed_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            canonical_id TEXT,
+            submitter_id BIGINT,
+            message_id BIGINT,
+            channel_id BIGINT,
+            UNIQUE (guild_id, url)
+        );
+
+        -- 「最初の投稿者」「ユーザーの投稿一覧」「チャンネルの期間内リンク」用のカバリングインデックス
+        CREATE INDEX IF NOT EXISTS idx_processed_urls_guild_canonical
+        ON processed_urls(guild_id, canonical_id, processed_at)
+        INCLUDE (submitter_id, message_id, channel_id);
+
+        CREATE INDEX IF NOT EXISTS idx_processed_urls_guild_submitter
+        ON processed_urls(guild_id, submitter_id, processed_at)
+        INCLUDE (url, service_type);
+
+        CREATE INDEX IF NOT EXISTS idx_processed_urls_guild_channel
+        ON processed_urls(guild_id, channel_id, processed_at)
+        INCLUDE (url, submitter_id);
+
+        -- 保持期間による削除用のインデックス
+        CREATE INDEX IF NOT EXISTS idx_processed_urls_guild_processed_at
+        ON processed_urls(guild_id, processed_at);
+
+        -- 統計集計テーブル
+        CREATE TABLE IF NOT EXISTS guild_daily_stats (
+            guild_id BIGINT NOT NULL,
+            day DATE NOT NULL,
+            service_type TEXT NOT NULL,
+            add_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, day, service_type)
+        );
+
+        CREATE TABLE IF NOT EXISTS guild_service_totals (
+            guild_id BIGINT NOT NULL,
+            service_type TEXT NOT NULL,
+            add_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, service_type)
+        );
+
+        CREATE TABLE IF NOT EXISTS guild_submitter_stats (
+            guild_id BIGINT NOT NULL,
+            submitter_id BIGINT NOT NULL,
+            add_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, submitter_id)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_guild_submitter_stats_count
+        ON guild_submitter_stats(guild_id, add_count);
+
+        -- processed_urls への新規挿入時に集計を加算（ON CONFLICT DO NOTHING で無視された行は対象外）
+        CREATE OR REPLACE FUNCTION processed_urls_update_stats() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO guild_daily_stats (guild_id, day, service_type, add_count)
+            VALUES (NEW.guild_id, NEW.processed_at::date, NEW.service_type, 1)
+            ON CONFLICT (guild_id, day, service_type) DO UPDATE SET
+                add_count = guild_daily_stats.add_count + 1;
+
+            INSERT INTO guild_service_totals (guild_id, service_type, add_count)
+            VALUES (NEW.guild_id, NEW.service_type, 1)
+            ON CONFLICT (guild_id, service_type) DO UPDATE SET
+                add_count = guild_service_totals.add_count + 1;
+
+            IF NEW.submitter_id IS NOT NULL THEN
+                INSERT INTO guild_submitter_stats (guild_id, submitter_id, add_count)
+                VALUES (NEW.guild_id, NEW.submitter_id, 1)
+                ON CONFLICT (guild_id, submitter_id) DO UPDATE SET
+                    add_count = guild_submitter_stats.add_count + 1;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS trg_processed_urls_stats ON processed_urls;
+        CREATE TRIGGER trg_processed_urls_stats
+        AFTER INSERT ON processed_urls
+        FOR EACH ROW EXECUTE FUNCTION processed_urls_update_stats();
+    """),
+    (2, "プレイリスト書き込みリース", """
+        -- 複数プロセス間でプレイリスト書き込みを直列化するリース
+        CREATE TABLE IF NOT EXISTS playlist_leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL
+        );
+    """),
+    (3, "認証待ちの追加保留キュー", """
+        -- 認証待ちのサービスに追加できなかったURLの保留キュー
+        CREATE TABLE IF NOT EXISTS pending_adds (
+            id BIGSERIAL PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            url TEXT NOT NULL,
+            service_type TEXT NOT NULL,
+            submitter_id BIGINT,
+            message_id BIGINT,
+            channel_id BIGINT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            queued_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            UNIQUE (guild_id, url)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_pending_adds_service
+        ON pending_adds (service_type, id);
+    """),
+    (4, "サーバーごとの書き込み配分", """
+        -- 公平スケジューリングの重みと同時実行数の上限（NULL は既定値）
+        ALTER TABLE server_settings
+            ADD COLUMN IF NOT EXISTS write_share INTEGER,
+            ADD COLUMN IF NOT EXISTS write_concurrency INTEGER;
+    """),
+    (5, "追加できなかった動画・トラックの否定キャッシュ", """
+        -- 削除済み・非公開などで追加できなかった楽曲（期限切れの行は定期メンテナンスで削除）
+        CREATE TABLE IF NOT EXISTS negative_cache (
+            canonical_id TEXT PRIMARY KEY,
+            service_type TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            failed_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            expires_at TIMESTAMPTZ NOT NULL
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_negative_cache_expires_at
+        ON negative_cache (expires_at);
+    """),
+    (6, "追加先プレイリストの系列", """
+        -- 上限に達したプレイリストの後続を含む追加先（position が最大の行が現在の追加先）
+        CREATE TABLE IF NOT EXISTS playlist_series (
+            series_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            playlist_id TEXT NOT NULL,
+            item_count INTEGER NOT NULL DEFAULT 0,
+            activated_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            PRIMARY KEY (series_id, position)
+        );
+    """),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# SQLite 実装と同じ文字列形式で日時を返す
+TIMESTAMP_FORMAT = "YYYY-MM-DD HH24:MI:SS"
+
+
+class PostgresDatabaseManager(StorageBackend):
+    """データベース管理クラス（PostgreSQL）"""
+
+    def __init__(self, dsn: str, min_pool_size: int = 1, max_pool_size: int = 10) -> None:
+        """データベースマネージャーを初期化"""
+        self.dsn = dsn
+        self.min_pool_size = min_pool_size
+        self.max_pool_size = max_pool_size
+        self.pool: Any = None
+
+    async def initialize(self) -> None:
+        """接続プールを作成し、未適用のマイグレーションを適用"""
+        try:
+            import asyncpg
+        except ImportError as e:
+            msg = (
+                "PostgreSQLストレージには asyncpg が必要です。"
+                "`uv sync --extra postgres` でインストールしてください"
+            )
+            raise RuntimeError(msg) from e
+
+        self.pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=self.min_pool_size,
+            max_size=self.max_pool_size,
+        )
+        version = await self._run_migrations()
+        logging.info(f"PostgreSQLデータベースを初期化しました（スキーマバージョン: {version}）")
+
+    async def _run_migrations(self) -> int:
+        """未適用のマイグレーションを順に適用"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # 複数シャードが同時に起動しても1プロセスずつ適用する
+                await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK_KEY)
+                await conn.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        id INTEGER PRIMARY KEY CHECK (id = 1),
+                        version INTEGER NOT NULL
+                    )
+                """)
+
+            current_version = 0
+            for version, description, sql in MIGRATIONS:
+                async with conn.transaction():
+                    await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK_KEY)
+                    current_version = await conn.fetchval(
+                        "SELECT version FROM schema_version WHERE id = 1",
+                    ) or 0
+                    if current_version > LATEST_VERSION:
+                        msg = (
+                            f"データベースのスキーマバージョン({current_version})が"
+                            f"このBotの対応バージョン({LATEST_VERSION})より新しいため起動できません"
+                        )
+                        raise RuntimeError(msg)
+                    if version <= current_version:
+                        continue
+
+                    await conn.execute(sql)
+                    await conn.execute("""
+                        INSERT INTO schema_version (id, version) VALUES (1, $1)
+                        ON CONFLICT (id) DO UPDATE SET version = excluded.version
+                    """, version)
+                    current_version = version
+                    logging.info(f"マイグレーション v{version}（{description}）を適用しました")
+
+            return current_version
+
+    async def close(self) -> None:
+        """接続プールを閉じる"""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+
+    async def ping(self) -> None:
+        """ストレージに問い合わせできるか確認（できない場合は例外を送出）"""
+        if not self.pool:
+            msg = "接続プールが初期化されていません"
+            raise RuntimeError(msg)
+        await self.pool.fetchval("SELECT 1")
+
+    async def set_monitored_channel(self, guild_id: int, channel_id: int) -> None:
+        """監視対象チャンネルを設定"""
+        await self.pool.execute("""
+            INSERT INTO server_settings (guild_id, monitored_channel_id)
+            VALUES ($1, $2)
+            ON CONFLICT (guild_id) DO UPDATE SET
+                monitored_channel_id = excluded.monitored_channel_id,
+                updated_at = now() AT TIME ZONE 'utc'
+        """, guild_id, channel_id)
+        logging.info(f"Guild {guild_id}: 監視チャンネル設定 -> {channel_id}")
+
+    async def get_monitored_channel(self, guild_id: int) -> Optional[int]:
+        """監視対象チャンネルを取得"""
+        return await self.pool.fetchval("""
+            SELECT monitored_channel_id FROM server_settings WHERE guild_id = $1
+        """, guild_id) or None
+
+    async def get_monitored_channel_ids(self) -> set[int]:
+        """全サーバーの監視対象チャンネルIDを取得"""
+        rows = await self.pool.fetch("""
+            SELECT monitored_channel_id FROM server_settings
+            WHERE monitored_channel_id IS NOT NULL
+        """)
+        return {row["monitored_channel_id"] for row in rows}
+
+    async def set_notification_channel(self, guild_id: int, channel_id: Optional[int]) -> None:
+        """通知チャンネルを設定"""
+        await self.pool.execute("""
+            INSERT INTO server_settings (guild_id, notification_channel_id)
+            VALUES ($1, $2)
+            ON CONFLICT (guild_id) DO UPDATE SET
+                notification_channel_id = excluded.notification_channel_id,
+                updated_at = now() AT TIME ZONE 'utc'
+        """, guild_id, channel_id)
+        logging.info(f"Guild {guild_id}: 通知チャンネル設定 -> {channel_id}")
+
+    async def get_notification_channel(self, guild_id: int) -> Optional[int]:
+        """通知チャンネルを取得"""
+        return await self.pool.fetchval("""
+            SELECT notification_channel_id FROM server_settings WHERE guild_id = $1
+        """, guild_id) or None
+
+    async def is_url_processed(self, guild_id: int, url: str) -> bool:
+        """URLが既に処理済みかチェック"""
+        row = await self.pool.fetchval("""
+            SELECT 1 FROM processed_urls WHERE guild_id = $1 AND url = $2
+        """, guild_id, url)
+        return row is not None
+
+    async def get_processed_canonical_ids(self, guild_id: int, canonical_ids: list[str]) -> set[str]:
+        """指定した楽曲IDのうち処理済みのものをまとめて取得"""
+        rows = await self.pool.fetch("""
+            SELECT DISTINCT canonical_id FROM processed_urls
+            WHERE guild_id = $1 AND canonical_id = ANY($2::text[])
+        """, guild_id, canonical_ids)
+        return {row["canonical_id"] for row in rows}
+
+    async def mark_url_processed(
+        self,
+        guild_id: int,
+        url: str,
+        service_type: str,
+        video_id: Optional[str] = None,
+        title: Optional[str] = None,
+        *,
+        canonical_id: Optional[str] = None,
+        submitter_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+    ) -> None:
+        """URLを処理済みとしてマーク"""
+        await self.pool.execute("""
+            INSERT INTO processed_urls
+            (guild_id, url, service_type, video_id, title,
+             canonical_id, submitter_id, message_id, channel_id)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+            ON CONFLICT (guild_id, url) DO NOTHING
+        """, guild_id, url, service_type, video_id, title,
+            canonical_id, submitter_id, message_id, channel_id)
+
+    async def mark_urls_processed(self, records: list[ProcessedUrl]) -> None:
+        """複数のURLを1つのトランザクションで処理済みとしてマーク"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany("""
+                    INSERT INTO processed_urls
+                    (guild_id, url, service_type, video_id, title,
+                     canonical_id, submitter_id, message_id, channel_id)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+                    ON CONFLICT (guild_id, url) DO NOTHING
+                """, records)
+
+    async def get_first_submission(self, guild_id: int, canonical_id: str) -> Optional[dict]:
+        """楽曲を最初に投稿したユーザー情報を取得"""
+        row = await self.pool.fetchrow(f"""
+            SELECT submitter_id, message_id, channel_id,
+                   to_char(processed_at, '{TIMESTAMP_FORMAT}') AS processed_at
+            FROM processed_urls
+            WHERE guild_id = $1 AND canonical_id = $2
+            ORDER BY processed_urls.processed_at
+            LIMIT 1
+        """, guild_id, canonical_id)
+        return dict(row) if row else None
+
+    async def get_user_submissions(
+        self,
+        guild_id: int,
+        submitter_id: int,
+        limit: int = 20,
+    ) -> list[dict]:
+        """ユーザーの投稿履歴を新しい順に取得"""
+        rows = await self.pool.fetch(f"""
+            SELECT url, service_type,
+                   to_char(processed_at, '{TIMESTAMP_FORMAT}') AS processed_at
+            FROM processed_urls
+            WHERE guild_id = $1 AND submitter_id = $2
+            ORDER BY processed_urls.processed_at DESC
+            LIMIT $3
+        """, guild_id, submitter_id, limit)
+        return [dict(row) for row in rows]
+
+    async def get_channel_urls_since(
+        self,
+        guild_id: int,
+        channel_id: int,
+        since: str,
+    ) -> list[dict]:
+        """チャンネルで指定日時（UTC, YYYY-MM-DD HH:MM:SS）以降に投稿されたURLを取得"""
+        rows = await self.pool.fetch(f"""
+            SELECT url, submitter_id,
+                   to_char(processed_at, '{TIMESTAMP_FORMAT}') AS processed_at
+            FROM processed_urls
+            WHERE guild_id = $1 AND channel_id = $2 AND processed_urls.processed_at >= $3::text::timestamp
+            ORDER BY processed_urls.processed_at
+        """, guild_id, channel_id, since)
+        return [dict(row) for row in rows]
+
+    async def get_server_settings(self, guild_id: int) -> dict:
+        """サーバー設定を取得"""
+        row = await self.pool.fetchrow("""
+            SELECT monitored_channel_id, notification_channel_id, retention_days,
+                   write_share, write_concurrency
+            FROM server_settings WHERE guild_id = $1
+        """, guild_id)
+
+        if row:
+            return dict(row)
+        return {
+            "monitored_channel_id": None,
+            "notification_channel_id": None,
+            "retention_days": None,
+            "write_share": None,
+            "write_concurrency": None,
+        }
+
+    async def get_guild_stats(self, guild_id: int, days: int = 7) -> dict:
+        """集計テーブルからサーバーの追加統計を取得"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT service_type, add_count FROM guild_service_totals
+                WHERE guild_id = $1
+            """, guild_id)
+            totals = {row["service_type"]: row["add_count"] for row in rows}
+
+            rows = await conn.fetch("""
+                SELECT to_char(day, 'YYYY-MM-DD') AS day, service_type, add_count
+                FROM guild_daily_stats
+                WHERE guild_id = $1 AND day >= (now() AT TIME ZONE 'utc')::date - ($2::int - 1)
+                ORDER BY guild_daily_stats.day DESC
+            """, guild_id, days)
+            daily: dict[str, dict[str, int]] = {}
+            for row in rows:
+                daily.setdefault(row["day"], {})[row["service_type"]] = row["add_count"]
+
+            rows = await conn.fetch("""
+                SELECT submitter_id, add_count FROM guild_submitter_stats
+                WHERE guild_id = $1
+                ORDER BY add_count DESC
+                LIMIT 5
+            """, guild_id)
+            top_submitters = [(row["submitter_id"], row["add_count"]) for row in rows]
+
+        return {
+            "totals": totals,
+            "daily": daily,
+            "top_submitters": top_submitters,
+        }
+
+    async def set_retention_days(self, guild_id: int, days: Optional[int]) -> None:
+        """URL履歴の保持日数を設定（None でデフォルトに戻す）"""
+        await self.pool.execute("""
+            INSERT INTO server_settings (guild_id, retention_days)
+            VALUES ($1, $2)
+            ON CONFLICT (guild_id) DO UPDATE SET
+                retention_days = excluded.retention_days,
+                updated_at = now() AT TIME ZONE 'utc'
+        """, guild_id, days)
+        logging.info(f"Guild {guild_id}: URL履歴保持日数設定 -> {days}")
+
+    async def set_write_allocation(
+        self,
+        guild_id: int,
+        share: Optional[int],
+        concurrency: Optional[int],
+    ) -> None:
+        """書き込みの重みと同時実行数の上限を設定（None で既定値に戻す）"""
+        await self.pool.execute("""
+            INSERT INTO server_settings (guild_id, write_share, write_concurrency)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (guild_id) DO UPDATE SET
+                write_share = excluded.write_share,
+                write_concurrency = excluded.write_concurrency,
+                updated_at = now() AT TIME ZONE 'utc'
+        """, guild_id, share, concurrency)
+        logging.info(f"Guild {guild_id}: 書き込み配分設定 -> 重み {share} / 同時実行数 {concurrency}")
+
+    async def get_write_allocations(self) -> dict[int, tuple[Optional[int], Optional[int]]]:
+        """書き込み配分を個別に設定したサーバーの (重み, 同時実行数の上限) を取得"""
+        rows = await self.pool.fetch("""
+            SELECT guild_id, write_share, write_concurrency FROM server_settings
+            WHERE write_share IS NOT NULL OR write_concurrency IS NOT NULL
+        """)
+        return {row["guild_id"]: (row["write_share"], row["write_concurrency"]) for row in rows}
+
+    async def get_retention_targets(self, default_days: int) -> list[tuple[int, int]]:
+        """URL履歴を持つ各サーバーの保持日数を取得（0 は無期限）"""
+        rows = await self.pool.fetch("""
+            SELECT DISTINCT t.guild_id, COALESCE(s.retention_days, $1) AS retention_days
+            FROM guild_service_totals AS t
+            LEFT JOIN server_settings AS s ON s.guild_id = t.guild_id
+        """, default_days)
+        return [
+            (row["guild_id"], row["retention_days"])
+            for row in rows
+            if row["retention_days"] > 0
+        ]
+
+    async def delete_expired_urls(self, guild_id: int, days: int, batch_size: int) -> int:
+        """保持期間を過ぎたURL履歴を最大 batch_size 件削除し、削除件数を返す"""
+        status = await self.pool.execute("""
+            DELETE FROM processed_urls
+            WHERE id IN (
+                SELECT id FROM processed_urls
+                WHERE guild_id = $1
+                  AND processed_at < (now() AT TIME ZONE 'utc') - make_interval(days => $2)
+                LIMIT $3
+            )
+        """, guild_id, days, batch_size)
+        # コマンドタグ "DELETE <件数>" から削除件数を取得
+        return int(status.split()[-1])
+
+    async def incremental_vacuum(self, pages: int = 0) -> None:
+        """削除で生じた不要領域を再利用可能にする（pages は SQLite 専用のため無視）"""
+        await self.pool.execute("VACUUM processed_urls")
+
+    async def analyze(self) -> None:
+        """クエリプランナー用の統計情報を更新"""
+        await self.pool.execute("ANALYZE processed_urls")
+
+    async def acquire_lease(self, name: str, holder: str, ttl: float) -> bool:
+        """リースを取得または延長（他の保持者の有効なリースがある場合は False）"""
+        # 各プロセスの時計ではなくデータベースの時刻で有効期限を判定する
+        row = await self.pool.fetchval("""
+            INSERT INTO playlist_leases (name, holder, expires_at)
+            VALUES ($1, $2, clock_timestamp() + make_interval(secs => $3))
+            ON CONFLICT (name) DO UPDATE SET
+                holder = excluded.holder,
+                expires_at = excluded.expires_at
+            WHERE playlist_leases.holder = excluded.holder
+               OR playlist_leases.expires_at <= clock_timestamp()
+            RETURNING holder
+        """, name, holder, float(ttl))
+        return row is not None
+
+    async def release_lease(self, name: str, holder: str) -> None:
+        """保持しているリースを解放"""
+        await self.pool.execute("""
+            DELETE FROM playlist_leases WHERE name = $1 AND holder = $2
+        """, name, holder)
+
+    async def enqueue_pending_add(
+        self,
+        guild_id: int,
+        url: str,
+        service_type: str,
+        *,
+        submitter_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+    ) -> bool:
+        """認証待ちのURLを保留キューに追加（既に保留中なら False）"""
+        row = await self.pool.fetchval("""
+            INSERT INTO pending_adds
+                (guild_id, url, service_type, submitter_id, message_id, channel_id)
+            VALUES ($1, $2, $3, $4, $5, $6)
+            ON CONFLICT (guild_id, url) DO NOTHING
+            RETURNING id
+        """, guild_id, url, service_type, submitter_id, message_id, channel_id)
+        return row is not None
+
+    async def get_pending_adds(self, service_type: str, limit: int) -> list[dict]:
+        """保留中のURLを古い順に取得"""
+        rows = await self.pool.fetch("""
+            SELECT id, guild_id, url, service_type, submitter_id, message_id, channel_id, attempts
+            FROM pending_adds
+            WHERE service_type = $1
+            ORDER BY id
+            LIMIT $2
+        """, service_type, limit)
+        return [dict(row) for row in rows]
+
+    async def delete_pending_add(self, pending_id: int) -> None:
+        """保留キューから削除"""
+        await self.pool.execute("DELETE FROM pending_adds WHERE id = $1", pending_id)
+
+    async def record_pending_add_failure(self, pending_id: int) -> int:
+        """保留中URLの追加失敗回数を加算し、加算後の回数を返す"""
+        attempts = await self.pool.fetchval("""
+            UPDATE pending_adds SET attempts = attempts + 1
+            WHERE id = $1
+            RETURNING attempts
+        """, pending_id)
+        return attempts or 0
+
+    async def count_pending_adds(self) -> dict[str, int]:
+        """サービスごとの保留件数を取得"""
+        rows = await self.pool.fetch("""
+            SELECT service_type, COUNT(*) AS count FROM pending_adds GROUP BY service_type
+        """)
+        return {row["service_type"]: row["count"] for row in rows}
+
+    async def set_negative_cache(self, canonical_id: str, service_type: str, reason: str, ttl: float) -> None:
+        """追加できなかった楽曲を理由と共に ttl 秒間記録"""
+        await self.pool.execute("""
+            INSERT INTO negative_cache (canonical_id, service_type, reason, expires_at)
+            VALUES ($1, $2, $3, clock_timestamp() + make_interval(secs => $4))
+            ON CONFLICT (canonical_id) DO UPDATE SET
+                service_type = excluded.service_type,
+                reason = excluded.reason,
+                failed_at = now() AT TIME ZONE 'utc',
+                expires_at = excluded.expires_at
+        """, canonical_id, service_type, reason, float(ttl))
+
+    async def load_negative_cache(self) -> dict[str, tuple[str, float]]:
+        """有効期限内の全記録を {楽曲ID: (理由, 有効期限の UNIX 時刻)} で取得"""
+        rows = await self.pool.fetch("""
+            SELECT canonical_id, reason, EXTRACT(EPOCH FROM expires_at)::float8 AS expires_at
+            FROM negative_cache
+            WHERE expires_at > clock_timestamp()
+        """)
+        return {row["canonical_id"]: (row["reason"], row["expires_at"]) for row in rows}
+
+    async def list_negative_cache(self, limit: int = 20) -> list[dict]:
+        """有効期限内の記録を新しい順に取得（expires_at は UNIX 時刻）"""
+        rows = await self.pool.fetch(f"""
+            SELECT canonical_id, service_type, reason,
+                   to_char(failed_at, '{TIMESTAMP_FORMAT}') AS failed_at,
+                   EXTRACT(EPOCH FROM expires_at)::float8 AS expires_at
+            FROM negative_cache
+            WHERE expires_at > clock_timestamp()
+            ORDER BY failed_at DESC
+            LIMIT $1
+        """, limit)
+        return [dict(row) for row in rows]
+
+    async def delete_negative_cache(self, canonical_id: Optional[str] = None) -> int:
+        """記録を削除し、削除件数を返す（None で全件）"""
+        if canonical_id is None:
+            status = await self.pool.execute("DELETE FROM negative_cache")
+        else:
+            status = await self.pool.execute("""
+                DELETE FROM negative_cache WHERE canonical_id = $1
+            """, canonical_id)
+        return int(status.split()[-1])
+
+    async def delete_expired_negative_cache(self) -> int:
+        """有効期限を過ぎた記録を削除し、削除件数を返す"""
+        status = await self.pool.execute("""
+            DELETE FROM negative_cache WHERE expires_at <= clock_timestamp()
+        """)
+        return int(status.split()[-1])
+
+    async def get_playlist_series(self, series_id: str) -> list[dict]:
+        """系列のプレイリストを順番通りに取得"""
+        rows = await self.pool.fetch("""
+            SELECT position, playlist_id, item_count
+            FROM playlist_series
+            WHERE series_id = $1
+            ORDER BY position
+        """, series_id)
+        return [dict(row) for row in rows]
+
+    async def add_playlist_to_series(
+        self,
+        series_id: str,
+        position: int,
+        playlist_id: str,
+        item_count: int = 0,
+    ) -> bool:
+        """系列の position 番目にプレイリストを登録（他のプロセスが登録済みなら False）"""
+        row = await self.pool.fetchval("""
+            INSERT INTO playlist_series (series_id, position, playlist_id, item_count)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (series_id, position) DO NOTHING
+            RETURNING position
+        """, series_id, position, playlist_id, item_count)
+        return row is not None
+
+    async def add_playlist_item_count(self, series_id: str, playlist_id: str, count: int) -> int:
+        """系列のプレイリストの動画数を加算し、加算後の値を返す"""
+        value = await self.pool.fetchval("""
+            UPDATE playlist_series SET item_count = item_count + $3
+            WHERE series_id = $1 AND playlist_id = $2
+            RETURNING item_count
+        """, series_id, playlist_id, count)
+        return value or 0
+
+    async def set_playlist_item_count(self, series_id: str, playlist_id: str, count: int) -> None:
+        """系列のプレイリストの動画数を実際の値に合わせる"""
+        await self.pool.execute("""
+            UPDATE playlist_series SET item_count = $3
+            WHERE series_id = $1 AND playlist_id = $2
+        """, series_id, playlist_id, count)
@@ -0,0 +1,236 @@
+"""優先度付き実行枠スケジューラーモジュール
+
+サービスごとに同時実行数の枠を設け、空いた枠を対話的な追加（投稿されたメッセージ）へ
+一括処理（過去ログ・プレイリスト取り込み・保留分の反映）より優先して割り当てる。
+一括処理には枠の一部を使わせないため、対話的な追加が一括処理の完了を待つことはない。
+長く待った要求は経過時間に応じて優先度を上げ（エイジング）、一括処理が飢餓状態になるのを防ぐ。
+同じ優先度の要求はサーバー（guild_id）ごとの重みに応じて公平に割り当て、サーバーごとに同時実行数の上限を設ける。
+サービスに AdaptiveLimit を設定すると、固定の同時実行数の代わりにその上限の現在値で枠数を決める。
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Optional
+
+from adaptive_limit import AdaptiveLimit
+from fair_queue import FairTagger
+from metrics import BotMetrics
+
+# 優先度クラス（LANES の並び順が優先度の高い順）
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+# サーバーを指定しない要求（保留分の反映など）の公平キュー上のキー
+NO_GUILD = 0
+
+
+@dataclass
+class _Waiter:
+    """実行枠の割り当て待ち"""
+
+    lane: str
+    guild_id: int
+    enqueued_at: float
+    # サーバー間の公平性のための仮想開始時刻
+    start_tag: float
+    future: asyncio.Future[None]
+
+
+@dataclass
+class _ServiceSlots:
+    """サービスごとの実行中数と待機列"""
+
+    tagger: FairTagger
+    active: dict[str, int] = field(default_factory=lambda: dict.fromkeys(LANES, 0))
+    active_by_guild: dict[int, int] = field(default_factory=dict)
+    waiters: list[_Waiter] = field(default_factory=list)
+    # 設定されている場合は固定の同時実行数の代わりに使う上限
+    limit: Optional[AdaptiveLimit] = None
+
+
+class PriorityScheduler:
+    """サービスごとの実行枠を優先度順に割り当てるスケジューラー"""
+
+    def __init__(
+        self,
+        concurrency: int = 2,
+        reserved_interactive: int = 1,
+        aging: float = 5.0,
+        guild_concurrency: int = 0,
+        metrics: Optional[BotMetrics] = None,
+    ) -> None:
+        """スケジューラーを初期化
+
+        concurrency はサービスごとの同時実行数、reserved_interactive は一括処理に使わせない枠数。
+        aging 秒待つごとに優先度を1段階上げる（0 でエイジングしない）。
+        guild_concurrency はサーバーごとの同時実行数の既定の上限（0 で上限なし）。
+        """
+        self.concurrency = max(1, concurrency)
+        self.reserved_interactive = max(0, reserved_interactive)
+        self.aging = aging
+        self.guild_concurrency = guild_concurrency
+        self.metrics = metrics
+        self._services: dict[str, _ServiceSlots] = {}
+        # サーバーごとの (重み, 同時実行数の上限)。未設定の項目は None
+        self._allocations: dict[int, tuple[Optional[int], Optional[int]]] = {}
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        service: str,
+        lane: str = INTERACTIVE,
+        guild_id: Optional[int] = None,
+    ) -> AsyncIterator[None]:
+        """実行枠を取得し、ブロックを抜けるまで保持する（入れ子で取得しないこと）"""
+        if lane not in LANES:
+            msg = f"不明な優先度クラスです: {lane}"
+            raise ValueError(msg)
+        guild = guild_id or NO_GUILD
+        await self._acquire(service, lane, guild)
+        try:
+            yield
+        finally:
+            self._release(service, lane, guild)
+
+    def set_guild_allocation(self, guild_id: int, share: Optional[int], concurrency: Optional[int]) -> None:
+        """サーバーの重みと同時実行数の上限を設定（None で既定値）"""
+        if share is None and concurrency is None:
+            self._allocations.pop(guild_id, None)
+        else:
+            self._allocations[guild_id] = (share, concurrency)
+
+    def set_limit(self, service: str, limit: AdaptiveLimit) -> None:
+        """サービスの同時実行数を limit の現在値で決めるよう設定"""
+        self._state(service).limit = limit
+
+    def service_concurrency(self, service: str) -> int:
+        """サービスの同時実行数の現在値"""
+        state = self._services.get(service)
+        if state and state.limit:
+            return state.limit.limit
+        return self.concurrency
+
+    def share(self, guild_id: int) -> float:
+        """サーバーの重み（既定は1）"""
+        share = self._allocations.get(guild_id, (None, None))[0]
+        return float(share) if share else 1.0
+
+    def guild_limit(self, guild_id: int) -> int:
+        """サーバーの同時実行数の上限（0 は上限なし）"""
+        concurrency = self._allocations.get(guild_id, (None, None))[1]
+        return concurrency if concurrency is not None else self.guild_concurrency
+
+    def queue_depth(self, service: str, lane: str) -> int:
+        """割り当て待ちの要求数を取得"""
+        state = self._services.get(service)
+        if not state:
+            return 0
+        return sum(1 for waiter in state.waiters if waiter.lane == lane)
+
+    def _state(self, service: str) -> _ServiceSlots:
+        """サービスの実行中数と待機列を取得（初回は作成）"""
+        state = self._services.get(service)
+        if state is None:
+            state = self._services[service] = _ServiceSlots(FairTagger(self.share))
+        return state
+
+    async def _acquire(self, service: str, lane: str, guild: int) -> None:
+        """実行枠が割り当てられるまで待機"""
+        state = self._state(service)
+        waiter = _Waiter(
+            lane,
+            guild,
+            time.monotonic(),
+            state.tagger.tag(guild),
+            asyncio.get_running_loop().create_future(),
+        )
+        state.waiters.append(waiter)
+        self._update_queue_depth(service, lane)
+        self._dispatch(service, state)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.cancelled():
+                state.waiters.remove(waiter)
+                self._update_queue_depth(service, lane)
+            else:
+                # 割り当て直後に取り消された場合は枠を次の要求へ渡す
+                self._release(service, lane, guild)
+            raise
+
+        if self.metrics:
+            waited = time.monotonic() - waiter.enqueued_at
+            self.metrics.increment("scheduler_grants_total", service=service, lane=lane)
+            self.metrics.increment("scheduler_wait_seconds_total", waited, service=service, lane=lane)
+            if guild != NO_GUILD:
+                labels = {"guild": guild, "service": service, "stage": "slot"}
+                self.metrics.increment("guild_queue_waits_total", **labels)
+                self.metrics.increment("guild_queue_wait_seconds_total", waited, **labels)
+
+    def _release(self, service: str, lane: str, guild: int) -> None:
+        """実行枠を返却し、待機中の要求に割り当てる"""
+        state = self._services[service]
+        state.active[lane] -= 1
+        remaining = state.active_by_guild.get(guild, 0) - 1
+        if remaining > 0:
+            state.active_by_guild[guild] = remaining
+        else:
+            state.active_by_guild.pop(guild, None)
+        self._dispatch(service, state)
+
+    def _dispatch(self, service: str, state: _ServiceSlots) -> None:
+        """空いている実行枠を優先度の高い待機中の要求から割り当てる"""
+        while state.waiters:
+            now = time.monotonic()
+            # 取り消し済みの待機は取り消した側が待機列から外す
+            candidates = [
+                waiter for waiter in state.waiters
+                if not waiter.future.done() and self._can_run(state, waiter)
+            ]
+            if not candidates:
+                break
+            # 優先度が同じならサーバー間の公平性（開始タグ）、次に到着順で選ぶ
+            waiter = min(
+                candidates,
+                key=lambda item: (self._effective_rank(item, now), item.start_tag, item.enqueued_at),
+            )
+            state.waiters.remove(waiter)
+            state.tagger.advance(waiter.start_tag)
+            state.active[waiter.lane] += 1
+            state.active_by_guild[waiter.guild_id] = state.active_by_guild.get(waiter.guild_id, 0) + 1
+            waiter.future.set_result(None)
+            self._update_queue_depth(service, waiter.lane)
+
+    def _can_run(self, state: _ServiceSlots, waiter: _Waiter) -> bool:
+        """待機中の要求に実行枠を割り当てられるか"""
+        concurrency = state.limit.limit if state.limit else self.concurrency
+        if sum(state.active.values()) >= concurrency:
+            return False
+        # 上限が予約枠以下に下がっても一括処理が止まらないよう1枠は使わせる
+        if waiter.lane == BULK and state.active[BULK] >= max(1, concurrency - self.reserved_interactive):
+            return False
+        if waiter.guild_id == NO_GUILD:
+            return True
+        limit = self.guild_limit(waiter.guild_id)
+        return limit <= 0 or state.active_by_guild.get(waiter.guild_id, 0) < limit
+
+    def _effective_rank(self, waiter: _Waiter, now: float) -> int:
+        """待ち時間を考慮した優先度（小さいほど優先）"""
+        rank = LANES.index(waiter.lane)
+        if self.aging <= 0:
+            return rank
+        return max(0, rank - int((now - waiter.enqueued_at) / self.aging))
+
+    def _update_queue_depth(self, service: str, lane: str) -> None:
+        """割り当て待ちの要求数をメトリクスに記録"""
+        if self.metrics:
+            self.metrics.set_gauge(
+                "scheduler_queue_depth",
+                self.queue_depth(service, lane),
+                service=service,
+                lane=lane,
+            )
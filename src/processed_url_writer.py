@@ -0,0 +1,205 @@
+"""処理済みURLのグループコミットモジュール
+
+処理済みURLの記録をメモリ上に溜め、一定件数または一定時間ごとに1つのトランザクションで
+まとめて書き込む。行ごとのコミット（fsync）をなくし、大量追加時の書き込み性能を上げる。
+集計テーブルはトリガーで更新されるため、同じトランザクション内でまとめて反映される。
+コミットに失敗した記録はバッファに戻し、失敗が続くごとに間隔を広げて再試行する（重複は書き込み時に無視される）。
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from metrics import BotMetrics
+from storage import ProcessedUrl, StorageBackend
+
+# コミットに失敗した記録を破棄するまでの連続失敗回数と、再試行までの待機秒数（失敗ごとに倍にする）
+MAX_COMMIT_RETRIES = 5
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30.0
+
+
+class ProcessedUrlWriter:
+    """処理済みURLの書き込みをまとめてコミットするクラス"""
+
+    def __init__(
+        self,
+        db_manager: StorageBackend,
+        max_rows: int = 200,
+        max_delay: float = 0.05,
+        metrics: Optional[BotMetrics] = None,
+    ) -> None:
+        """書き込みクラスを初期化
+
+        max_rows 件以上溜まるか、最初の1件から max_delay 秒経過した時点で溜まっている分をまとめてコミットする。
+        """
+        self.db_manager = db_manager
+        self.max_rows = max(1, max_rows)
+        self.max_delay = max_delay
+        self.metrics = metrics
+
+        self._buffer: list[ProcessedUrl] = []
+        # 同じコミットに含まれる記録の完了を待つ Future（コミットごとに作り直す）
+        self._batch_done: Optional[asyncio.Future[None]] = None
+        self._batch_waiters = 0
+        # コミット前（書き込み中を含む）の (guild_id, url)
+        self._unflushed: dict[tuple[int, str], int] = {}
+        self._has_rows = asyncio.Event()
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # 連続したコミットの失敗回数
+        self._failures = 0
+
+    def start(self) -> None:
+        """定期コミットタスクを開始"""
+        if self._task:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="processed-url-writer")
+
+    async def stop(self) -> None:
+        """定期コミットタスクを停止し、残りの記録を書き込む"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logging.exception(f"終了時の処理済みURLの書き込みに失敗しました（{len(self._buffer)}件を破棄）: {e}")
+            self._count_dropped(len(self._buffer))
+            self._buffer = []
+            self._unflushed.clear()
+
+    async def mark_url_processed(
+        self,
+        guild_id: int,
+        url: str,
+        service_type: str,
+        video_id: Optional[str] = None,
+        title: Optional[str] = None,
+        *,
+        canonical_id: Optional[str] = None,
+        submitter_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+        wait: bool = True,
+    ) -> None:
+        """URLを処理済みとして記録（wait=True ではコミット完了まで待機し、失敗時は例外を送出）"""
+        record = ProcessedUrl(
+            guild_id, url, service_type, video_id, title,
+            canonical_id, submitter_id, message_id, channel_id,
+        )
+        done = self._enqueue(record)
+        if wait:
+            self._batch_waiters += 1
+            # 待機側がキャンセルされてもコミット自体は中断しない
+            await asyncio.shield(done)
+
+    def is_pending(self, guild_id: int, url: str) -> bool:
+        """URLがまだコミットされていない記録に含まれるかチェック"""
+        return (guild_id, url) in self._unflushed
+
+    async def flush(self) -> None:
+        """溜まっている記録を直ちにコミットし、完了まで待機"""
+        # 書き込み中のコミットがあればその完了も待つ
+        await self._flush_once()
+        while self._buffer:
+            await self._flush_once()
+
+    def _enqueue(self, record: ProcessedUrl) -> asyncio.Future[None]:
+        """記録をバッファに追加し、そのコミットの完了を表す Future を返す"""
+        if not self._task:
+            self.start()
+        if self._batch_done is None:
+            self._batch_done = asyncio.get_running_loop().create_future()
+            self._batch_waiters = 0
+        self._buffer.append(record)
+        key = (record.guild_id, record.url)
+        self._unflushed[key] = self._unflushed.get(key, 0) + 1
+        self._has_rows.set()
+        if len(self._buffer) >= self.max_rows:
+            self._full.set()
+        return self._batch_done
+
+    async def _run(self) -> None:
+        """件数または時間の条件を満たすたびにコミット"""
+        while True:
+            await self._has_rows.wait()
+            if len(self._buffer) < self.max_rows:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_delay)
+                except TimeoutError:
+                    pass
+            try:
+                await self._flush_once()
+            except Exception:
+                # 失敗は待機側へ通知済み。バッファに戻した記録は間隔を空けて再試行する
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** max(0, self._failures - 1))
+                await asyncio.sleep(delay)
+
+    async def _flush_once(self) -> None:
+        """バッファの記録を1つのトランザクションで書き込む"""
+        async with self._flush_lock:
+            records, self._buffer = self._buffer, []
+            done, self._batch_done = self._batch_done, None
+            waiters = self._batch_waiters
+            self._has_rows.clear()
+            self._full.clear()
+            if not records:
+                return
+
+            requeued = False
+            try:
+                await self.db_manager.mark_urls_processed(records)
+            except Exception as e:
+                self._failures += 1
+                if self.metrics:
+                    self.metrics.increment("db_write_batches_total", result="failure")
+                if self._failures <= MAX_COMMIT_RETRIES:
+                    logging.warning(
+                        f"処理済みURLの書き込みに失敗しました。{len(records)}件を再試行します"
+                        f"（連続{self._failures}回目）: {e}",
+                    )
+                    # 後から追加された記録より先にコミットするよう先頭に戻す（未コミットの扱いも続ける）
+                    self._buffer[:0] = records
+                    self._has_rows.set()
+                    if len(self._buffer) >= self.max_rows:
+                        self._full.set()
+                    requeued = True
+                else:
+                    logging.exception(
+                        f"処理済みURLの書き込みに{self._failures}回続けて失敗したため、{len(records)}件を破棄します: {e}",
+                    )
+                    self._failures = 0
+                    self._count_dropped(len(records))
+                if done and not done.done():
+                    done.set_exception(e)
+                    if not waiters:
+                        # 待機している呼び出し元がいない場合は未取得の例外として警告させない
+                        done.exception()
+                raise
+            else:
+                self._failures = 0
+                if self.metrics:
+                    self.metrics.increment("db_write_batches_total", result="success")
+                    self.metrics.increment("db_write_rows_total", len(records))
+                if done and not done.done():
+                    done.set_result(None)
+            finally:
+                if not requeued:
+                    for record in records:
+                        key = (record.guild_id, record.url)
+                        count = self._unflushed.get(key, 0) - 1
+                        if count > 0:
+                            self._unflushed[key] = count
+                        else:
+                            self._unflushed.pop(key, None)
+
+    def _count_dropped(self, count: int) -> None:
+        """コミットできずに破棄した記録の件数をメトリクスに記録"""
+        if self.metrics and count:
+            self.metrics.increment("db_write_rows_dropped_total", count)
@@ -0,0 +1,114 @@
+"""終了時の処理中の追加の引き継ぎモジュール
+
+終了要求を受けたら新しい追加を始めず、受け付けたURLは保留キュー（pending_adds）へ引き継ぐ。
+処理中の追加は期限まで完了を待ち、期限までに終わらなかったものも保留キューへ引き継いでから取り消す。
+引き継いだURLは次に起動したプロセスの保留キューから追加されるため、再起動でリンクを取りこぼさない。
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from metrics import BotMetrics
+
+
+@dataclass
+class _Work:
+    """処理中の追加"""
+
+    url: str
+    # 保留キューへの記録に使う投稿（discord.Message）
+    message: Any
+    task: Optional[asyncio.Task]
+
+
+class ShutdownDrain:
+    """処理中の追加の追跡と終了時の引き継ぎクラス"""
+
+    def __init__(
+        self,
+        hand_off: Callable[[str, Any], Awaitable[bool]],
+        timeout: float = 20.0,
+        metrics: Optional[BotMetrics] = None,
+    ) -> None:
+        """引き継ぎを初期化
+
+        hand_off は URL と投稿を受け取って保留キューに記録し、記録したかを返すコールバック。
+        timeout は処理中の追加の完了を待つ最大秒数。
+        """
+        self.hand_off_callback = hand_off
+        self.timeout = timeout
+        self.metrics = metrics
+        self.draining = False
+        self._work: dict[int, _Work] = {}
+        self._next_key = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def in_flight(self) -> int:
+        """処理中の追加の件数"""
+        return len(self._work)
+
+    @contextlib.contextmanager
+    def track(self, url: str, message: Any) -> Iterator[None]:
+        """ブロックを抜けるまで処理中の追加として記録"""
+        key = self._next_key
+        self._next_key += 1
+        self._work[key] = _Work(url, message, asyncio.current_task())
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            del self._work[key]
+            if not self._work:
+                self._idle.set()
+
+    async def hand_off(self, url: str, message: Any, reason: str) -> bool:
+        """URLを保留キューへ引き継ぐ（失敗しても例外は送出しない）"""
+        try:
+            handed_off = await self.hand_off_callback(url, message)
+        except Exception as e:
+            logging.exception(f"終了時の引き継ぎに失敗しました: {url}: {e}")
+            return False
+        if handed_off and self.metrics:
+            self.metrics.increment("shutdown_handoffs_total", reason=reason)
+        return handed_off
+
+    async def drain(self) -> dict:
+        """新しい追加の受け付けを止め、処理中の追加を期限まで待ち、残りを引き継いで取り消す"""
+        if self.draining:
+            return {}
+        self.draining = True
+        started = time.monotonic()
+        waiting = self.in_flight
+        if self.metrics:
+            self.metrics.set_gauge("shutdown_draining", 1)
+        logging.info(f"終了処理を開始しました: 処理中の追加 {waiting}件の完了を最大{self.timeout:.0f}秒待ちます")
+
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(self._idle.wait(), self.timeout)
+
+        remaining = list(self._work.values())
+        handed_off = 0
+        for work in remaining:
+            if await self.hand_off(work.url, work.message, "deadline"):
+                handed_off += 1
+        # 引き継いだ後は途中の追加を続けない（完了していても次のプロセスの重複チェックで除外される）
+        current = asyncio.current_task()
+        for work in remaining:
+            if work.task and work.task is not current and not work.task.done():
+                work.task.cancel()
+
+        elapsed = time.monotonic() - started
+        if self.metrics:
+            self.metrics.set_gauge("shutdown_drain_seconds", elapsed)
+        logging.info(
+            f"終了処理: {waiting - len(remaining)}件の追加が完了、期限切れの{len(remaining)}件のうち"
+            f"{handed_off}件を保留キューへ引き継ぎました（{elapsed:.1f}秒）",
+        )
+        return {"completed": waiting - len(remaining), "handed_off": handed_off, "seconds": elapsed}
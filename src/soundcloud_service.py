@@ -3,17 +3,35 @@ OAuth 2.1 (PKCE) 認証とプレイリスト管理機能
 """
 
 import base64
+import contextlib
 import hashlib
 import json
 import logging
 import secrets
+import time
 import webbrowser
-from typing import Dict, List, Optional
-from urllib.parse import parse_qs, urlencode
+from collections.abc import AsyncIterator
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode, urlparse
 
 import aiohttp
 
+from adaptive_limit import AdaptiveLimit
 from config import BotConfig
+from dry_run import DryRunRecorder
+from file_utils import write_text_atomic
+from negative_cache import NegativeCache
+from oauth_callback import OAuthCallbackServer
+from playlist_lock import PlaylistLock
+from url_extractor import URLExtractor
+
+
+def generate_pkce_pair() -> tuple[str, str]:
+    """PKCE の (code_verifier, code_challenge) を生成（code_challenge_method は S256）"""
+    code_verifier = base64.urlsafe_b64encode(secrets.token_bytes(32)).decode("utf-8").rstrip("=")
+    digest = hashlib.sha256(code_verifier.encode("utf-8")).digest()
+    code_challenge = base64.urlsafe_b64encode(digest).decode("utf-8").rstrip("=")
+    return code_verifier, code_challenge
 
 
 class SoundCloudService:
@@ -23,32 +41,85 @@ class SoundCloudService:
     AUTH_URL = "https://secure.soundcloud.com/authorize"
     TOKEN_URL = "https://secure.soundcloud.com/oauth/token"
     API_BASE = "https://api.soundcloud.com"
+    REDIRECT_URI = "http://localhost:8888/callback"
+    # ブラウザでの認証を待つ最大秒数
+    AUTH_TIMEOUT = 300.0
 
     # OAuth スコープ
     SCOPES = ["non-expiring"]  # プレイリスト管理に必要
 
-    def __init__(self) -> None:
-        """SoundCloud サービスを初期化"""
+    def __init__(
+        self,
+        playlist_lock: Optional[PlaylistLock] = None,
+        limiter: Optional[AdaptiveLimit] = None,
+        negative_cache: Optional[NegativeCache] = None,
+        dry_run: Optional[DryRunRecorder] = None,
+    ) -> None:
+        """SoundCloud サービスを初期化
+
+        limiter を渡すとAPI呼び出しの応答時間とレート制限を記録し、
+        negative_cache を渡すと解決できなかったトラックを記録する。
+        dry_run を渡すとプレイリストの更新を行わずに記録だけを残す。
+        """
         self.config = BotConfig()
+        self.url_extractor = URLExtractor()
         self.access_token: Optional[str] = None
         self.client_session: Optional[aiohttp.ClientSession] = None
+        self.playlist_lock = playlist_lock
+        self.limiter = limiter
+        self.negative_cache = negative_cache
+        self.dry_run = dry_run
+
+        # 接続先の上書き（ローカルの偽APIサーバーでの検証用）
+        if self.config.soundcloud_api_base_url:
+            self.API_BASE = self.config.soundcloud_api_base_url.rstrip("/")
+
+    def _playlist_write_guard(self) -> contextlib.AbstractAsyncContextManager:
+        """プレイリストへの書き込みを他プロセスと直列化するコンテキスト"""
+        if self.playlist_lock:
+            return self.playlist_lock.hold(f"soundcloud:{self.config.soundcloud_playlist_id}")
+        return contextlib.nullcontext()
+
+    @property
+    def is_available(self) -> bool:
+        """有効なアクセストークンがあり、プレイリスト操作が可能か"""
+        return self.access_token is not None
+
+    @contextlib.asynccontextmanager
+    async def _request(self, method: str, path: str, **kwargs: Any) -> AsyncIterator[aiohttp.ClientResponse]:
+        """APIリクエストを送信し、応答時間とレート制限（429）を同時実行数の制御に記録"""
+        started = time.monotonic()
+        recorded = False
+        try:
+            async with self.client_session.request(method, f"{self.API_BASE}{path}", **kwargs) as response:
+                if self.limiter:
+                    self.limiter.record(started, throttled=response.status == 429, failed=response.status >= 500)
+                recorded = True
+                yield response
+        except aiohttp.ClientError:
+            if self.limiter and not recorded:
+                self.limiter.record(started, failed=True)
+            raise
 
     async def initialize(self) -> None:
-        """SoundCloud API サービスを初期化"""
+        """SoundCloud API サービスを初期化
+
+        保存済みトークンの読み込みのみを行い、対話的な認証は行わない。
+        トークンがない場合は未認証のまま返り、再度呼び出すとトークンファイルを読み直す。
+        """
         try:
-            self.client_session = aiohttp.ClientSession()
+            if not self.client_session:
+                self.client_session = aiohttp.ClientSession()
 
             # 保存されたトークンがあるかチェック
             await self._load_saved_token()
 
             if not self.access_token:
-                # 認証が必要
-                if not self.config.soundcloud_client_id or not self.config.soundcloud_client_secret:
-                    logging.warning("SoundCloud API認証情報が設定されていません")
-                    return
-
-                logging.info("SoundCloud OAuth認証を開始します...")
-                await self._authenticate()
+                logging.warning(
+                    "SoundCloudの有効なトークンがありません。"
+                    "`python start.py auth soundcloud` で取得するまで追加は保留されます",
+                )
+                return
 
             logging.info("SoundCloud API サービスを初期化しました")
 
@@ -74,94 +145,64 @@ class SoundCloudService:
             except Exception as e:
                 logging.exception(f"SoundCloudトークン読み込みエラー: {e}")
 
-    async def _authenticate(self) -> None:
-        """OAuth 2.1 (PKCE) 認証フローを実行"""
+    def authorization_url(self, code_challenge: str, state: str) -> str:
+        """OAuth 2.1 (PKCE) の認証URLを構築"""
+        auth_params = {
+            "client_id": self.config.soundcloud_client_id,
+            "redirect_uri": self.REDIRECT_URI,
+            "response_type": "code",
+            "code_challenge": code_challenge,
+            "code_challenge_method": "S256",
+            "state": state,
+            "scope": " ".join(self.SCOPES),
+        }
+        return f"{self.AUTH_URL}?{urlencode(auth_params)}"
+
+    async def authenticate_with_local_server(
+        self,
+        callback_server: Optional[OAuthCallbackServer] = None,
+        timeout: float = AUTH_TIMEOUT,
+    ) -> bool:
+        """ブラウザを開き、ローカルサーバーで認証コードを受け取る認証フローを実行
+
+        callback_server を渡すと、同じポートで待ち受ける他の認証要求と並行して待機できる。
+        """
         try:
             # PKCE パラメータ生成
-            code_verifier = self._generate_code_verifier()
-            code_challenge = self._generate_code_challenge(code_verifier)
+            code_verifier, code_challenge = generate_pkce_pair()
             state = secrets.token_urlsafe(32)
 
-            # 認証URL構築
-            auth_params = {
-                "client_id": self.config.soundcloud_client_id,
-                "redirect_uri": "http://localhost:8888/callback",  # ローカルサーバー
-                "response_type": "code",
-                "code_challenge": code_challenge,
-                "code_challenge_method": "S256",
-                "state": state,
-                "scope": " ".join(self.SCOPES),
-            }
-
-            auth_url = f"{self.AUTH_URL}?{urlencode(auth_params)}"
+            async with contextlib.AsyncExitStack() as stack:
+                if callback_server is None:
+                    redirect = urlparse(self.REDIRECT_URI)
+                    callback_server = await stack.enter_async_context(
+                        OAuthCallbackServer(redirect.hostname, redirect.port, redirect.path),
+                    )
+                # ブラウザを開く前に登録し、即座に戻ってきたリダイレクトも取りこぼさない
+                callback_server.expect(state)
 
-            logging.info("ブラウザでSoundCloud認証画面を開きます...")
-            webbrowser.open(auth_url)
+                logging.info("ブラウザでSoundCloud認証画面を開きます...")
+                webbrowser.open(self.authorization_url(code_challenge, state))
 
-            # ローカルサーバーで認証コードを受信
-            auth_code = await self._wait_for_auth_code()
+                auth_code = await callback_server.wait_for_code(state, timeout)
 
-            if auth_code:
-                # アクセストークンを取得
-                await self._exchange_code_for_token(auth_code, code_verifier)
-            else:
-                logging.error("SoundCloud認証コードの取得に失敗しました")
+            # アクセストークンを取得
+            return await self.exchange_code_for_token(auth_code, code_verifier)
 
+        except TimeoutError:
+            logging.error(f"SoundCloud認証が{timeout:.0f}秒以内に完了しませんでした")
+            return False
         except Exception as e:
             logging.exception(f"SoundCloud認証エラー: {e}")
+            return False
 
-    def _generate_code_verifier(self) -> str:
-        """PKCE code_verifier を生成"""
-        return base64.urlsafe_b64encode(secrets.token_bytes(32)).decode("utf-8").rstrip("=")
-
-    def _generate_code_challenge(self, code_verifier: str) -> str:
-        """PKCE code_challenge を生成"""
-        digest = hashlib.sha256(code_verifier.encode("utf-8")).digest()
-        return base64.urlsafe_b64encode(digest).decode("utf-8").rstrip("=")
-
-    async def _wait_for_auth_code(self) -> Optional[str]:
-        """ローカルサーバーで認証コードを待機"""
-        import asyncio
-
-        from aiohttp import web
-
-        auth_code = None
-
-        async def callback_handler(request):
-            nonlocal auth_code
-            query_params = parse_qs(str(request.query_string))
-
-            if "code" in query_params:
-                auth_code = query_params["code"][0]
-                return web.Response(text="認証成功！このウィンドウを閉じてください。")
-            return web.Response(text="認証失敗", status=400)
-
-        app = web.Application()
-        app.router.add_get("/callback", callback_handler)
-
-        runner = web.AppRunner(app)
-        await runner.setup()
-        site = web.TCPSite(runner, "localhost", 8888)
-        await site.start()
-
-        try:
-            # 最大5分間待機
-            for _ in range(300):
-                if auth_code:
-                    break
-                await asyncio.sleep(1)
-        finally:
-            await runner.cleanup()
-
-        return auth_code
-
-    async def _exchange_code_for_token(self, auth_code: str, code_verifier: str) -> None:
+    async def exchange_code_for_token(self, auth_code: str, code_verifier: str) -> bool:
         """認証コードをアクセストークンに交換"""
         token_data = {
             "grant_type": "authorization_code",
             "client_id": self.config.soundcloud_client_id,
             "client_secret": self.config.soundcloud_client_secret,
-            "redirect_uri": "http://localhost:8888/callback",
+            "redirect_uri": self.REDIRECT_URI,
             "code": auth_code,
             "code_verifier": code_verifier,
         }
@@ -178,17 +219,15 @@ class SoundCloudService:
                 # トークンを保存
                 await self._save_token(token_response)
                 logging.info("SoundCloudアクセストークンを取得しました")
-            else:
-                error_text = await response.text()
-                logging.error(f"SoundCloudトークン取得エラー: {response.status} - {error_text}")
+                return True
+            error_text = await response.text()
+            logging.error(f"SoundCloudトークン取得エラー: {response.status} - {error_text}")
+            return False
 
     async def _save_token(self, token_data: Dict) -> None:
         """アクセストークンを保存"""
-        token_file = self.config.soundcloud_token_file
-        token_file.parent.mkdir(parents=True, exist_ok=True)
-
-        with open(token_file, "w", encoding="utf-8") as f:
-            json.dump(token_data, f, indent=2)
+        # 複数シャードプロセスが同時に更新しても壊れないよう置き換えで書き込む
+        write_text_atomic(self.config.soundcloud_token_file, json.dumps(token_data, indent=2))
 
     async def _validate_token(self) -> bool:
         """トークンの有効性を確認"""
@@ -196,8 +235,9 @@ class SoundCloudService:
             return False
 
         try:
-            async with self.client_session.get(
-                f"{self.API_BASE}/me",
+            async with self._request(
+                "GET",
+                "/me",
                 headers={"Authorization": f"OAuth {self.access_token}"},
             ) as response:
                 return response.status == 200
@@ -213,14 +253,22 @@ class SoundCloudService:
         try:
             params = {"url": url}
 
-            async with self.client_session.get(
-                f"{self.API_BASE}/resolve",
+            async with self._request(
+                "GET",
+                "/resolve",
                 params=params,
                 headers={"Authorization": f"OAuth {self.access_token}"},
             ) as response:
                 if response.status == 200:
                     return await response.json()
                 logging.error(f"SoundCloud URL解決エラー: {response.status}")
+                # 削除済み・非公開のトラックは再投稿時に解決を試みないよう記録する
+                if response.status in (403, 404) and self.negative_cache:
+                    await self.negative_cache.add(
+                        self.url_extractor.get_canonical_id(url),
+                        "soundcloud",
+                        f"resolve {response.status}",
+                    )
                 return None
 
         except Exception as e:
@@ -249,55 +297,67 @@ class SoundCloudService:
                 logging.error("SoundCloudトラックIDが見つかりません")
                 return False
 
-            # 重複チェック
-            if await self._is_track_in_playlist(track_id):
-                logging.info(f"トラックは既にプレイリストに存在します: {track_id}")
-                return True
+            # PUT はトラック一覧全体を置き換えるため、取得から更新までを他プロセスと直列化する
+            async with self._playlist_write_guard():
+                track_ids = await self._get_playlist_track_ids()
+                if track_ids is None:
+                    return False
 
-            # プレイリストにトラックを追加
-            playlist_data = {
-                "playlist": {
-                    "tracks": [{"id": track_id}],
-                },
-            }
+                # 重複チェック（ドライランで書き込みを省略したトラックも追加済みとして扱う）
+                if track_id in track_ids or (self.dry_run and self.dry_run.was_written("soundcloud", str(track_id))):
+                    logging.info(f"トラックは既にプレイリストに存在します: {track_id}")
+                    return True
 
-            async with self.client_session.put(
-                f"{self.API_BASE}/playlists/{self.config.soundcloud_playlist_id}",
-                json=playlist_data,
-                headers={
-                    "Authorization": f"OAuth {self.access_token}",
-                    "Content-Type": "application/json",
-                },
-            ) as response:
-                if response.status in [200, 201]:
-                    logging.info(f"SoundCloudプレイリストにトラックを追加しました: {track_id}")
+                if self.dry_run:
+                    await self.dry_run.write("soundcloud", [str(track_id)])
                     return True
-                error_text = await response.text()
-                logging.error(f"SoundCloudプレイリスト追加エラー: {response.status} - {error_text}")
-                return False
+
+                # 既存トラックの末尾に追加したトラック一覧で更新
+                playlist_data = {
+                    "playlist": {
+                        "tracks": [{"id": existing_id} for existing_id in [*track_ids, track_id]],
+                    },
+                }
+
+                async with self._request(
+                    "PUT",
+                    f"/playlists/{self.config.soundcloud_playlist_id}",
+                    json=playlist_data,
+                    headers={
+                        "Authorization": f"OAuth {self.access_token}",
+                        "Content-Type": "application/json",
+                    },
+                ) as response:
+                    if response.status in [200, 201]:
+                        logging.info(f"SoundCloudプレイリストにトラックを追加しました: {track_id}")
+                        return True
+                    error_text = await response.text()
+                    logging.error(f"SoundCloudプレイリスト追加エラー: {response.status} - {error_text}")
+                    return False
 
         except Exception as e:
             logging.exception(f"SoundCloudプレイリスト追加中にエラー: {e}")
             return False
 
-    async def _is_track_in_playlist(self, track_id: int) -> bool:
-        """トラックがプレイリストに既に存在するかチェック"""
+    async def _get_playlist_track_ids(self) -> Optional[List[int]]:
+        """プレイリストに登録済みのトラックIDを順番通りに取得（取得失敗時は None）"""
         try:
-            async with self.client_session.get(
-                f"{self.API_BASE}/playlists/{self.config.soundcloud_playlist_id}",
+            async with self._request(
+                "GET",
+                f"/playlists/{self.config.soundcloud_playlist_id}",
                 headers={"Authorization": f"OAuth {self.access_token}"},
             ) as response:
                 if response.status == 200:
                     playlist_data = await response.json()
                     tracks = playlist_data.get("tracks", [])
 
-                    return any(track.get("id") == track_id for track in tracks)
+                    return [track.get("id") for track in tracks]
                 logging.error(f"プレイリスト取得エラー: {response.status}")
-                return False
+                return None
 
         except Exception as e:
-            logging.exception(f"プレイリスト重複チェック中にエラー: {e}")
-            return False
+            logging.exception(f"プレイリスト取得中にエラー: {e}")
+            return None
 
     async def get_track_title(self, track_id: int) -> Optional[str]:
         """トラックのタイトルを取得"""
@@ -305,8 +365,9 @@ class SoundCloudService:
             return None
 
         try:
-            async with self.client_session.get(
-                f"{self.API_BASE}/tracks/{track_id}",
+            async with self._request(
+                "GET",
+                f"/tracks/{track_id}",
                 headers={"Authorization": f"OAuth {self.access_token}"},
             ) as response:
                 if response.status == 200:
@@ -330,8 +391,9 @@ class SoundCloudService:
                 "linked_partitioning": "true",
             }
 
-            async with self.client_session.get(
-                f"{self.API_BASE}/tracks",
+            async with self._request(
+                "GET",
+                "/tracks",
                 params=params,
                 headers={"Authorization": f"OAuth {self.access_token}"},
             ) as response:
@@ -0,0 +1,267 @@
+"""ストレージバックエンド定義モジュール
+
+Botが利用する永続化操作のインターフェースと、設定に応じた実装の生成を提供する
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import NamedTuple, Optional
+
+from config import BotConfig
+
+
+class ProcessedUrl(NamedTuple):
+    """処理済みURLの1行分（processed_urls の列順）"""
+
+    guild_id: int
+    url: str
+    service_type: str
+    video_id: Optional[str] = None
+    title: Optional[str] = None
+    canonical_id: Optional[str] = None
+    submitter_id: Optional[int] = None
+    message_id: Optional[int] = None
+    channel_id: Optional[int] = None
+
+
+class StorageBackend(ABC):
+    """ストレージバックエンドの基底クラス"""
+
+    @abstractmethod
+    async def initialize(self) -> None:
+        """ストレージを初期化し、未適用のマイグレーションを適用"""
+
+    async def close(self) -> None:
+        """接続などのリソースを解放"""
+
+    @abstractmethod
+    async def ping(self) -> None:
+        """ストレージに問い合わせできるか確認（できない場合は例外を送出）"""
+
+    @abstractmethod
+    async def set_monitored_channel(self, guild_id: int, channel_id: int) -> None:
+        """監視対象チャンネルを設定"""
+
+    @abstractmethod
+    async def get_monitored_channel(self, guild_id: int) -> Optional[int]:
+        """監視対象チャンネルを取得"""
+
+    @abstractmethod
+    async def get_monitored_channel_ids(self) -> set[int]:
+        """全サーバーの監視対象チャンネルIDを取得"""
+
+    @abstractmethod
+    async def set_notification_channel(self, guild_id: int, channel_id: Optional[int]) -> None:
+        """通知チャンネルを設定"""
+
+    @abstractmethod
+    async def get_notification_channel(self, guild_id: int) -> Optional[int]:
+        """通知チャンネルを取得"""
+
+    @abstractmethod
+    async def is_url_processed(self, guild_id: int, url: str) -> bool:
+        """URLが既に処理済みかチェック"""
+
+    @abstractmethod
+    async def get_processed_canonical_ids(self, guild_id: int, canonical_ids: list[str]) -> set[str]:
+        """指定した楽曲IDのうち処理済みのものをまとめて取得"""
+
+    @abstractmethod
+    async def mark_url_processed(
+        self,
+        guild_id: int,
+        url: str,
+        service_type: str,
+        video_id: Optional[str] = None,
+        title: Optional[str] = None,
+        *,
+        canonical_id: Optional[str] = None,
+        submitter_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+    ) -> None:
+        """URLを処理済みとしてマーク"""
+
+    @abstractmethod
+    async def mark_urls_processed(self, records: list[ProcessedUrl]) -> None:
+        """複数のURLを1つのトランザクションで処理済みとしてマーク"""
+
+    @abstractmethod
+    async def get_first_submission(self, guild_id: int, canonical_id: str) -> Optional[dict]:
+        """楽曲を最初に投稿したユーザー情報を取得"""
+
+    @abstractmethod
+    async def get_user_submissions(
+        self,
+        guild_id: int,
+        submitter_id: int,
+        limit: int = 20,
+    ) -> list[dict]:
+        """ユーザーの投稿履歴を新しい順に取得"""
+
+    @abstractmethod
+    async def get_channel_urls_since(
+        self,
+        guild_id: int,
+        channel_id: int,
+        since: str,
+    ) -> list[dict]:
+        """チャンネルで指定日時（UTC, YYYY-MM-DD HH:MM:SS）以降に投稿されたURLを取得"""
+
+    @abstractmethod
+    async def get_server_settings(self, guild_id: int) -> dict:
+        """サーバー設定を取得"""
+
+    @abstractmethod
+    async def get_guild_stats(self, guild_id: int, days: int = 7) -> dict:
+        """集計テーブルからサーバーの追加統計を取得"""
+
+    @abstractmethod
+    async def set_retention_days(self, guild_id: int, days: Optional[int]) -> None:
+        """URL履歴の保持日数を設定（None でデフォルトに戻す）"""
+
+    @abstractmethod
+    async def set_write_allocation(
+        self,
+        guild_id: int,
+        share: Optional[int],
+        concurrency: Optional[int],
+    ) -> None:
+        """書き込みの重みと同時実行数の上限を設定（None で既定値に戻す）"""
+
+    @abstractmethod
+    async def get_write_allocations(self) -> dict[int, tuple[Optional[int], Optional[int]]]:
+        """書き込み配分を個別に設定したサーバーの (重み, 同時実行数の上限) を取得"""
+
+    @abstractmethod
+    async def get_retention_targets(self, default_days: int) -> list[tuple[int, int]]:
+        """URL履歴を持つ各サーバーの保持日数を取得（0 は無期限）"""
+
+    @abstractmethod
+    async def delete_expired_urls(self, guild_id: int, days: int, batch_size: int) -> int:
+        """保持期間を過ぎたURL履歴を最大 batch_size 件削除し、削除件数を返す"""
+
+    @abstractmethod
+    async def incremental_vacuum(self, pages: int = 0) -> None:
+        """削除で生じた空き領域を回収"""
+
+    @abstractmethod
+    async def analyze(self) -> None:
+        """クエリプランナー用の統計情報を更新"""
+
+    @abstractmethod
+    async def acquire_lease(self, name: str, holder: str, ttl: float) -> bool:
+        """リースを取得または延長（他の保持者の有効なリースがある場合は False）"""
+
+    @abstractmethod
+    async def release_lease(self, name: str, holder: str) -> None:
+        """保持しているリースを解放"""
+
+    @abstractmethod
+    async def enqueue_pending_add(
+        self,
+        guild_id: int,
+        url: str,
+        service_type: str,
+        *,
+        submitter_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+    ) -> bool:
+        """認証待ちのURLを保留キューに追加（既に保留中なら False）"""
+
+    @abstractmethod
+    async def get_pending_adds(self, service_type: str, limit: int) -> list[dict]:
+        """保留中のURLを古い順に取得"""
+
+    @abstractmethod
+    async def delete_pending_add(self, pending_id: int) -> None:
+        """保留キューから削除"""
+
+    @abstractmethod
+    async def record_pending_add_failure(self, pending_id: int) -> int:
+        """保留中URLの追加失敗回数を加算し、加算後の回数を返す"""
+
+    @abstractmethod
+    async def count_pending_adds(self) -> dict[str, int]:
+        """サービスごとの保留件数を取得"""
+
+    @abstractmethod
+    async def set_negative_cache(self, canonical_id: str, service_type: str, reason: str, ttl: float) -> None:
+        """追加できなかった楽曲を理由と共に ttl 秒間記録"""
+
+    @abstractmethod
+    async def load_negative_cache(self) -> dict[str, tuple[str, float]]:
+        """有効期限内の全記録を {楽曲ID: (理由, 有効期限の UNIX 時刻)} で取得"""
+
+    @abstractmethod
+    async def list_negative_cache(self, limit: int = 20) -> list[dict]:
+        """有効期限内の記録を新しい順に取得（expires_at は UNIX 時刻）"""
+
+    @abstractmethod
+    async def delete_negative_cache(self, canonical_id: Optional[str] = None) -> int:
+        """記録を削除し、削除件数を返す（None で全件）"""
+
+    @abstractmethod
+    async def delete_expired_negative_cache(self) -> int:
+        """有効期限を過ぎた記録を削除し、削除件数を返す"""
+
+    @abstractmethod
+    async def get_playlist_series(self, series_id: str) -> list[dict]:
+        """系列のプレイリストを順番通りに取得"""
+
+    @abstractmethod
+    async def add_playlist_to_series(
+        self,
+        series_id: str,
+        position: int,
+        playlist_id: str,
+        item_count: int = 0,
+    ) -> bool:
+        """系列の position 番目にプレイリストを登録（他のプロセスが登録済みなら False）"""
+
+    @abstractmethod
+    async def add_playlist_item_count(self, series_id: str, playlist_id: str, count: int) -> int:
+        """系列のプレイリストの動画数を加算し、加算後の値を返す"""
+
+    @abstractmethod
+    async def set_playlist_item_count(self, series_id: str, playlist_id: str, count: int) -> None:
+        """系列のプレイリストの動画数を実際の値に合わせる"""
+
+    async def cleanup_old_urls(
+        self,
+        days: int = 30,
+        batch_size: int = 500,
+        pause: float = 0.0,
+    ) -> int:
+        """古いURL履歴をクリーンアップ（days はサーバー個別設定がない場合の保持日数）"""
+        deleted = 0
+        for guild_id, retention_days in await self.get_retention_targets(days):
+            # 書き込みロックを長時間保持しないよう小さなトランザクションに分割
+            while True:
+                count = await self.delete_expired_urls(guild_id, retention_days, batch_size)
+                deleted += count
+                if count < batch_size:
+                    break
+                await asyncio.sleep(pause)
+
+        logging.info(f"保持期間を過ぎたURL履歴をクリーンアップしました（{deleted}件）")
+        return deleted
+
+
+def create_storage(config: BotConfig) -> StorageBackend:
+    """設定に応じたストレージバックエンドを生成"""
+    if config.database_url:
+        from postgres_database import PostgresDatabaseManager
+
+        logging.info("PostgreSQLストレージを使用します")
+        return PostgresDatabaseManager(
+            config.database_url,
+            min_pool_size=config.database_pool_min_size,
+            max_pool_size=config.database_pool_max_size,
+        )
+
+    from database import DatabaseManager
+
+    return DatabaseManager(config.database_path)
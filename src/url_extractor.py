@@ -5,6 +5,9 @@ import re
 from typing import List, Optional
 from urllib.parse import parse_qs, urlparse
 
+# 正規表現を実行する前の簡易判定に使うホスト名
+MUSIC_HOST_MARKERS = ("youtube.com", "youtu.be", "soundcloud.com")
+
 
 class URLExtractor:
     """URL抽出・解析クラス"""
@@ -19,12 +22,22 @@ class URLExtractor:
             r"https?://(?:m\.)?youtube\.com/watch\?v=([a-zA-Z0-9_-]{11})",
         ]
 
+        # YouTube プレイリスト URL パターン（動画URLに付く list= は対象外）
+        self.youtube_playlist_pattern = (
+            r"https?://(?:www\.|m\.|music\.)?youtube\.com/playlist\?list=([a-zA-Z0-9_-]+)"
+        )
+
         # SoundCloud URL パターン
         self.soundcloud_patterns = [
             r"https?://(?:www\.)?soundcloud\.com/[a-zA-Z0-9\-_]+/[a-zA-Z0-9\-_]+",
             r"https?://(?:m\.)?soundcloud\.com/[a-zA-Z0-9\-_]+/[a-zA-Z0-9\-_]+",
         ]
 
+    def may_contain_music_url(self, text: str) -> bool:
+        """音楽サービスのホスト名を含む可能性があるか（正規表現より前の安価な判定）"""
+        lowered = text.lower()
+        return any(marker in lowered for marker in MUSIC_HOST_MARKERS)
+
     def extract_urls(self, text: str) -> List[str]:
         """テキストから音楽サービスのURLを抽出"""
         urls = []
@@ -35,6 +48,10 @@ class URLExtractor:
             for match in matches:
                 urls.append(match.group(0))
 
+        # YouTube プレイリストURLを抽出
+        for match in re.finditer(self.youtube_playlist_pattern, text, re.IGNORECASE):
+            urls.append(match.group(0))
+
         # SoundCloud URLを抽出
         for pattern in self.soundcloud_patterns:
             matches = re.finditer(pattern, text, re.IGNORECASE)
@@ -88,6 +105,21 @@ class URLExtractor:
                 }
         return None
 
+    def get_canonical_id(self, url: str) -> Optional[str]:
+        """URLから楽曲を一意に識別するIDを生成"""
+        service_type = self.identify_service(url)
+
+        if service_type == "youtube":
+            video_id = self.extract_youtube_video_id(url)
+            return f"youtube:{video_id}" if video_id else None
+
+        if service_type == "soundcloud":
+            track_info = self.extract_soundcloud_track_info(url)
+            if track_info:
+                return f"soundcloud:{track_info['user']}/{track_info['track']}".lower()
+
+        return None
+
     def validate_youtube_url(self, url: str) -> bool:
         """YouTube URLの有効性を検証"""
         video_id = self.extract_youtube_video_id(url)
@@ -117,6 +149,11 @@ class URLExtractor:
             return "list" in query_params
         return False
 
+    def extract_youtube_playlist_id(self, url: str) -> Optional[str]:
+        """YouTube プレイリストURL（/playlist?list=）からプレイリストIDを抽出"""
+        match = re.search(self.youtube_playlist_pattern, url, re.IGNORECASE)
+        return match.group(1) if match else None
+
     def is_youtube_shorts(self, url: str) -> bool:
         """YouTube Shorts URLかどうか判定"""
         return "/shorts/" in url.lower()
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """Discord音楽リンク収集Bot 起動スクリプト
 設定確認と起動を行います
+
+`python start.py auth youtube|soundcloud` で音楽サービスの認証トークンを取得します
+`python start.py vacuum` で既存のSQLiteデータベースを incremental auto_vacuum に変換します
 """
 
 import os
@@ -31,6 +34,20 @@ def check_oauth_credentials():
     return True
 
 
+def check_oauth_tokens():
+    """認証トークンの存在確認（未取得でもBotは起動し、該当サービスへの追加は保留される）"""
+    token_files = [("YouTube", "youtube", Path("./data/youtube_oauth_token.json"))]
+    if os.getenv("SOUNDCLOUD_CLIENT_ID") and os.getenv("SOUNDCLOUD_CLIENT_SECRET"):
+        token_files.append(("SoundCloud", "soundcloud", Path("./data/soundcloud_oauth_token.json")))
+
+    for name, service, token_file in token_files:
+        if token_file.exists():
+            print(f"✅ {name}の認証トークンが見つかりました")
+        else:
+            print(f"⚠️  {name}の認証トークンがありません（認証するまで追加は保留されます）")
+            print(f"📋 python start.py auth {service} で取得してください")
+
+
 def check_required_env_vars():
     """必須環境変数の確認"""
     from dotenv import load_dotenv
@@ -81,8 +98,46 @@ def check_required_env_vars():
     return True
 
 
+def run_auth(argv):
+    """認証トークン取得サブコマンド"""
+    sys.path.append("src")
+    from auth_cli import main as auth_main
+
+    sys.exit(auth_main(argv))
+
+
+def run_vacuum():
+    """SQLiteデータベースを incremental auto_vacuum に変換するサブコマンド（Bot停止中に実行）"""
+    import asyncio
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    sys.path.append("src")
+    from config import BotConfig
+    from database import DatabaseManager
+
+    config = BotConfig()
+    if config.database_url:
+        print("✅ PostgreSQL を使用しているため変換は不要です")
+        sys.exit(0)
+    if not config.database_path.exists():
+        print("✅ データベースはまだありません（作成時に設定されます）")
+        sys.exit(0)
+
+    print(f"🧹 {config.database_path} を変換しています（サイズに応じて時間がかかります）...")
+    converted = asyncio.run(DatabaseManager(config.database_path).convert_to_incremental_vacuum())
+    print("✅ 変換しました" if converted else "✅ 既に変換済みです")
+    sys.exit(0)
+
+
 def main():
     """メイン関数"""
+    if len(sys.argv) > 1 and sys.argv[1] == "auth":
+        run_auth(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "vacuum":
+        run_vacuum()
+
     print("🎵 Discord音楽リンク収集Bot 起動スクリプト")
     print("=" * 50)
 
@@ -100,6 +155,8 @@ def main():
         print("📖 詳細はREADME.mdを参照してください。")
         sys.exit(1)
 
+    check_oauth_tokens()
+
     print("\n✅ 基本設定が完了しています")
     print("🚀 Botを起動します...\n")
 
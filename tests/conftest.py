@@ -0,0 +1,90 @@
+"""テスト共通設定
+
+src/ のモジュールをトップレベル名で読み込めるようにし、ストレージのテストで使うバックエンドを用意する。
+PostgreSQL のテストは TEST_DATABASE_URL（管理用の接続先）が設定されている場合のみ実行し、
+テストごとに一時データベースを作成・削除する。
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+from collections.abc import Awaitable, Callable, Iterator
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from database import DatabaseManager
+from storage import StorageBackend
+
+BACKENDS = ["sqlite", "postgres"]
+
+
+def run(coroutine: Awaitable) -> object:
+    """コルーチンを新しいイベントループで実行"""
+    return asyncio.run(coroutine)
+
+
+def _database_dsn(admin_dsn: str, name: str) -> str:
+    """管理用の接続先のデータベース名を置き換えた接続先"""
+    parts = urlsplit(admin_dsn)
+    return urlunsplit(parts._replace(path=f"/{name}"))
+
+
+@pytest.fixture
+def postgres_dsn() -> Iterator[str]:
+    """一時データベースの接続先（TEST_DATABASE_URL 未設定の場合はスキップ）"""
+    admin_dsn = os.getenv("TEST_DATABASE_URL")
+    if not admin_dsn:
+        pytest.skip("TEST_DATABASE_URL が設定されていません")
+    asyncpg = pytest.importorskip("asyncpg")
+    name = f"bot_test_{uuid.uuid4().hex[:12]}"
+
+    async def execute(sql: str) -> None:
+        conn = await asyncpg.connect(admin_dsn)
+        try:
+            await conn.execute(sql)
+        finally:
+            await conn.close()
+
+    run(execute(f'CREATE DATABASE "{name}"'))
+    try:
+        yield _database_dsn(admin_dsn, name)
+    finally:
+        run(execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+
+
+@pytest.fixture(params=BACKENDS)
+def storage_run(request: pytest.FixtureRequest, tmp_path: Path) -> Callable:
+    """初期化済み（initialize=False の場合は未初期化）のストレージを渡してテスト本体（コルーチン関数）を実行する関数"""
+    if request.param == "postgres":
+        from postgres_database import PostgresDatabaseManager
+
+        dsn = request.getfixturevalue("postgres_dsn")
+
+        def create() -> StorageBackend:
+            return PostgresDatabaseManager(dsn, min_pool_size=1, max_pool_size=4)
+    else:
+
+        def create() -> StorageBackend:
+            return DatabaseManager(tmp_path / "bot_data.db")
+
+    def runner(test: Callable[[StorageBackend], Awaitable[None]], *, initialize: bool = True) -> None:
+        async def body() -> None:
+            storage = create()
+            if initialize:
+                await storage.initialize()
+            try:
+                await test(storage)
+            finally:
+                await storage.close()
+
+        run(body())
+
+    runner.backend = request.param
+    # 同じデータベースを使う別のプロセスを模したインスタンスの生成
+    runner.create = create
+    return runner
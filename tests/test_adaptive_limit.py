@@ -0,0 +1,108 @@
+"""AdaptiveLimit のテスト（AIMD による同時実行数の上限の調整）"""
+
+import pytest
+
+import adaptive_limit
+from adaptive_limit import MIN_SAMPLES, WINDOW, AdaptiveLimit
+from metrics import BotMetrics
+
+FAST = 0.01
+SLOW = 0.1
+
+
+class _Clock:
+    """time.monotonic の代わりに手動で進める時計"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    fake = _Clock()
+    monkeypatch.setattr(adaptive_limit.time, "monotonic", fake.monotonic)
+    return fake
+
+
+def _call(limit: AdaptiveLimit, clock: _Clock, latency: float = FAST, **result: bool) -> None:
+    """latency 秒かかった呼び出しを1件記録"""
+    started = clock.now
+    clock.now += latency
+    limit.record(started, **result)
+
+
+def test_rate_limit_halves_down_to_minimum(clock: _Clock) -> None:
+    limit = AdaptiveLimit("youtube", initial=8, minimum=3, maximum=8)
+
+    _call(limit, clock, throttled=True)
+    assert limit.limit == 4
+    _call(limit, clock, throttled=True)
+    assert limit.limit == 3
+    _call(limit, clock, throttled=True)
+    assert limit.limit == 3
+
+
+def test_results_started_before_a_decrease_are_ignored(clock: _Clock) -> None:
+    limit = AdaptiveLimit("youtube", initial=8, maximum=8)
+    started_before = clock.now
+
+    _call(limit, clock, throttled=True)
+    assert limit.limit == 4
+    # 下げる前に開始した呼び出しのレート制限では続けて下げない
+    limit.record(started_before, throttled=True)
+    assert limit.limit == 4
+
+
+def test_no_change_before_min_samples(clock: _Clock) -> None:
+    limit = AdaptiveLimit("youtube", initial=2, maximum=8)
+
+    for _ in range(MIN_SAMPLES - 1):
+        _call(limit, clock)
+    assert limit.limit == 2
+    _call(limit, clock)
+    assert limit.limit == 3
+
+
+def test_additive_increase_stops_at_maximum(clock: _Clock) -> None:
+    metrics = BotMetrics()
+    limit = AdaptiveLimit("youtube", initial=1, maximum=4, metrics=metrics)
+
+    seen = [limit.limit]
+    for _ in range(WINDOW * 3):
+        _call(limit, clock)
+        if limit.limit != seen[-1]:
+            seen.append(limit.limit)
+
+    # 1つずつ上がり、上限を超えない
+    assert seen == [1, 2, 3, 4]
+    assert metrics.get_counter(
+        "service_concurrency_changes_total", service="youtube", direction="up", reason="healthy",
+    ) == 3
+
+
+def test_sustained_p99_latency_increase_backs_off(clock: _Clock) -> None:
+    metrics = BotMetrics()
+    limit = AdaptiveLimit("youtube", initial=8, maximum=8, latency_tolerance=2.0, metrics=metrics)
+    for _ in range(WINDOW):
+        _call(limit, clock)
+    assert limit.limit == 8
+
+    # 窓内に1件だけ遅い呼び出しがあっても p99 は悪化しない
+    _call(limit, clock, SLOW)
+    for _ in range(WINDOW - 1):
+        _call(limit, clock)
+    assert limit.limit == 8
+
+    # 遅い呼び出しが続くと p99 が基準値の2倍を超え、次の判断で半分に下げる
+    slow_calls = 0
+    while limit.limit == 8 and slow_calls < WINDOW:
+        _call(limit, clock, SLOW)
+        slow_calls += 1
+    assert limit.limit == 4
+    assert slow_calls <= limit.maximum + 2
+    assert metrics.get_counter(
+        "service_concurrency_changes_total", service="youtube", direction="down", reason="latency",
+    ) == 1
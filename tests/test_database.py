@@ -0,0 +1,40 @@
+"""SQLite 固有の設定のテスト（incremental auto_vacuum への変換）"""
+
+import asyncio
+import sqlite3
+from pathlib import Path
+
+from database import DatabaseManager
+
+INCREMENTAL = 2
+
+
+def _auto_vacuum(path: Path) -> int:
+    with sqlite3.connect(path) as db:
+        return db.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+
+def test_new_database_uses_incremental_vacuum(tmp_path: Path) -> None:
+    storage = DatabaseManager(tmp_path / "bot.db")
+    asyncio.run(storage.initialize())
+
+    assert _auto_vacuum(storage.db_path) == INCREMENTAL
+
+
+def test_existing_database_is_converted_only_by_explicit_vacuum(tmp_path: Path) -> None:
+    path = tmp_path / "bot.db"
+    with sqlite3.connect(path) as db:
+        db.execute("CREATE TABLE legacy (value TEXT)")
+    storage = DatabaseManager(path)
+
+    # 起動時・稼働中のメンテナンスではファイル全体を書き直す VACUUM を実行しない
+    asyncio.run(storage.initialize())
+    assert _auto_vacuum(path) != INCREMENTAL
+    asyncio.run(storage.incremental_vacuum())
+    assert _auto_vacuum(path) != INCREMENTAL
+
+    # Bot停止中の `python start.py vacuum` から呼び出す変換
+    assert asyncio.run(storage.convert_to_incremental_vacuum())
+    assert _auto_vacuum(path) == INCREMENTAL
+    assert not asyncio.run(storage.convert_to_incremental_vacuum())
+    asyncio.run(storage.incremental_vacuum())
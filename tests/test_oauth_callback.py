@@ -0,0 +1,127 @@
+"""OAuthCallbackServer のテスト（state ごとの認証コードの受け渡し）"""
+
+import asyncio
+import socket
+from collections.abc import Awaitable, Callable
+
+import aiohttp
+import pytest
+
+from oauth_callback import OAuthCallbackServer
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _run(test: Callable[[OAuthCallbackServer, Callable[..., Awaitable[int]]], Awaitable[None]]) -> None:
+    """コールバックサーバーを起動し、クエリを送ってステータスを返す関数と共にテストを実行"""
+    async def body() -> None:
+        port = _free_port()
+        async with OAuthCallbackServer("127.0.0.1", port) as server, aiohttp.ClientSession() as session:
+            async def callback(**query: str) -> int:
+                async with session.get(f"http://127.0.0.1:{port}/callback", params=query) as response:
+                    return response.status
+
+            await test(server, callback)
+
+    asyncio.run(body())
+
+
+def test_matching_state_resolves_its_own_request() -> None:
+    async def test(server: OAuthCallbackServer, callback: Callable[..., Awaitable[int]]) -> None:
+        server.expect("state-a")
+        server.expect("state-b")
+        waiting_b = asyncio.create_task(server.wait_for_code("state-b", timeout=5))
+
+        assert await callback(state="state-a", code="code-a") == 200
+        assert await server.wait_for_code("state-a", timeout=5) == "code-a"
+        assert not waiting_b.done()
+        waiting_b.cancel()
+
+    _run(test)
+
+
+def test_unknown_state_is_rejected() -> None:
+    async def test(server: OAuthCallbackServer, callback: Callable[..., Awaitable[int]]) -> None:
+        server.expect("state-a")
+        waiting = asyncio.create_task(server.wait_for_code("state-a", timeout=5))
+
+        assert await callback(state="forged", code="code-x") == 400
+        assert await callback(code="code-x") == 400
+        # 拒否したコールバックは登録済みの認証要求に影響しない
+        assert not waiting.done()
+        assert await callback(state="state-a", code="code-a") == 200
+        assert await waiting == "code-a"
+        # 解決済みの state への再送も拒否する
+        assert await callback(state="state-a", code="code-b") == 400
+
+    _run(test)
+
+
+def test_concurrent_authorizations_do_not_cross() -> None:
+    async def test(server: OAuthCallbackServer, callback: Callable[..., Awaitable[int]]) -> None:
+        server.expect("first")
+        server.expect("second")
+        waiting = asyncio.gather(
+            server.wait_for_code("first", timeout=5),
+            server.wait_for_code("second", timeout=5),
+        )
+        # 登録と逆の順に、同時にリダイレクトが届く
+        statuses = await asyncio.gather(
+            callback(state="second", code="code-2"),
+            callback(state="first", code="code-1"),
+        )
+
+        assert statuses == [200, 200]
+        assert await waiting == ["code-1", "code-2"]
+
+    _run(test)
+
+
+def test_denied_authorization_raises() -> None:
+    async def test(server: OAuthCallbackServer, callback: Callable[..., Awaitable[int]]) -> None:
+        server.expect("state-a")
+        waiting = asyncio.create_task(server.wait_for_code("state-a", timeout=5))
+
+        assert await callback(state="state-a", error="access_denied") == 400
+        with pytest.raises(RuntimeError, match="access_denied"):
+            await waiting
+
+    _run(test)
+
+
+def test_timed_out_request_is_cleaned_up() -> None:
+    async def test(server: OAuthCallbackServer, callback: Callable[..., Awaitable[int]]) -> None:
+        server.expect("abandoned")
+        with pytest.raises(TimeoutError):
+            await server.wait_for_code("abandoned", timeout=0.05)
+
+        # 期限切れの state は受け付けず、同じ state で登録し直せる
+        assert await callback(state="abandoned", code="late") == 400
+        server.expect("abandoned")
+        waiting = asyncio.create_task(server.wait_for_code("abandoned", timeout=5))
+        await asyncio.sleep(0)
+        assert await callback(state="abandoned", code="retry") == 200
+        assert await waiting == "retry"
+
+    _run(test)
+
+
+def test_stop_cancels_pending_requests() -> None:
+    async def body() -> None:
+        server = OAuthCallbackServer("127.0.0.1", _free_port())
+        await server.start()
+        server.expect("state-a")
+        waiting = asyncio.create_task(server.wait_for_code("state-a", timeout=5))
+        await asyncio.sleep(0)
+
+        await server.stop()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        # 停止後は待機中の認証要求が残らず、同じ state を登録し直せる
+        server.expect("state-a")
+
+    asyncio.run(body())
@@ -0,0 +1,92 @@
+"""PlaylistWriter のテスト（サーバーごとの同時実行数の上限）"""
+
+import asyncio
+
+from playlist_writer import PlaylistWriter
+from priority_scheduler import PriorityScheduler
+
+IMPORT_GUILD_ID = 1
+OTHER_GUILD_ID = 2
+
+
+class _RecordingWrites:
+    """サーバーごとの同時書き込み数と送信したバッチを記録する書き込み関数"""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.active: dict[str, int] = {}
+        self.max_active: dict[str, int] = {}
+        self.batches: list[list[str]] = []
+        self.completed: list[str] = []
+
+    async def write(self, item: str) -> bool:
+        return (await self.write_batch([item]))[0]
+
+    async def write_batch(self, items: list[str]) -> list[bool]:
+        guilds = {item.split(":")[0] for item in items}
+        self.batches.append(items)
+        for guild in guilds:
+            self.active[guild] = self.active.get(guild, 0) + 1
+            self.max_active[guild] = max(self.max_active.get(guild, 0), self.active[guild])
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            for guild in guilds:
+                self.active[guild] -= 1
+        self.completed.extend(items)
+        return [True] * len(items)
+
+
+def _writer(writes: _RecordingWrites, scheduler: PriorityScheduler, batch_size: int) -> PlaylistWriter:
+    return PlaylistWriter(
+        "youtube",
+        writes.write,
+        workers=4,
+        rate=0,
+        write_batch=writes.write_batch,
+        batch_size=batch_size,
+        batch_linger=0.01,
+        scheduler=scheduler,
+    )
+
+
+def _run_import_with_other_guild(batch_size: int) -> tuple[_RecordingWrites, list[bool], list[bool]]:
+    """取り込み中のサーバーと他のサーバーの書き込みを同時に投入"""
+    writes = _RecordingWrites(delay=0.02)
+
+    async def test() -> tuple[list[bool], list[bool]]:
+        scheduler = PriorityScheduler(concurrency=4, reserved_interactive=0, aging=0)
+        scheduler.set_guild_allocation(IMPORT_GUILD_ID, None, 1)
+        writer = _writer(writes, scheduler, batch_size)
+        try:
+            return await asyncio.gather(
+                writer.submit_many([f"{IMPORT_GUILD_ID}:{index}" for index in range(40)], IMPORT_GUILD_ID),
+                writer.submit_many([f"{OTHER_GUILD_ID}:{index}" for index in range(8)], OTHER_GUILD_ID),
+            )
+        finally:
+            await writer.stop()
+
+    imported, other = asyncio.run(test())
+    return writes, imported, other
+
+
+def test_guild_cap_holds_while_other_guild_waits() -> None:
+    writes, imported, other = _run_import_with_other_guild(batch_size=1)
+
+    assert all(imported)
+    assert all(other)
+    # 取り込み中のサーバーは上限（1）を超えず、空いた枠で他のサーバーの書き込みが並行して進む
+    assert writes.max_active[str(IMPORT_GUILD_ID)] == 1
+    assert writes.max_active[str(OTHER_GUILD_ID)] > 1
+    last_other = max(writes.completed.index(f"{OTHER_GUILD_ID}:{index}") for index in range(8))
+    assert last_other < writes.completed.index(f"{IMPORT_GUILD_ID}:39")
+
+
+def test_batches_are_sent_per_guild() -> None:
+    writes, imported, other = _run_import_with_other_guild(batch_size=10)
+
+    assert all(imported)
+    assert all(other)
+    # 1回のバッチには1つのサーバーの要求だけを含め、それぞれのサーバーの実行枠で送信する
+    assert all(len({item.split(":")[0] for item in batch}) == 1 for batch in writes.batches)
+    assert writes.max_active[str(IMPORT_GUILD_ID)] == 1
@@ -0,0 +1,109 @@
+"""PriorityScheduler のテスト（優先度・エイジング・予約枠・サーバー間の公平性）"""
+
+import asyncio
+
+from priority_scheduler import BULK, INTERACTIVE, PriorityScheduler
+
+SERVICE = "youtube"
+
+
+class _Holders:
+    """実行枠を取得して、解放を指示されるまで保持するタスク群"""
+
+    def __init__(self, scheduler: PriorityScheduler) -> None:
+        self.scheduler = scheduler
+        self.granted: list[str] = []
+        self.active: dict[str, int] = {}
+        self.max_active: dict[str, int] = {}
+        self._release: dict[str, asyncio.Event] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self, name: str, lane: str, guild_id: int | None = None) -> None:
+        """実行枠の取得を始め、待機列に入るまで進める"""
+        self._release[name] = asyncio.Event()
+        self._tasks.append(asyncio.create_task(self._hold(name, lane, guild_id)))
+        await asyncio.sleep(0)
+
+    async def release(self, name: str) -> None:
+        """保持している実行枠を解放し、次の割り当てまで進める"""
+        self._release[name].set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+    async def release_all(self) -> None:
+        """割り当てられた順にすべて解放"""
+        released = 0
+        while released < len(self._tasks):
+            await asyncio.sleep(0)
+            if released < len(self.granted):
+                await self.release(self.granted[released])
+                released += 1
+        await asyncio.gather(*self._tasks)
+
+    async def _hold(self, name: str, lane: str, guild_id: int | None) -> None:
+        async with self.scheduler.slot(SERVICE, lane, guild_id):
+            self.granted.append(name)
+            self.active[lane] = self.active.get(lane, 0) + 1
+            self.max_active[lane] = max(self.max_active.get(lane, 0), self.active[lane])
+            await self._release[name].wait()
+            self.active[lane] -= 1
+
+
+def test_interactive_runs_before_queued_bulk() -> None:
+    async def test() -> list[str]:
+        holders = _Holders(PriorityScheduler(concurrency=1, reserved_interactive=0, aging=0))
+        await holders.start("running", BULK)
+        await holders.start("bulk", BULK)
+        await holders.start("interactive", INTERACTIVE)
+        await holders.release_all()
+        return holders.granted
+
+    # 後から来た対話的な追加が、先に待っていた一括処理より先に割り当てられる
+    assert asyncio.run(test()) == ["running", "interactive", "bulk"]
+
+
+def test_aged_bulk_runs_before_new_interactive() -> None:
+    async def test(aging: float) -> list[str]:
+        holders = _Holders(PriorityScheduler(concurrency=1, reserved_interactive=0, aging=aging))
+        await holders.start("running", INTERACTIVE)
+        await holders.start("bulk", BULK)
+        await asyncio.sleep(0.1)
+        await holders.start("interactive", INTERACTIVE)
+        await holders.release_all()
+        return holders.granted
+
+    # エイジングなしでは対話的な追加が常に優先される
+    assert asyncio.run(test(aging=0)) == ["running", "interactive", "bulk"]
+    # aging 秒以上待った一括処理は優先度が上がり、後から来た対話的な追加より先に割り当てられる
+    assert asyncio.run(test(aging=0.05)) == ["running", "bulk", "interactive"]
+
+
+def test_bulk_never_takes_reserved_interactive_slot() -> None:
+    async def test() -> tuple[dict[str, int], list[str]]:
+        holders = _Holders(PriorityScheduler(concurrency=3, reserved_interactive=1, aging=0))
+        for index in range(5):
+            await holders.start(f"bulk-{index}", BULK)
+        # 一括処理が待機していても、予約枠により対話的な追加はすぐに割り当てられる
+        await holders.start("interactive", INTERACTIVE)
+        granted_before_release = list(holders.granted)
+        await holders.release_all()
+        return holders.max_active, granted_before_release
+
+    max_active, granted = asyncio.run(test())
+    assert max_active[BULK] == 2
+    assert granted == ["bulk-0", "bulk-1", "interactive"]
+
+
+def test_guilds_share_slots_fairly() -> None:
+    async def test() -> list[str]:
+        holders = _Holders(PriorityScheduler(concurrency=1, reserved_interactive=0, aging=0))
+        await holders.start("running", BULK)
+        for index in range(4):
+            await holders.start(f"a-{index}", BULK, guild_id=1)
+        for index in range(2):
+            await holders.start(f"b-{index}", BULK, guild_id=2)
+        await holders.release_all()
+        return holders.granted[1:]
+
+    # 先に大量に待っているサーバーがあっても、後から来たサーバーの要求が交互に割り当てられる
+    assert asyncio.run(test()) == ["a-0", "b-0", "a-1", "b-1", "a-2", "a-3"]
@@ -0,0 +1,65 @@
+"""ProcessedUrlWriter のテスト（コミット失敗時の再試行と破棄）"""
+
+import asyncio
+
+import pytest
+
+import processed_url_writer
+from metrics import BotMetrics
+from processed_url_writer import ProcessedUrlWriter
+from storage import ProcessedUrl
+
+
+class _FlakyStorage:
+    """指定回数だけ書き込みに失敗するストレージ"""
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.rows: list[ProcessedUrl] = []
+
+    async def mark_urls_processed(self, records: list[ProcessedUrl]) -> None:
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("database is unavailable")
+        self.rows.extend(records)
+
+
+def _write_urls(failures: int) -> tuple[_FlakyStorage, BotMetrics, bool]:
+    """待機しない記録を5件投入し、再試行が落ち着くまで待つ"""
+    storage = _FlakyStorage(failures)
+    metrics = BotMetrics()
+
+    async def test() -> bool:
+        writer = ProcessedUrlWriter(storage, max_delay=0.01, metrics=metrics)
+        try:
+            for index in range(5):
+                await writer.mark_url_processed(1, f"https://youtu.be/v{index}", "youtube", wait=False)
+            await asyncio.sleep(0.5)
+            return writer.is_pending(1, "https://youtu.be/v0")
+        finally:
+            await writer.stop()
+
+    return storage, metrics, asyncio.run(test())
+
+
+@pytest.fixture(autouse=True)
+def _short_retry_delay(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(processed_url_writer, "RETRY_BASE_DELAY", 0.01)
+
+
+def test_failed_commit_is_retried() -> None:
+    storage, metrics, pending = _write_urls(failures=3)
+
+    assert [record.url for record in storage.rows] == [f"https://youtu.be/v{index}" for index in range(5)]
+    assert not pending
+    assert metrics.get_counter("db_write_batches_total", result="failure") == 3
+    assert metrics.get_counter("db_write_rows_dropped_total") == 0
+
+
+def test_records_are_dropped_after_repeated_failures() -> None:
+    storage, metrics, pending = _write_urls(failures=100)
+
+    assert storage.rows == []
+    assert not pending
+    assert metrics.get_counter("db_write_batches_total", result="failure") == processed_url_writer.MAX_COMMIT_RETRIES + 1
+    assert metrics.get_counter("db_write_rows_dropped_total") == 5
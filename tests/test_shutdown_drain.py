@@ -0,0 +1,121 @@
+"""ShutdownDrain と HealthServer のテスト（終了時の引き継ぎと準備完了確認）"""
+
+import asyncio
+import socket
+from typing import Any
+
+import aiohttp
+
+from health_server import HealthServer
+from metrics import BotMetrics
+from shutdown_drain import ShutdownDrain
+
+
+class _HandOffs:
+    """保留キューへの引き継ぎを記録するコールバック"""
+
+    def __init__(self) -> None:
+        self.urls: list[str] = []
+
+    async def __call__(self, url: str, message: Any) -> bool:
+        self.urls.append(url)
+        return True
+
+
+async def _work(drain: ShutdownDrain, url: str, seconds: float, finished: list[str]) -> None:
+    """seconds 秒かかる追加を処理中として記録しながら実行"""
+    with drain.track(url, message=None):
+        await asyncio.sleep(seconds)
+        finished.append(url)
+
+
+def test_work_finishing_before_deadline_is_not_handed_off() -> None:
+    async def test() -> tuple[dict, list[str], list[str]]:
+        hand_offs = _HandOffs()
+        drain = ShutdownDrain(hand_offs, timeout=1.0)
+        finished: list[str] = []
+        tasks = [asyncio.create_task(_work(drain, f"url-{index}", 0.05, finished)) for index in range(3)]
+        await asyncio.sleep(0)
+
+        report = await drain.drain()
+        await asyncio.gather(*tasks)
+        return report, finished, hand_offs.urls
+
+    report, finished, handed_off = asyncio.run(test())
+    assert report["completed"] == 3
+    assert report["handed_off"] == 0
+    assert sorted(finished) == ["url-0", "url-1", "url-2"]
+    assert handed_off == []
+
+
+def test_work_running_at_deadline_is_handed_off_once_and_cancelled() -> None:
+    async def test() -> tuple[dict, dict, list[str], list[str], list[bool], BotMetrics]:
+        hand_offs = _HandOffs()
+        metrics = BotMetrics()
+        drain = ShutdownDrain(hand_offs, timeout=0.1, metrics=metrics)
+        finished: list[str] = []
+        fast = asyncio.create_task(_work(drain, "fast", 0.01, finished))
+        slow = asyncio.create_task(_work(drain, "slow", 10, finished))
+        await asyncio.sleep(0)
+
+        report = await drain.drain()
+        # 2回目の呼び出しは何もしない
+        second = await drain.drain()
+        await asyncio.gather(fast, slow, return_exceptions=True)
+        return report, second, finished, hand_offs.urls, [fast.cancelled(), slow.cancelled()], metrics
+
+    report, second, finished, handed_off, cancelled, metrics = asyncio.run(test())
+    assert report["completed"] == 1
+    assert report["handed_off"] == 1
+    assert finished == ["fast"]
+    assert handed_off == ["slow"]
+    assert cancelled == [False, True]
+    assert second == {}
+    assert metrics.get_counter("shutdown_handoffs_total", reason="deadline") == 1
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _readyz(readiness: Any) -> tuple[int, dict]:
+    """readiness を使うヘルスチェックサーバーの /readyz の応答を取得"""
+    async def test() -> tuple[int, dict]:
+        port = _free_port()
+        server = HealthServer(readiness, host="127.0.0.1", port=port)
+        await server.start()
+        try:
+            async with aiohttp.ClientSession() as session, session.get(f"http://127.0.0.1:{port}/readyz") as response:
+                return response.status, await response.json()
+        finally:
+            await server.stop()
+
+    return asyncio.run(test())
+
+
+def test_readyz_reports_ready() -> None:
+    async def readiness() -> dict:
+        return {"ready": True, "database": "ok"}
+
+    assert _readyz(readiness) == (200, {"ready": True, "database": "ok"})
+
+
+def test_readyz_returns_503_when_not_ready() -> None:
+    async def readiness() -> dict:
+        return {"ready": False, "draining": True}
+
+    status, body = _readyz(readiness)
+    assert status == 503
+    assert body["draining"] is True
+
+
+def test_readyz_returns_503_when_readiness_raises() -> None:
+    async def readiness() -> dict:
+        msg = "database is unavailable"
+        raise ConnectionError(msg)
+
+    status, body = _readyz(readiness)
+    assert status == 503
+    assert body == {"ready": False, "error": "database is unavailable"}
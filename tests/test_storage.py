@@ -0,0 +1,222 @@
+"""StorageBackend の契約テスト（SQLite / PostgreSQL の両方で同じ結果になること）"""
+
+import asyncio
+
+import aiosqlite
+
+from storage import ProcessedUrl, StorageBackend
+
+GUILD_ID = 1
+OTHER_GUILD_ID = 2
+
+
+async def _backdate(storage: StorageBackend, urls: list[str], days: int) -> None:
+    """処理済みURLの処理日時を days 日前にする"""
+    if hasattr(storage, "pool"):
+        await storage.pool.execute("""
+            UPDATE processed_urls
+            SET processed_at = (now() AT TIME ZONE 'utc') - make_interval(days => $2)
+            WHERE url = ANY($1::text[])
+        """, urls, days)
+        return
+    async with aiosqlite.connect(storage.db_path) as db:
+        await db.executemany("""
+            UPDATE processed_urls SET processed_at = datetime('now', ?) WHERE url = ?
+        """, [(f"-{days} days", url) for url in urls])
+        await db.commit()
+
+
+def test_migrations_are_idempotent(storage_run) -> None:
+    async def test(storage: StorageBackend) -> None:
+        # 2回目の初期化では適用済みのマイグレーションを再実行しない
+        await storage.initialize()
+        await storage.ping()
+
+    storage_run(test)
+
+
+def test_concurrent_initialize_applies_migrations_once(storage_run) -> None:
+    async def test(storage: StorageBackend) -> None:
+        # 複数シャードの同時起動を模して、未初期化のデータベースを並行して初期化する
+        others = [storage_run.create() for _ in range(3)]
+        try:
+            await asyncio.gather(storage.initialize(), *(other.initialize() for other in others))
+            for other in others:
+                await other.ping()
+        finally:
+            for other in others:
+                await other.close()
+        assert await storage.get_playlist_series("PL0") == []
+
+    storage_run(test, initialize=False)
+
+
+def test_mark_url_processed_deduplicates(storage_run) -> None:
+    async def test(storage: StorageBackend) -> None:
+        url = "https://youtu.be/aaaaaaaaaaa"
+        await storage.mark_url_processed(GUILD_ID, url, "youtube", canonical_id="youtube:aaaaaaaaaaa", submitter_id=10)
+        await storage.mark_url_processed(GUILD_ID, url, "youtube", canonical_id="youtube:aaaaaaaaaaa", submitter_id=11)
+
+        assert await storage.is_url_processed(GUILD_ID, url)
+        assert not await storage.is_url_processed(OTHER_GUILD_ID, url)
+        first = await storage.get_first_submission(GUILD_ID, "youtube:aaaaaaaaaaa")
+        assert first["submitter_id"] == 10
+        assert await storage.get_processed_canonical_ids(
+            GUILD_ID,
+            ["youtube:aaaaaaaaaaa", "youtube:bbbbbbbbbbb"],
+        ) == {"youtube:aaaaaaaaaaa"}
+
+    storage_run(test)
+
+
+def test_mark_urls_processed_batch_deduplicates(storage_run) -> None:
+    async def test(storage: StorageBackend) -> None:
+        records = [
+            ProcessedUrl(GUILD_ID, f"https://youtu.be/v{index}", "youtube", canonical_id=f"youtube:v{index}")
+            for index in range(3)
+        ]
+        # バッチ内・既存行との重複はどちらも無視される
+        await storage.mark_urls_processed([*records, records[0]])
+        await storage.mark_urls_processed(records[1:])
+
+        stats = await storage.get_guild_stats(GUILD_ID)
+        assert stats["totals"] == {"youtube": 3}
+        for record in records:
+            assert await storage.is_url_processed(GUILD_ID, record.url)
+
+    storage_run(test)
+
+
+def test_rollups_count_only_new_rows(storage_run) -> None:
+    async def test(storage: StorageBackend) -> None:
+        for index, (service_type, submitter_id) in enumerate(
+            [("youtube", 10), ("youtube", 10), ("soundcloud", 11), ("youtube", None)],
+        ):
+            await storage.mark_url_processed(GUILD_ID, f"https://example.com/{index}", service_type, submitter_id=submitter_id)
+        # 重複した挿入は集計に加算されない
+        await storage.mark_url_processed(GUILD_ID, "https://example.com/0", "youtube", submitter_id=10)
+        await storage.mark_url_processed(OTHER_GUILD_ID, "https://example.com/0", "youtube", submitter_id=12)
+
+        stats = await storage.get_guild_stats(GUILD_ID)
+        assert stats["totals"] == {"youtube": 3, "soundcloud": 1}
+        assert stats["top_submitters"] == [(10, 2), (11, 1)]
+        assert sum(sum(day.values()) for day in stats["daily"].values()) == 4
+        assert (await storage.get_guild_stats(OTHER_GUILD_ID))["totals"] == {"youtube": 1}
+
+    storage_run(test)
+
+
+def test_delete_expired_urls_in_chunks(storage_run) -> None:
+    async def test(storage: StorageBackend) -> None:
+        urls = [f"https://youtu.be/v{index}" for index in range(5)]
+        for url in urls:
+            await storage.mark_url_processed(GUILD_ID, url, "youtube")
+            await storage.mark_url_processed(OTHER_GUILD_ID, url, "youtube")
+        await _backdate(storage, urls[:3], days=10)
+
+        await storage.set_retention_days(OTHER_GUILD_ID, 0)
+        assert sorted(await storage.get_retention_targets(5)) == [(GUILD_ID, 5)]
+
+        deleted = []
+        while count := await storage.delete_expired_urls(GUILD_ID, 5, batch_size=2):
+            deleted.append(count)
+        assert deleted == [2, 1]
+
+        remaining = [url for url in urls if await storage.is_url_processed(GUILD_ID, url)]
+        assert remaining == urls[3:]
+        # 他のサーバーと保持期間内の行は残り、集計は削除の影響を受けない
+        assert await storage.is_url_processed(OTHER_GUILD_ID, urls[0])
+        assert (await storage.get_guild_stats(GUILD_ID))["totals"] == {"youtube": 5}
+
+    storage_run(test)
+
+
+def test_leases(storage_run) -> None:
+    async def test(storage: StorageBackend) -> None:
+        assert await storage.acquire_lease("playlist:a", "holder-1", ttl=30)
+        # 保持者は延長でき、他の保持者は有効期限内は取得できない
+        assert await storage.acquire_lease("playlist:a", "holder-1", ttl=30)
+        assert not await storage.acquire_lease("playlist:a", "holder-2", ttl=30)
+        assert await storage.acquire_lease("playlist:b", "holder-2", ttl=30)
+
+        # 保持者以外は解放できない
+        await storage.release_lease("playlist:a", "holder-2")
+        assert not await storage.acquire_lease("playlist:a", "holder-2", ttl=30)
+        await storage.release_lease("playlist:a", "holder-1")
+        assert await storage.acquire_lease("playlist:a", "holder-2", ttl=0.2)
+
+        # 期限切れのリースは他の保持者が取得できる
+        await asyncio.sleep(1.1)
+        assert await storage.acquire_lease("playlist:a", "holder-1", ttl=30)
+
+    storage_run(test)
+
+
+def test_pending_adds(storage_run) -> None:
+    async def test(storage: StorageBackend) -> None:
+        assert await storage.enqueue_pending_add(GUILD_ID, "https://youtu.be/a", "youtube", submitter_id=10, message_id=20)
+        assert not await storage.enqueue_pending_add(GUILD_ID, "https://youtu.be/a", "youtube")
+        assert await storage.enqueue_pending_add(OTHER_GUILD_ID, "https://youtu.be/a", "youtube")
+        assert await storage.enqueue_pending_add(GUILD_ID, "https://soundcloud.com/a/b", "soundcloud")
+
+        assert await storage.count_pending_adds() == {"youtube": 2, "soundcloud": 1}
+        items = await storage.get_pending_adds("youtube", 10)
+        assert [(item["guild_id"], item["url"]) for item in items] == [
+            (GUILD_ID, "https://youtu.be/a"),
+            (OTHER_GUILD_ID, "https://youtu.be/a"),
+        ]
+        assert items[0]["submitter_id"] == 10
+        assert items[0]["message_id"] == 20
+        assert items[0]["attempts"] == 0
+        assert len(await storage.get_pending_adds("youtube", 1)) == 1
+
+        assert await storage.record_pending_add_failure(items[0]["id"]) == 1
+        assert await storage.record_pending_add_failure(items[0]["id"]) == 2
+        await storage.delete_pending_add(items[0]["id"])
+        assert await storage.count_pending_adds() == {"youtube": 1, "soundcloud": 1}
+
+    storage_run(test)
+
+
+def test_negative_cache(storage_run) -> None:
+    async def test(storage: StorageBackend) -> None:
+        await storage.set_negative_cache("youtube:a", "youtube", "videoNotFound", ttl=3600)
+        await storage.set_negative_cache("soundcloud:1", "soundcloud", "notFound", ttl=3600)
+        await storage.set_negative_cache("youtube:expired", "youtube", "videoNotFound", ttl=0.2)
+        # 同じ楽曲の再記録は理由を上書きする
+        await storage.set_negative_cache("youtube:a", "youtube", "forbidden", ttl=3600)
+        await asyncio.sleep(1.1)
+
+        entries = await storage.load_negative_cache()
+        assert set(entries) == {"youtube:a", "soundcloud:1"}
+        assert entries["youtube:a"][0] == "forbidden"
+        listed = await storage.list_negative_cache(10)
+        assert {entry["canonical_id"] for entry in listed} == {"youtube:a", "soundcloud:1"}
+
+        assert await storage.delete_expired_negative_cache() == 1
+        assert await storage.delete_negative_cache("youtube:a") == 1
+        assert await storage.delete_negative_cache("youtube:a") == 0
+        assert await storage.delete_negative_cache() == 1
+        assert await storage.load_negative_cache() == {}
+
+    storage_run(test)
+
+
+def test_playlist_series(storage_run) -> None:
+    async def test(storage: StorageBackend) -> None:
+        assert await storage.get_playlist_series("PL0") == []
+        assert await storage.add_playlist_to_series("PL0", 0, "PL0")
+        assert await storage.add_playlist_to_series("PL0", 1, "PL1", item_count=3)
+        # 他のプロセスが先に登録した位置には登録できない
+        assert not await storage.add_playlist_to_series("PL0", 1, "PL-other")
+
+        assert await storage.add_playlist_item_count("PL0", "PL0", 5) == 5
+        assert await storage.add_playlist_item_count("PL0", "PL1", 2) == 5
+        await storage.set_playlist_item_count("PL0", "PL0", 4900)
+        assert await storage.get_playlist_series("PL0") == [
+            {"position": 0, "playlist_id": "PL0", "item_count": 4900},
+            {"position": 1, "playlist_id": "PL1", "item_count": 5},
+        ]
+        assert await storage.get_playlist_series("PL-unknown") == []
+
+    storage_run(test)
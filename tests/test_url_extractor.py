@@ -0,0 +1,70 @@
+"""URLExtractor の簡易判定のテスト（正規表現で抽出できるリンクを取りこぼさないこと）"""
+
+import pytest
+
+import url_extractor
+from url_extractor import URLExtractor
+
+VIDEO_ID = "dQw4w9WgXcQ"
+
+MUSIC_MESSAGES = [
+    f"https://www.youtube.com/watch?v={VIDEO_ID}",
+    f"聴いて HTTPS://WWW.YOUTUBE.COM/watch?v={VIDEO_ID} ！",
+    f"https://youtu.be/{VIDEO_ID}",
+    f"https://YouTu.Be/{VIDEO_ID}",
+    f"https://m.youtube.com/watch?v={VIDEO_ID}",
+    f"https://music.youtube.com/watch?v={VIDEO_ID}&feature=share",
+    f"https://Music.YouTube.com/watch?v={VIDEO_ID}",
+    "https://www.youtube.com/playlist?list=PLabcdefghijklmnop",
+    "https://m.youtube.com/playlist?list=PLabcdefghijklmnop",
+    "https://soundcloud.com/artist-name/track_name",
+    "https://m.soundcloud.com/artist-name/track_name",
+    "https://SOUNDCLOUD.COM/Artist/Track",
+    f"2曲 https://youtu.be/{VIDEO_ID} と https://soundcloud.com/a/b",
+]
+
+OTHER_MESSAGES = [
+    "",
+    "おはようございます",
+    "https://example.com/watch?v=dQw4w9WgXcQ",
+    "https://www.twitch.tv/someone",
+    "youtube で見た",
+]
+
+
+@pytest.mark.parametrize("text", MUSIC_MESSAGES)
+def test_prefilter_accepts_every_extractable_link(text: str) -> None:
+    extractor = URLExtractor()
+
+    # 正規表現で抽出できるリンクを含むメッセージは簡易判定で除外しない
+    assert extractor.extract_urls(text)
+    assert extractor.may_contain_music_url(text)
+
+
+@pytest.mark.parametrize("text", OTHER_MESSAGES)
+def test_prefilter_rejects_text_without_music_hosts(text: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    extractor = URLExtractor()
+    assert extractor.extract_urls(text) == []
+
+    def fail(*args: object, **kwargs: object) -> None:
+        pytest.fail("簡易判定で正規表現を実行しました")
+
+    # 簡易判定は正規表現を使わずに判定する
+    monkeypatch.setattr(url_extractor.re, "finditer", fail)
+    monkeypatch.setattr(url_extractor.re, "search", fail)
+    monkeypatch.setattr(url_extractor.re, "match", fail)
+    assert not extractor.may_contain_music_url(text)
+
+
+def test_every_pattern_host_is_a_marker() -> None:
+    extractor = URLExtractor()
+    patterns = [
+        *extractor.youtube_patterns,
+        extractor.youtube_playlist_pattern,
+        *extractor.soundcloud_patterns,
+    ]
+
+    # パターンを追加した場合は簡易判定のホスト名も追加する
+    for pattern in patterns:
+        host = pattern.split("://", 1)[1].split("/", 1)[0].replace("\\", "")
+        assert any(marker in host for marker in url_extractor.MUSIC_HOST_MARKERS), pattern